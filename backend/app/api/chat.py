@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
+from contextlib import aclosing, suppress
 from datetime import datetime
+import asyncio
+import json
+import logging
 import uuid
 
-from ..core.auth import get_current_user
+from ..core.auth import auth_service, get_current_user
+from ..core.concurrency import ClientDisconnected, run_until_disconnected
+from ..core.idempotency import idempotency_store, request_fingerprint
+from ..core.metrics import metrics
+from ..core.stream_buffer import StreamBuffer, format_sse, parse_event_id, stream_buffers
+from ..core.rate_limit import rate_limiter, limit_standard_user
 from ..models.chat import ChatMessage, ChatResponse, Message, MessageRole
+from ..services.answer_engine import answer_engine, record_answer_source
+from ..services.emergency import emergency_fast_path
+from ..services.faq import faq_index
+from ..services.intent_router import QueryIntent, intent_router
+from ..services.surveillance import symptom_surveillance
 from ..services.health_filter import HealthContextFilter
 from ..services.gemini_service import GeminiHealthBot
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+logger = logging.getLogger(__name__)
 
 # Initialize services
 health_filter = HealthContextFilter()
@@ -21,81 +38,163 @@ def get_gemini_bot():
         gemini_bot = GeminiHealthBot()
     return gemini_bot
 
+SENSITIVE_RESPONSE = (
+    "I understand you may be going through a difficult time. If you're having thoughts of self-harm "
+    "or suicide, please reach out for help immediately:\n\n"
+    "• National Suicide Prevention Lifeline: 988\n"
+    "• Crisis Text Line: Text HOME to 741741\n"
+    "• Emergency Services: 911\n\n"
+    "For other health concerns, I'm here to provide general health information and guidance. "
+    "Please feel free to ask about symptoms, wellness, or when to seek medical care.\n\n"
+    "⚠️ **Important:** If this is a medical emergency, please call 911 immediately."
+)
+
+ERROR_RESPONSE = (
+    "I apologize, but I'm experiencing technical difficulties right now. "
+    "For health-related questions, please consider contacting your healthcare provider "
+    "or calling a medical helpline in your area.\n\n"
+    "⚠️ **For emergencies, call 911 immediately.**"
+)
+
+# Messages of the connection's conversation passed to Gemini as context
+WS_CONTEXT_MESSAGES = 10
+
+def screen_message(content: str) -> Tuple[Optional[str], str]:
+    """
+    Run the health filter and sanitizer on a user message.
+    Returns (canned_reply, sanitized_query); canned_reply is set when the
+    message must not reach Gemini (non-health or sensitive content).
+    """
+    # Validate and filter the message
+    filter_result = health_filter.is_health_related(content)
+    
+    if not filter_result.is_health_related:
+        # Return rejection message for non-health queries
+        return health_filter.get_rejection_message(content), ""
+    
+    # Sanitize the health query
+    sanitized_query = health_filter.sanitize_health_query(content)
+    
+    # Check for sensitive content
+    if sanitized_query.startswith("[SENSITIVE_CONTENT]"):
+        return SENSITIVE_RESPONSE, sanitized_query
+    
+    return None, sanitized_query
+
+def _answer_without_llm(sanitized_query: str, intent: QueryIntent,
+                        emergency_details: bool) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (reply, guidance). reply is set when the emergency guidance, a
+    published FAQ answer or a reference-data template answers the query
+    without Gemini; guidance is the emergency 108 block, if any.
+    """
+    guidance = emergency_fast_path.for_intent(intent)
+    if guidance is not None:
+        if emergency_details:
+            return None, guidance
+        record_answer_source('emergency', intent.language)
+        return guidance, guidance
+    
+    faq_answer = faq_index.lookup(sanitized_query, intent.language)
+    if faq_answer is not None:
+        record_answer_source('faq', intent.language)
+        return faq_answer, None
+    
+    if intent.uses_reference_data:
+        template = answer_engine.answer(sanitized_query, intent.language)
+        if template is not None:
+            record_answer_source('template', intent.language)
+            return template.text, None
+    return None, None
+
+async def _generate_chat_response(message: ChatMessage, uid: str) -> ChatResponse:
+    """Run the filter and Gemini pipeline for one HTTP chat message."""
+    canned_reply, sanitized_query = screen_message(message.content)
+    # Classified once; emergency, FAQ, template and Gemini stages all reuse it.
+    # Rejected messages are classified too, for the language they are counted under
+    intent = intent_router.route(sanitized_query or message.content)
+    if canned_reply is not None:
+        record_answer_source('canned', intent.language)
+        return ChatResponse(
+            message=canned_reply,
+            message_id=str(uuid.uuid4()),
+            session_id=message.session_id or str(uuid.uuid4()),
+            timestamp=datetime.utcnow()
+        )
+    
+    symptom_surveillance.observe(sanitized_query, intent.language, message.region)
+    reply, guidance = _answer_without_llm(sanitized_query, intent, message.emergency_details)
+    if reply is not None:
+        return ChatResponse(
+            message=reply,
+            message_id=str(uuid.uuid4()),
+            session_id=message.session_id or str(uuid.uuid4()),
+            timestamp=datetime.utcnow(),
+            emergency_guidance=guidance
+        )
+    
+    # Only requests that really reach Gemini consume the LLM bucket
+    rate_limiter.check_llm(uid)
+    record_answer_source('llm', intent.language)
+    
+    # Generate response using Gemini API
+    # For now, we'll use a placeholder context - in a full implementation,
+    # you would retrieve conversation history from the database
+    context = []  # This would be populated with previous messages
+    
+    bot = get_gemini_bot()
+    ai_response = await bot.get_health_response(sanitized_query, context, user_id=uid, intent=intent)
+    if guidance is not None:
+        ai_response = f"{guidance}\n\n{ai_response}"
+    
+    return ChatResponse(
+        message=ai_response,
+        message_id=str(uuid.uuid4()),
+        session_id=message.session_id or str(uuid.uuid4()),
+        timestamp=datetime.utcnow(),
+        emergency_guidance=guidance
+    )
+
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     message: ChatMessage,
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None)
 ):
     """
-    Send a message to the health chatbot
+    Send a message to the health chatbot.
+    Retries carrying the same Idempotency-Key get the original answer
+    instead of a second generation.
     """
+    uid = current_user["uid"]
     try:
-        # Validate and filter the message
-        filter_result = health_filter.is_health_related(message.content)
-        
-        if not filter_result.is_health_related:
-            # Return rejection message for non-health queries
-            rejection_message = health_filter.get_rejection_message(message.content)
-            
-            return ChatResponse(
-                message=rejection_message,
-                message_id=str(uuid.uuid4()),
-                session_id=message.session_id or str(uuid.uuid4()),
-                timestamp=datetime.utcnow()
-            )
-        
-        # Sanitize the health query
-        sanitized_query = health_filter.sanitize_health_query(message.content)
-        
-        # Check for sensitive content
-        if sanitized_query.startswith("[SENSITIVE_CONTENT]"):
-            sensitive_response = (
-                "I understand you may be going through a difficult time. If you're having thoughts of self-harm "
-                "or suicide, please reach out for help immediately:\n\n"
-                "• National Suicide Prevention Lifeline: 988\n"
-                "• Crisis Text Line: Text HOME to 741741\n"
-                "• Emergency Services: 911\n\n"
-                "For other health concerns, I'm here to provide general health information and guidance. "
-                "Please feel free to ask about symptoms, wellness, or when to seek medical care.\n\n"
-                "⚠️ **Important:** If this is a medical emergency, please call 911 immediately."
+        if idempotency_key is None:
+            work = _generate_chat_response(message, uid)
+        else:
+            scoped_key = f"chat:{uid}:{idempotency_key}"
+            if idempotency_store.is_replay(scoped_key):
+                response.headers["Idempotent-Replayed"] = "true"
+            work = idempotency_store.run(
+                scoped_key,
+                request_fingerprint(message.model_dump_json()),
+                lambda: _generate_chat_response(message, uid)
             )
-            
-            return ChatResponse(
-                message=sensitive_response,
-                message_id=str(uuid.uuid4()),
-                session_id=message.session_id or str(uuid.uuid4()),
-                timestamp=datetime.utcnow()
-            )
-        
-        # Generate response using Gemini API
-        # For now, we'll use a placeholder context - in a full implementation,
-        # you would retrieve conversation history from the database
-        context = []  # This would be populated with previous messages
-        
-        bot = get_gemini_bot()
-        ai_response = await bot.get_health_response(sanitized_query, context)
-        
-        return ChatResponse(
-            message=ai_response,
-            message_id=str(uuid.uuid4()),
-            session_id=message.session_id or str(uuid.uuid4()),
-            timestamp=datetime.utcnow()
-        )
+        # Cancel the Gemini call when the client disconnects mid-request
+        return await run_until_disconnected(request, work)
         
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error (in production, use proper logging)
         print(f"Chat API error: {str(e)}")
         
         # Return a generic error response
-        error_response = (
-            "I apologize, but I'm experiencing technical difficulties right now. "
-            "For health-related questions, please consider contacting your healthcare provider "
-            "or calling a medical helpline in your area.\n\n"
-            "⚠️ **For emergencies, call 911 immediately.**"
-        )
-        
         return ChatResponse(
-            message=error_response,
+            message=ERROR_RESPONSE,
             message_id=str(uuid.uuid4()),
             session_id=message.session_id or str(uuid.uuid4()),
             timestamp=datetime.utcnow()
@@ -104,7 +203,7 @@ async def send_message(
 @router.post("/validate-query")
 async def validate_health_query(
     message: ChatMessage,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(limit_standard_user)
 ):
     """
     Validate if a query is health-related without generating a response
@@ -150,4 +249,250 @@ async def chat_health_check():
                 "health_filter": "operational",
                 "gemini_api": "error"
             }
-        }
\ No newline at end of file
+        }
+
+def _start_reply(uid: str, content: str, session_id: str, context: List[Message],
+                 emergency_details: bool = True, region: Optional[str] = None) -> StreamBuffer:
+    """
+    Screen a message and start generating its answer into a new stream buffer.
+    Raises HTTPException(429) when the user is over their LLM limits.
+    """
+    canned_reply, sanitized_query = screen_message(content)
+    # Rejected messages are classified too, for the language they are counted under
+    intent = intent_router.route(sanitized_query or content)
+    guidance = None
+    if canned_reply is not None:
+        record_answer_source('canned', intent.language)
+    else:
+        symptom_surveillance.observe(sanitized_query, intent.language, region)
+        canned_reply, guidance = _answer_without_llm(sanitized_query, intent, emergency_details)
+        if canned_reply is None:
+            rate_limiter.check_llm(uid)
+            record_answer_source('llm', intent.language)
+    buffer = stream_buffers.create(owner=uid)
+    buffer.task = asyncio.ensure_future(
+        _produce_reply(buffer, canned_reply, sanitized_query, session_id, list(context), uid, intent, guidance)
+    )
+    return buffer
+
+async def _produce_reply(buffer: StreamBuffer, canned_reply: Optional[str], sanitized_query: str,
+                         session_id: str, context: List[Message], uid: str, intent: QueryIntent,
+                         guidance: Optional[str] = None):
+    """
+    Generate one answer into its buffer as start, [emergency], chunk..., end
+    (or cancelled) events. The emergency event carries the 108 guidance and
+    is buffered before Gemini is called.
+    """
+    buffer.append("start", {"message_id": buffer.message_id, "session_id": session_id})
+    if guidance is not None:
+        buffer.append("emergency", {"message": guidance})
+    try:
+        if canned_reply is not None:
+            reply = canned_reply
+        else:
+            bot = get_gemini_bot()
+            chunks = []
+            try:
+                # aclosing() closes the Gemini stream (and frees its slot) if this task is cancelled
+                async with aclosing(bot.stream_health_response(sanitized_query, context, user_id=uid, intent=intent)) as stream:
+                    async for delta in stream:
+                        chunks.append(delta)
+                        buffer.append("chunk", {"delta": delta})
+                reply = bot.format_health_disclaimer("".join(chunks), intent) if chunks else bot._get_fallback_response()
+            except Exception:
+                logger.exception("Chat stream error")
+                reply = ERROR_RESPONSE
+        buffer.append("end", {
+            "message_id": buffer.message_id,
+            "session_id": session_id,
+            "message": reply,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except asyncio.CancelledError:
+        buffer.append("cancelled", {"message_id": buffer.message_id})
+        raise
+    finally:
+        buffer.finish()
+
+async def _sse_events(buffer: StreamBuffer, after_seq: int):
+    async for seq, event, data in buffer.follow(after_seq):
+        yield format_sse(buffer.event_id(seq), event, data)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.post("/stream")
+async def stream_message(
+    message: ChatMessage,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream the answer as Server-Sent Events with IDs "<message_id>:<seq>".
+    After a dropped connection, GET /chat/stream/{message_id} with
+    Last-Event-ID returns the rest of the same answer.
+    """
+    buffer = _start_reply(current_user["uid"], message.content, message.session_id or str(uuid.uuid4()), [],
+                          emergency_details=message.emergency_details, region=message.region)
+    return StreamingResponse(_sse_events(buffer, 0), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/stream/{message_id}")
+async def resume_stream(
+    message_id: str,
+    current_user: dict = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Resume a streamed answer after the last event the client received
+    """
+    buffer = stream_buffers.get(message_id, current_user["uid"])
+    if buffer is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stream expired or not found")
+    
+    event_message_id, after_seq = parse_event_id(last_event_id)
+    if event_message_id != message_id:
+        after_seq = 0
+    return StreamingResponse(_sse_events(buffer, after_seq), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def _receive_frame(websocket: WebSocket) -> Optional[dict]:
+    """The next frame as a JSON object; None when it is not one (bad JSON, an array, a binary frame)."""
+    try:
+        frame = json.loads(await websocket.receive_text())
+    except (KeyError, ValueError):
+        # Starlette raises KeyError for a binary frame
+        return None
+    return frame if isinstance(frame, dict) else None
+
+def _frame_str(frame: dict, key: str) -> Optional[str]:
+    """A string field of a frame; fields of any other type count as missing."""
+    value = frame.get(key)
+    return value if isinstance(value, str) else None
+
+async def _authenticate_websocket(websocket: WebSocket, token: Optional[str]) -> Optional[dict]:
+    """
+    Verify the Firebase token once for the whole connection. It comes from
+    ?token= or, preferably (it stays out of access logs), from a first
+    {"type": "auth", "token": ...} frame.
+    """
+    if token is None:
+        frame = await _receive_frame(websocket) or {}
+        if frame.get("type") == "auth":
+            token = _frame_str(frame, "token")
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing authentication token")
+        # Token verification may fetch Google's public keys; keep it off the event loop
+        return await run_in_threadpool(auth_service.authenticate_token, token)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "code": e.status_code, "detail": e.detail})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return None
+
+async def _relay_to_websocket(websocket: WebSocket, buffer: StreamBuffer, after_seq: int) -> Optional[str]:
+    """Send buffered and live events as frames; returns the final message, or None if cancelled."""
+    reply = None
+    async for seq, event, data in buffer.follow(after_seq):
+        await websocket.send_json({"type": event, "event_id": buffer.event_id(seq), "message_id": buffer.message_id, **data})
+        if event == "end":
+            reply = data["message"]
+    return reply
+
+async def _relay_until_done(websocket: WebSocket, buffer: StreamBuffer, after_seq: int) -> Optional[str]:
+    """
+    Relay an answer while still reading the socket, so a {"type": "cancel"}
+    frame stops the generation. On disconnect the answer keeps generating
+    for the resume grace period.
+    """
+    relay_task = asyncio.ensure_future(_relay_to_websocket(websocket, buffer, after_seq))
+    while True:
+        receive_task = asyncio.ensure_future(_receive_frame(websocket))
+        done, _ = await asyncio.wait({relay_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+        if relay_task in done:
+            receive_task.cancel()
+            with suppress(asyncio.CancelledError, WebSocketDisconnect):
+                await receive_task
+            return relay_task.result()
+        
+        try:
+            frame = receive_task.result()
+        except WebSocketDisconnect:
+            metrics.increment('ws.client_disconnected')
+            relay_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await relay_task
+            raise
+        
+        if frame is None:
+            await websocket.send_json({"type": "error", "code": 400, "detail": "Expected a JSON object frame"})
+        elif frame.get("type") == "cancel":
+            # The relay sends the resulting "cancelled" event and returns None
+            buffer.cancel()
+        else:
+            await websocket.send_json({"type": "error", "code": 409, "detail": "A response is already in progress"})
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Persistent chat channel: authenticate once, then exchange
+    {"type": "message", "content": ..., "session_id": ...} frames for
+    start / [emergency] / chunk / end frames carrying the streamed answer
+    ("emergency_details": false skips the Gemini part for emergencies). Every frame
+    has an event_id; {"type": "resume", "last_event_id": ...} (also on a
+    new connection) continues an interrupted answer. A {"type": "cancel"}
+    frame stops the generation.
+    """
+    await websocket.accept()
+    current_user = await _authenticate_websocket(websocket, token)
+    if current_user is None:
+        return
+    
+    uid = current_user["uid"]
+    default_session_id = str(uuid.uuid4())
+    context: List[Message] = []
+    await websocket.send_json({"type": "ready", "session_id": default_session_id})
+    
+    try:
+        while True:
+            frame = await _receive_frame(websocket)
+            if frame is None:
+                await websocket.send_json({"type": "error", "code": 400, "detail": "Expected a JSON object frame"})
+                continue
+            
+            if frame.get("type") == "resume":
+                message_id, after_seq = parse_event_id(_frame_str(frame, "last_event_id"))
+                buffer = stream_buffers.get(message_id or _frame_str(frame, "message_id") or "", uid)
+                if buffer is None:
+                    await websocket.send_json({"type": "error", "code": 404, "detail": "Stream expired or not found"})
+                    continue
+                await _relay_until_done(websocket, buffer, after_seq)
+                continue
+            
+            content = (_frame_str(frame, "content") or "").strip()
+            if frame.get("type") != "message" or not content:
+                await websocket.send_json({"type": "error", "code": 400, "detail": "Expected a non-empty message frame"})
+                continue
+            
+            session_id = _frame_str(frame, "session_id") or default_session_id
+            try:
+                buffer = _start_reply(uid, content, session_id, context,
+                                      emergency_details=frame.get("emergency_details", True) is not False,
+                                      region=frame.get("region"))
+            except HTTPException as e:
+                await websocket.send_json({
+                    "type": "error",
+                    "code": e.status_code,
+                    "detail": e.detail,
+                    "retry_after": int(e.headers["Retry-After"]),
+                })
+                continue
+            
+            reply = await _relay_until_done(websocket, buffer, 0)
+            if reply is None:
+                continue
+            
+            now = datetime.utcnow()
+            context.append(Message(id=str(uuid.uuid4()), content=content, role=MessageRole.USER,
+                                   timestamp=now, session_id=session_id, user_id=uid))
+            context.append(Message(id=buffer.message_id, content=reply, role=MessageRole.ASSISTANT,
+                                   timestamp=now, session_id=session_id, user_id=uid))
+            del context[:-WS_CONTEXT_MESSAGES]
+    except WebSocketDisconnect:
+        pass
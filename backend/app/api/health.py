@@ -1,102 +1,334 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Literal, Optional
 import logging
-from datetime import datetime
+from datetime import date, datetime
 
 from app.models.health import (
     ChatMessage, ChatResponse, DiseaseSearchResponse, 
-    VaccinationSearchResponse, EmergencyInfo, HealthSearchQuery
+    VaccinationSearchResponse, EmergencyInfo, HealthSearchQuery,
+    SymptomCheckRequest, SymptomCheckResponse, SymptomListResponse, AutocompleteResponse,
+    VaccinationDueResponse, NearestFacilitiesResponse, SurveillanceResponse, DashboardResponse
 )
 from app.services.health_database import health_db
 from app.services.ai_health_assistant import ai_assistant
+from app.services.analytics import chat_rollups
+from app.services.age_parsing import MAX_AGE_DAYS, age_from_birth_date, age_in_days, parse_age
+from app.services.answer_engine import answer_engine, answer_source_summary, record_answer_source
+from app.services.autocomplete import autocomplete
+from app.services.disease_search import disease_search
+from app.services.emergency import emergency_fast_path
+from app.services.facilities import facility_index
+from app.services.faq import faq_index
+from app.services.immunization_roster import RosterFormatError, immunization_roster
+from app.services.intent_router import intent_router
+from app.services.localization import catalog
+from app.services.normalization import query_normalizer
+from app.services.surveillance import symptom_surveillance, valid_region
+from app.services.symptom_checker import symptom_checker
+from app.services.vaccine_schedule import vaccine_schedule
+from app.core.http_cache import response_cache
+from app.core.concurrency import ClientDisconnected, llm_slots, run_until_disconnected
+from app.core.idempotency import idempotency_store, request_fingerprint
+from app.core.metrics import metrics
+from app.core.rate_limit import rate_limiter, client_key, limit_standard_client, limit_standard_user
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Reference data changes only on redeploy or re-import, so clients may reuse
+# it for a while and then revalidate cheaply with If-None-Match.
+REFERENCE_MAX_AGE = 3600
+EMERGENCY_MAX_AGE = 86400
+
+# Facilities listed with emergency info when the caller sends a location
+EMERGENCY_FACILITIES = 3
+
+async def _answer_health_chat(user_message: str, language: str, user_id: str, limit_key: str,
+                              emergency_details: bool = True, region: Optional[str] = None) -> ChatResponse:
+    """Generates, stores and returns one health chat answer."""
+    # Classified once; every later stage reuses this instead of rescanning the text
+    intent = intent_router.route(user_message, language)
+    # The text's script (or romanized Hindi) can override the client's language
+    language = intent.language
+    symptom_surveillance.observe(user_message, language, region)
+    
+    # Emergencies are answered with precomputed 108 guidance, not after an LLM round trip
+    guidance = emergency_fast_path.for_intent(intent)
+    faq_answer = faq_index.lookup(user_message, language) if guidance is None else None
+    template = None
+    if faq_answer is None and intent.uses_reference_data:
+        template = answer_engine.answer(user_message, language)
+    if guidance is not None and not emergency_details:
+        record_answer_source('emergency', language)
+        bot_response = guidance
+    elif faq_answer is not None:
+        # Reviewed answer to a frequent question
+        record_answer_source('faq', language)
+        bot_response = faq_answer
+    elif template is not None:
+        # Fully answered by the reference tables; no need to have Gemini rephrase them
+        record_answer_source('template', language)
+        bot_response = template.text
+    else:
+        # Only requests that really run the assistant consume the LLM bucket
+        rate_limiter.check_llm(limit_key)
+        
+        # Generate AI response
+        record_answer_source('llm', language)
+        bot_response = await ai_assistant.generate_response_async(
+            user_message, language, user_id=limit_key, intent=intent
+        )
+    if guidance is not None and emergency_details:
+        # The 108 guidance leads; the detail follows it
+        bot_response = f"{guidance}\n\n{bot_response}"
+    
+    # Save to chat history
+    health_db.save_chat_history(user_message, bot_response, language, user_id)
+    
+    return ChatResponse(
+        response=bot_response,
+        language=language,
+        timestamp=datetime.now(),
+        emergency_guidance=guidance
+    )
+
 @router.post("/health/chat", response_model=ChatResponse)
-async def health_chat(message_data: ChatMessage):
-    """Endpoint to handle health-related chat requests."""
+async def health_chat(
+    message_data: ChatMessage,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Endpoint to handle health-related chat requests.
+
+    Retries carrying the same Idempotency-Key reuse the original answer and history row.
+    """
+    user_id = message_data.user_id or 'anonymous'
+    # Anonymous callers would otherwise all share one bucket
+    limit_key = user_id if user_id != 'anonymous' else client_key(request)
     try:
         user_message = message_data.message.strip()
         language = message_data.language
-        user_id = message_data.user_id or 'anonymous'
         
         if not user_message:
             raise HTTPException(status_code=400, detail="Message is required")
         
         logger.info(f"Received health chat message from user {user_id}: '{user_message}' in language '{language}'")
         
-        # Generate AI response
-        bot_response = ai_assistant.generate_response(user_message, language)
-        
-        # Save to chat history
-        health_db.save_chat_history(user_message, bot_response, language, user_id)
-        
-        return ChatResponse(
-            response=bot_response,
-            language=language,
-            timestamp=datetime.now()
-        )
+        if idempotency_key is None:
+            work = _answer_health_chat(user_message, language, user_id, limit_key,
+                                       message_data.emergency_details, message_data.region)
+        else:
+            scoped_key = f"health-chat:{limit_key}:{idempotency_key}"
+            if idempotency_store.is_replay(scoped_key):
+                response.headers["Idempotent-Replayed"] = "true"
+            work = idempotency_store.run(
+                scoped_key,
+                request_fingerprint(message_data.model_dump_json()),
+                lambda: _answer_health_chat(user_message, language, user_id, limit_key,
+                                            message_data.emergency_details, message_data.region)
+            )
+        # Nobody receives the answer once the client is gone, so stop paying for it
+        return await run_until_disconnected(request, work)
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in health chat endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/health/diseases", response_model=DiseaseSearchResponse)
-async def get_diseases(q: str = "", lang: str = "en"):
+@router.get("/health/diseases", response_model=DiseaseSearchResponse, dependencies=[Depends(limit_standard_client)])
+async def get_diseases(request: Request, q: str = "", lang: str = "en"):
     """Endpoint to get disease information."""
     try:
-        results = health_db.search_diseases(q, lang)
-        return DiseaseSearchResponse(diseases=results, total=len(results))
+        # Spellings of one query share a language index and a cache entry
+        normalized = query_normalizer.normalize(q, lang)
+
+        def build():
+            results = disease_search.search(normalized.text, normalized.language)
+            return {'diseases': results, 'total': len(results)}
+
+        key = ('diseases', health_db.data_version, *normalized.cache_key)
+        return response_cache.respond(request, key, build, max_age=REFERENCE_MAX_AGE)
     except Exception as e:
         logger.error(f"Error retrieving diseases: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/health/vaccinations", response_model=VaccinationSearchResponse)
-async def get_vaccinations(age_group: Optional[str] = None, lang: str = "en"):
+@router.get("/health/autocomplete", response_model=AutocompleteResponse, dependencies=[Depends(limit_standard_client)])
+async def get_autocomplete(response: Response, q: str = "", lang: str = "en", limit: int = Query(8, ge=1, le=20)):
+    """Endpoint to suggest disease and vaccine names for a typed prefix."""
+    try:
+        # Called on every keystroke, so not stored in the response cache; browsers may reuse it
+        response.headers["Cache-Control"] = f"public, max-age={REFERENCE_MAX_AGE}"
+        # Only the script may switch languages: a half-typed word is too short to tell romanized Hindi apart
+        normalized = query_normalizer.normalize(q, lang)
+        language = lang if normalized.script == 'latin' else normalized.language
+        suggestions = autocomplete.suggest(q, language, limit)
+        return {'suggestions': suggestions, 'total': len(suggestions), 'language': language}
+    except Exception as e:
+        logger.error(f"Error suggesting names: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/health/vaccinations", response_model=VaccinationSearchResponse, dependencies=[Depends(limit_standard_client)])
+async def get_vaccinations(request: Request, age_group: Optional[str] = None, lang: str = "en"):
     """Endpoint to get vaccination schedule."""
     try:
-        results = health_db.get_vaccination_schedule(age_group, lang)
-        return VaccinationSearchResponse(vaccinations=results, total=len(results))
+        def build():
+            # "14 months" or "10 weeks" is looked up by age; labels like "Infants" still match the text
+            age_days = parse_age(age_group, lang) if age_group else None
+            if age_days is not None:
+                results = vaccine_schedule.vaccinations_for_age(age_days, lang)
+            else:
+                results = health_db.get_vaccination_schedule_rows(age_group, lang)
+            return {'vaccinations': results, 'total': len(results)}
+
+        key = ('vaccinations', health_db.data_version, lang, age_group.lower() if age_group else None)
+        return response_cache.respond(request, key, build, max_age=REFERENCE_MAX_AGE)
     except Exception as e:
         logger.error(f"Error retrieving vaccinations: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/health/emergency", response_model=EmergencyInfo)
-async def get_emergency_info(lang: str = "en"):
-    """Endpoint to get emergency contact information."""
+@router.get("/health/vaccinations/due", response_model=VaccinationDueResponse, dependencies=[Depends(limit_standard_client)])
+async def get_due_vaccinations(
+    age: Optional[float] = Query(None, ge=0, le=MAX_AGE_DAYS),
+    unit: Literal['days', 'weeks', 'months', 'years'] = 'months',
+    dob: Optional[date] = None,
+    lang: str = "en"
+):
+    """Endpoint to get the vaccination doses due at an age, or today for a date of birth."""
+    if (age is None) == (dob is None):
+        raise HTTPException(status_code=400, detail="Provide either age or dob")
     try:
-        emergency_messages = {
-            'en': {
-                'ambulance': '108',
-                'police': '100',
-                'fire': '101',
-                'message': 'For medical emergencies, call 108 immediately. This is a free service available 24/7 across India.',
-                'language': 'en'
-            },
-            'hi': {
-                'ambulance': '108',
-                'police': '100',
-                'fire': '101',
-                'message': 'आपातकालीन स्थिति में तुरंत 108 पर कॉल करें। यह भारत में 24/7 उपलब्ध एक निःशुल्क सेवा है।',
-                'language': 'hi'
-            },
-            'bn': {
-                'ambulance': '108',
-                'police': '100', 
-                'fire': '101',
-                'message': 'চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।',
-                'language': 'bn'
-            },
-            # Add more languages as needed...
-        }
-        
-        info = emergency_messages.get(lang, emergency_messages['en'])
-        return EmergencyInfo(**info)
+        age_days = age_in_days(age, unit) if age is not None else age_from_birth_date(dob)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if age_days < 0:
+        raise HTTPException(status_code=400, detail="Date of birth is in the future")
+    try:
+        doses = vaccine_schedule.due(age_days, lang)
+        return {'age_days': age_days, 'doses': doses, 'total': len(doses), 'language': lang}
+    except Exception as e:
+        logger.error(f"Error retrieving due vaccinations: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/health/vaccinations/roster", dependencies=[Depends(limit_standard_user)])
+async def compute_roster_due_doses(request: Request, lang: str = "en", as_of: Optional[date] = None):
+    """
+    Endpoint to compute due and overdue doses for a roster of children. The body is
+    CSV (header with child_id and dob) or JSONL; results stream back as NDJSON, one line per child.
+    """
+    # The body is read before responding: a streaming response listens for the
+    # client disconnecting on the same channel the body arrives on
+    try:
+        rows = await immunization_roster.read_rows(request.stream())
+    except RosterFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if immunization_roster.max_rows is not None and len(rows) > immunization_roster.max_rows:
+        raise HTTPException(status_code=413, detail=f"Roster has more than {immunization_roster.max_rows} children")
+    metrics.increment('roster.children', len(rows))
+    return StreamingResponse(
+        immunization_roster.results(rows, lang, as_of or date.today()),
+        media_type="application/x-ndjson",
+    )
+
+@router.get("/health/symptoms", response_model=SymptomListResponse, dependencies=[Depends(limit_standard_client)])
+async def get_symptoms(request: Request, lang: str = "en"):
+    """Endpoint to get the symptom picklist for the symptom checker."""
+    try:
+        def build():
+            symptoms = symptom_checker.picklist(lang)
+            return {'symptoms': symptoms, 'total': len(symptoms)}
+
+        key = ('symptoms', health_db.data_version, lang)
+        return response_cache.respond(request, key, build, max_age=REFERENCE_MAX_AGE)
+    except Exception as e:
+        logger.error(f"Error retrieving symptoms: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/health/symptom-check", response_model=SymptomCheckResponse, dependencies=[Depends(limit_standard_client)])
+async def check_symptoms(query: SymptomCheckRequest):
+    """Endpoint to rank diseases by selected symptoms, without an LLM call."""
+    try:
+        result = symptom_checker.check(query.symptoms, query.language, query.limit)
+        metrics.increment('symptom_check.requests')
+        return {**result, 'total': len(result['results']), 'language': query.language}
+    except Exception as e:
+        logger.error(f"Error checking symptoms: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/health/emergency", response_model=EmergencyInfo, dependencies=[Depends(limit_standard_client)])
+async def get_emergency_info(
+    request: Request,
+    lang: str = "en",
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    """Endpoint to get emergency contact information, with the nearest facilities when a location is sent."""
+    try:
+        # Unknown languages share the English body instead of each getting an entry
+        lang = catalog.resolve(lang)
+        if lat is not None and lon is not None:
+            # Per-location bodies are not worth caching; the lookup is a few grid cells
+            facilities = facility_index.nearest(lat, lon, k=EMERGENCY_FACILITIES)
+            return EmergencyInfo(**catalog.text('emergency', lang), language=lang, nearest_facilities=facilities)
+        key = ('emergency', lang)
+        return response_cache.respond(
+            request, key, lambda: EmergencyInfo(**catalog.text('emergency', lang), language=lang),
+            max_age=EMERGENCY_MAX_AGE
+        )
     except Exception as e:
         logger.error(f"Error retrieving emergency info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/health/facilities/nearest", response_model=NearestFacilitiesResponse, dependencies=[Depends(limit_standard_client)])
+async def get_nearest_facilities(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=50),
+    type: Optional[List[str]] = Query(None),
+    max_km: Optional[float] = Query(None, gt=0)
+):
+    """Endpoint to get the health facilities (PHC, CHC, hospital) nearest a location."""
+    try:
+        facilities = facility_index.nearest(lat, lon, k=k, types=type, max_km=max_km)
+        return {'facilities': facilities, 'total': len(facilities), 'dataset_version': facility_index.version}
+    except Exception as e:
+        logger.error(f"Error finding nearest facilities: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/health/surveillance", response_model=SurveillanceResponse, dependencies=[Depends(limit_standard_user)])
+async def get_symptom_surveillance(
+    region: Optional[str] = Query(None, max_length=64),
+    lang: Optional[str] = None,
+    hours: float = Query(24, gt=0, le=symptom_surveillance.window_hours),
+    recent_hours: float = Query(3, gt=0, le=symptom_surveillance.window_hours),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Endpoint to get the symptoms and diseases most mentioned in chat recently, and those spiking."""
+    if region is not None and not valid_region(region.strip()):
+        raise HTTPException(status_code=400, detail="Invalid region")
+    try:
+        return symptom_surveillance.report(region, lang, hours=hours, recent_hours=recent_hours, limit=limit)
+    except Exception as e:
+        logger.error(f"Error building surveillance report: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/health/dashboard", response_model=DashboardResponse, dependencies=[Depends(limit_standard_user)])
+async def get_dashboard(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    lang: Optional[str] = None
+):
+    """Endpoint to get hourly chat volume, rejection and cache hit rates, and LLM latency percentiles."""
+    try:
+        # The read flushes pending counts first, so keep its SQLite work off the event loop
+        return await run_in_threadpool(chat_rollups.dashboard, hours, lang)
+    except Exception as e:
+        logger.error(f"Error building dashboard: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/health/ui")
 async def serve_health_ui():
     """Serve the health chatbot UI."""
@@ -135,4 +367,15 @@ async def health_service_status():
             "ai_service": "unknown",
             "error": str(e),
             "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+
+@router.get("/health/metrics")
+async def health_metrics():
+    """Process-local operational counters."""
+    return {
+        "counters": metrics.snapshot(),
+        "answers": answer_source_summary(),
+        "faq": faq_index.coverage(),
+        "llm_slots": {"in_use": llm_slots.in_use, "limit": llm_slots.limit},
+        "timestamp": datetime.now().isoformat()
+    }
@@ -16,13 +16,20 @@ class AuthService:
         """
         Verify Firebase ID token and return user information
         """
+        return self.authenticate_token(credentials.credentials)
+
+    def authenticate_token(self, token: str) -> dict:
+        """
+        Verify a raw Firebase ID token (e.g. once per WebSocket connection)
+        and return user information
+        """
         try:
             # Initialize Firebase if not already done
             if self.firebase._app is None:
                 self.firebase.initialize()
             
             # Verify the token
-            decoded_token = self.firebase.verify_token(credentials.credentials)
+            decoded_token = self.firebase.verify_token(token)
             
             if decoded_token is None:
                 raise HTTPException(
@@ -0,0 +1,61 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Awaitable
+
+from fastapi import Request
+
+from .metrics import metrics
+
+# How often a waiting request checks whether its HTTP client is still there
+DISCONNECT_POLL_SECONDS = float(os.getenv('DISCONNECT_POLL_SECONDS', 0.5))
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before its response was ready."""
+
+
+class LLMSlots:
+    """Caps concurrent Gemini calls; a cancelled call gives its slot back immediately."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self._semaphore:
+            self.in_use += 1
+            metrics.increment('llm.calls')
+            try:
+                yield
+            except (asyncio.CancelledError, GeneratorExit):
+                # Task cancelled, or a stream closed before Gemini finished
+                metrics.increment('llm.cancelled')
+                raise
+            finally:
+                self.in_use -= 1
+
+
+async def run_until_disconnected(request: Request, work: Awaitable[Any]) -> Any:
+    """Await work, cancelling it if the HTTP client disconnects first."""
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                metrics.increment('http.client_disconnected')
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+# Global instance
+llm_slots = LLMSlots(int(os.getenv('LLM_MAX_CONCURRENCY', 8)))
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, Union
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.serialization import dumps
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    """A pre-serialized JSON body together with its strong ETag."""
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Build a strong ETag from the exact response bytes."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class PrecomputedResponseCache:
+    """
+    Bounded LRU of pre-serialized JSON responses.
+
+    Keys should include the data version of whatever the body was built from,
+    so a data change produces new entries and old ones simply age out.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Union[BaseModel, Any]]) -> CachedBody:
+        """Return the cached body for key, serializing build() on a miss.
+
+        build() may return a Pydantic model or plain, already-trusted data
+        (dicts/lists of DB rows), which is encoded without validation.
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        content = build()
+        if isinstance(content, BaseModel):
+            body = content.model_dump_json().encode("utf-8")
+        else:
+            body = dumps(content)
+        cached = CachedBody(body=body, etag=make_etag(body))
+
+        with self._lock:
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Union[BaseModel, Any]],
+        max_age: int = 300,
+    ) -> Response:
+        """Serve a cached body, or a bodiless 304 when the client already has it."""
+        cached = self.get_or_build(key, build)
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        }
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        """Drop every cached body."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+response_cache = PrecomputedResponseCache()
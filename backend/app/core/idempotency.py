@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    task: asyncio.Task
+    finished_at: Optional[float] = None
+    waiters: int = field(default=0)
+
+
+def request_fingerprint(payload: str) -> str:
+    """Hash of the request body, used to reject a key reused for a different request."""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Short-lived, bounded store of chat results keyed by client idempotency key.
+
+    The first request for a key runs the work as its own task; a retry while
+    it is still running attaches to that task, and a retry after it finished
+    gets the stored result. Failed work is forgotten so the client can retry;
+    work is cancelled once every waiting request has been cancelled.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    async def run(self, key: str, fingerprint: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() at most once per key and return its (possibly stored) result."""
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key is too long")
+
+        self._evict(time.monotonic())
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if entry is None:
+            entry = _Entry(fingerprint=fingerprint, task=asyncio.ensure_future(factory()))
+            entry.task.add_done_callback(lambda task, key=key: self._on_done(key, task))
+            self._entries[key] = entry
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            # The last client waiting on this work went away: stop generating
+            if entry.waiters == 1 and not entry.task.done():
+                entry.task.cancel()
+            raise
+        finally:
+            entry.waiters -= 1
+
+    def is_replay(self, key: str) -> bool:
+        """True when key already has a finished result stored."""
+        entry = self._entries.get(key)
+        return entry is not None and entry.finished_at is not None
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        entry = self._entries.get(key)
+        if entry is None or entry.task is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            del self._entries[key]
+        else:
+            entry.finished_at = time.monotonic()
+
+    def _evict(self, now: float):
+        """Drop expired results, then the oldest finished ones beyond max_entries."""
+        for key in [k for k, e in self._entries.items()
+                    if e.finished_at is not None and now - e.finished_at > self.ttl_seconds]:
+            del self._entries[key]
+        if len(self._entries) > self.max_entries:
+            # In-flight entries are never evicted; their retries must still attach
+            for key in [k for k, e in self._entries.items() if e.finished_at is not None]:
+                if len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[key]
+
+
+# Global instance
+idempotency_store = IdempotencyStore(
+    ttl_seconds=float(os.getenv('IDEMPOTENCY_TTL_SECONDS', 600)),
+    max_entries=int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', 10000)),
+)
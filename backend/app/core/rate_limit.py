@@ -0,0 +1,283 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from .auth import get_current_user
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    """Token-bucket shape: burst capacity and steady refill rate."""
+    capacity: float
+    refill_per_second: float
+
+
+def _per_minute(name: str, default: float) -> float:
+    return float(os.getenv(name, default)) / 60.0
+
+
+DEFAULT_POLICIES: Dict[str, BucketPolicy] = {
+    # Gemini-backed endpoints: small burst, slow refill
+    'llm': BucketPolicy(
+        capacity=float(os.getenv('LLM_RATE_BURST', 5)),
+        refill_per_second=_per_minute('LLM_RATE_PER_MINUTE', 10),
+    ),
+    # Database/cached endpoints
+    'standard': BucketPolicy(
+        capacity=float(os.getenv('STANDARD_RATE_BURST', 30)),
+        refill_per_second=_per_minute('STANDARD_RATE_PER_MINUTE', 120),
+    ),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the API reports no usage."""
+    return max(1, len(text or '') // 4)
+
+
+def count_response_tokens(response, prompt: str) -> int:
+    """Total tokens reported by a Gemini response, or an estimate from prompt and output length."""
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None)
+    if total:
+        return total
+    return estimate_tokens(prompt) + estimate_tokens(getattr(response, 'text', ''))
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-process bucket and ledger state. Buckets are kept in least recently
+    used order and the oldest is dropped past max_keys, so a flood of new
+    keys costs O(1) per request and cannot grow memory.
+    """
+
+    # Buckets live in process memory: no I/O, so async callers need not leave the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._usage: Dict[Tuple[str, str], int] = {}
+        self._usage_day = _today()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, policy: BucketPolicy, now: float, cost: float = 1.0) -> float:
+        """Take cost tokens; return 0 when allowed, otherwise seconds until enough tokens exist."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (policy.capacity, now))
+            tokens = min(policy.capacity, tokens + (now - updated) * policy.refill_per_second)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / policy.refill_per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                # The least recently used bucket; it comes back full if that key returns
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def add_usage(self, user_key: str, day: str, tokens: int) -> int:
+        with self._lock:
+            if day != self._usage_day:
+                self._usage = {k: v for k, v in self._usage.items() if k[1] == day}
+                self._usage_day = day
+            total = self._usage.get((user_key, day), 0) + tokens
+            self._usage[(user_key, day)] = total
+            return total
+
+    def get_usage(self, user_key: str, day: str) -> int:
+        with self._lock:
+            return self._usage.get((user_key, day), 0)
+
+
+class SQLiteRateLimitBackend:
+    """
+    Bucket and ledger state in a SQLite file, so every worker process on the
+    host enforces the same limits. Buckets that have refilled completely are
+    deleted at most every prune_seconds.
+    """
+
+    # File I/O that may wait up to the busy timeout: async callers run it in the threadpool
+    blocking = True
+
+    def __init__(self, db_path: str = 'rate_limits.db', prune_seconds: float = 60):
+        self.db_path = db_path
+        self.prune_seconds = prune_seconds
+        self._pruned_at = 0.0
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # full_at: when the bucket will be full again and can be forgotten
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(rate_buckets)')}
+            if 'full_at' not in columns:
+                conn.execute('ALTER TABLE rate_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_token_usage (
+                    user_key TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user_key, day)
+                )
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+
+    def take(self, key: str, policy: BucketPolicy, now: float, cost: float = 1.0) -> float:
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (policy.capacity, now)
+            tokens = min(policy.capacity, tokens + (now - updated) * policy.refill_per_second)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / policy.refill_per_second
+            full_at = now + (policy.capacity - tokens) / policy.refill_per_second
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, full_at),
+            )
+            if now - self._pruned_at >= self.prune_seconds:
+                self._pruned_at = now
+                conn.execute('DELETE FROM rate_buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+            return retry_after
+        except sqlite3.Error:
+            # BEGIN itself may have failed (database locked), leaving nothing to roll back
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def add_usage(self, user_key: str, day: str, tokens: int) -> int:
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT INTO llm_token_usage (user_key, day, tokens) VALUES (?, ?, ?)
+                ON CONFLICT (user_key, day) DO UPDATE SET tokens = tokens + excluded.tokens
+            ''', (user_key, day, tokens))
+            conn.execute('DELETE FROM llm_token_usage WHERE day < ?', (day,))
+            return self.get_usage(user_key, day, conn)
+        finally:
+            conn.close()
+
+    def get_usage(self, user_key: str, day: str, conn: Optional[sqlite3.Connection] = None) -> int:
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            row = conn.execute(
+                'SELECT tokens FROM llm_token_usage WHERE user_key = ? AND day = ?', (user_key, day)
+            ).fetchone()
+            return row[0] if row else 0
+        finally:
+            if own_conn:
+                conn.close()
+
+
+class RateLimiter:
+    """Token-bucket limiter per (bucket, user) plus a daily per-user LLM token ledger."""
+
+    def __init__(self, backend=None, policies: Optional[Dict[str, BucketPolicy]] = None,
+                 daily_token_limit: Optional[int] = None):
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.policies = policies or DEFAULT_POLICIES
+        if daily_token_limit is None:
+            daily_token_limit = int(os.getenv('LLM_DAILY_TOKEN_LIMIT', 50000))
+        # 0 disables the daily quota
+        self.daily_token_limit = daily_token_limit
+
+    def check(self, bucket: str, key: str, cost: float = 1.0):
+        """Consume from the user's bucket or raise 429 with Retry-After."""
+        retry_after = self.backend.take(f"{bucket}:{key}", self.policies[bucket], time.time(), cost)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded. Please wait before sending more requests.",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    async def check_async(self, bucket: str, key: str, cost: float = 1.0):
+        """check() for async callers, run in the threadpool when the backend does blocking I/O."""
+        if self.backend.blocking:
+            await run_in_threadpool(self.check, bucket, key, cost)
+        else:
+            self.check(bucket, key, cost)
+
+    def check_llm_quota(self, key: str):
+        """Raise 429 when the user has spent today's LLM token allowance."""
+        if self.daily_token_limit and self.backend.get_usage(key, _today()) >= self.daily_token_limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Daily AI usage limit reached. Please try again tomorrow.",
+                headers={"Retry-After": str(self._seconds_until_midnight())},
+            )
+
+    def check_llm(self, key: str):
+        """Quota then rate check for one LLM-backed request."""
+        self.check_llm_quota(key)
+        self.check('llm', key)
+
+    def record_llm_tokens(self, key: Optional[str], tokens: int) -> int:
+        """Add tokens to the user's ledger for today and return the new total."""
+        if not key or tokens <= 0:
+            return 0
+        return self.backend.add_usage(key, _today(), tokens)
+
+    def llm_usage(self, key: str) -> int:
+        return self.backend.get_usage(key, _today())
+
+    @staticmethod
+    def _seconds_until_midnight() -> int:
+        now = datetime.now(timezone.utc)
+        return 86400 - (now.hour * 3600 + now.minute * 60 + now.second)
+
+
+def _create_rate_limiter() -> RateLimiter:
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory').lower() == 'sqlite':
+        return RateLimiter(SQLiteRateLimitBackend(os.getenv('RATE_LIMIT_DB_PATH', 'rate_limits.db')))
+    return RateLimiter()
+
+
+def client_key(request: Request) -> str:
+    """Fallback limiter key for unauthenticated callers."""
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+# Global rate limiter instance
+rate_limiter = _create_rate_limiter()
+
+
+# Dependencies for routes
+async def limit_standard_user(current_user: dict = Depends(get_current_user)) -> dict:
+    await rate_limiter.check_async('standard', current_user["uid"])
+    return current_user
+
+
+async def limit_standard_client(request: Request):
+    await rate_limiter.check_async('standard', client_key(request))
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Tuple
+
+from .metrics import metrics
+
+Event = Tuple[int, str, dict]
+
+
+def format_sse(event_id: str, event: str, data: dict) -> str:
+    """Serialize one Server-Sent Events frame."""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a "<message_id>:<seq>" event ID; unknown formats resume from the start."""
+    if not event_id or ":" not in event_id:
+        return None, 0
+    message_id, _, seq = event_id.rpartition(":")
+    return message_id, int(seq) if seq.isdigit() else 0
+
+
+class StreamBuffer:
+    """
+    Events generated for one chat message, kept so a client that reconnects
+    with its last event ID gets the rest of the answer instead of a new one.
+
+    Generation keeps running while nobody is attached, but only for
+    grace_seconds; after that the producing task is cancelled.
+    """
+
+    def __init__(self, message_id: str, owner: str, grace_seconds: float):
+        self.message_id = message_id
+        self.owner = owner
+        self.grace_seconds = grace_seconds
+        self.events: List[Event] = []
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._followers = 0
+        self._grace_handle: Optional[asyncio.TimerHandle] = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.message_id}:{seq}"
+
+    def append(self, event: str, data: dict) -> int:
+        """Buffer an event and wake every follower; returns its sequence number (1-based)."""
+        seq = len(self.events) + 1
+        self.events.append((seq, event, data))
+        self._notify()
+        return seq
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.monotonic()
+        if self._grace_handle is not None:
+            self._grace_handle.cancel()
+        self._notify()
+
+    def cancel(self):
+        """Stop the producing task, if it is still generating."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    async def follow(self, after_seq: int = 0) -> AsyncIterator[Event]:
+        """Yield buffered events after after_seq, then live ones until the message is done."""
+        self._attach()
+        try:
+            while True:
+                while after_seq < len(self.events):
+                    after_seq += 1
+                    yield self.events[after_seq - 1]
+                if self.done:
+                    return
+                await self._changed.wait()
+        finally:
+            self._detach()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _attach(self):
+        self._followers += 1
+        if self._grace_handle is not None:
+            self._grace_handle.cancel()
+            self._grace_handle = None
+
+    def _detach(self):
+        self._followers -= 1
+        if self._followers == 0 and not self.done:
+            loop = asyncio.get_running_loop()
+            self._grace_handle = loop.call_later(self.grace_seconds, self._abandon)
+
+    def _abandon(self):
+        if self._followers == 0 and not self.done:
+            metrics.increment('stream.abandoned')
+            self.cancel()
+
+
+class StreamBufferStore:
+    """Bounded registry of stream buffers, kept for resume_window seconds after they finish."""
+
+    def __init__(self, resume_window: float = 120, grace_seconds: float = 20, max_entries: int = 1000):
+        self.resume_window = resume_window
+        self.grace_seconds = grace_seconds
+        self.max_entries = max_entries
+        self._buffers: "OrderedDict[str, StreamBuffer]" = OrderedDict()
+
+    def create(self, owner: str) -> StreamBuffer:
+        self._evict(time.monotonic())
+        buffer = StreamBuffer(str(uuid.uuid4()), owner, self.grace_seconds)
+        self._buffers[buffer.message_id] = buffer
+        return buffer
+
+    def get(self, message_id: str, owner: str) -> Optional[StreamBuffer]:
+        """The buffer for message_id, only if it belongs to owner."""
+        buffer = self._buffers.get(message_id)
+        if buffer is None or buffer.owner != owner:
+            return None
+        return buffer
+
+    def _evict(self, now: float):
+        for message_id in [m for m, b in self._buffers.items()
+                           if b.done and now - b.finished_at > self.resume_window]:
+            del self._buffers[message_id]
+        if len(self._buffers) >= self.max_entries:
+            # Messages still generating are never dropped
+            for message_id in [m for m, b in self._buffers.items() if b.done]:
+                if len(self._buffers) < self.max_entries:
+                    break
+                del self._buffers[message_id]
+
+
+# Global instance
+stream_buffers = StreamBufferStore(
+    resume_window=float(os.getenv('STREAM_RESUME_WINDOW_SECONDS', 120)),
+    grace_seconds=float(os.getenv('STREAM_RESUME_GRACE_SECONDS', 20)),
+)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -11,12 +11,17 @@ class ChatMessage(BaseModel):
     content: str
     role: MessageRole = MessageRole.USER
     session_id: Optional[str] = None
+    # For emergencies the 108 guidance comes first, then LLM detail; False answers with the guidance alone
+    emergency_details: bool = True
+    # District or state, for symptom surveillance counts
+    region: Optional[str] = Field(None, max_length=64)
 
 class ChatResponse(BaseModel):
     message: str
     message_id: str
     session_id: str
     timestamp: datetime
+    emergency_guidance: Optional[str] = None
 
 class Message(BaseModel):
     id: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from datetime import datetime
 
@@ -22,11 +22,16 @@ class ChatMessage(BaseModel):
     message: str
     language: str = 'en'
     user_id: Optional[str] = 'anonymous'
+    # For emergencies the 108 guidance comes first, then LLM detail; False answers with the guidance alone
+    emergency_details: bool = True
+    # District or state, for symptom surveillance counts
+    region: Optional[str] = Field(None, max_length=64)
 
 class ChatResponse(BaseModel):
     response: str
     language: str
     timestamp: datetime
+    emergency_guidance: Optional[str] = None
 
 class HealthChatHistory(BaseModel):
     id: Optional[int] = None
@@ -36,12 +41,26 @@ class HealthChatHistory(BaseModel):
     timestamp: Optional[datetime] = None
     user_id: Optional[str] = None
 
+class Facility(BaseModel):
+    id: str
+    name: str
+    type: str = ''
+    latitude: float
+    longitude: float
+    distance_km: float
+    phone: str = ''
+    address: str = ''
+    district: str = ''
+    state: str = ''
+
 class EmergencyInfo(BaseModel):
     ambulance: str = '108'
     police: str = '100'
     fire: str = '101'
     message: str
     language: str = 'en'
+    # Only when the caller sends its location
+    nearest_facilities: Optional[List[Facility]] = None
 
 class HealthSearchQuery(BaseModel):
     query: str
@@ -53,4 +72,108 @@ class DiseaseSearchResponse(BaseModel):
 
 class VaccinationSearchResponse(BaseModel):
     vaccinations: List[VaccinationInfo]
-    total: int
\ No newline at end of file
+    total: int
+
+class SymptomInfo(BaseModel):
+    symptom: str
+    label: str
+    diseases: int
+
+class SymptomListResponse(BaseModel):
+    symptoms: List[SymptomInfo]
+    total: int
+
+class SymptomCheckRequest(BaseModel):
+    symptoms: List[str] = Field(..., min_length=1, max_length=30)
+    language: str = 'en'
+    limit: int = Field(10, ge=1, le=50)
+
+class SymptomMatch(BaseModel):
+    name: str
+    severity: str
+    matched_symptoms: List[str]
+    matched: int
+    disease_symptoms: int
+    score: float
+
+class SymptomCheckResponse(BaseModel):
+    results: List[SymptomMatch]
+    unrecognized: List[str]
+    total: int
+    language: str
+
+class Suggestion(BaseModel):
+    name: str
+    kind: str
+
+class AutocompleteResponse(BaseModel):
+    suggestions: List[Suggestion]
+    total: int
+    language: str
+
+class VaccinationDose(BaseModel):
+    vaccine_name: str
+    age_group: str
+    dose: str
+    min_age_days: int
+    max_age_days: int
+    schedule: str
+    description: str
+    side_effects: Optional[str] = None
+    language: str = 'en'
+
+class VaccinationDueResponse(BaseModel):
+    age_days: int
+    doses: List[VaccinationDose]
+    total: int
+    language: str
+
+class NearestFacilitiesResponse(BaseModel):
+    facilities: List[Facility]
+    total: int
+    dataset_version: Optional[str] = None
+
+class SurveillanceTerm(BaseModel):
+    kind: str
+    term: str
+    language: str
+    count: int
+
+class SurveillanceSpike(BaseModel):
+    kind: str
+    term: str
+    language: str
+    recent: int
+    expected: float
+    score: float
+
+class SurveillanceResponse(BaseModel):
+    region: Optional[str] = None
+    language: Optional[str] = None
+    hours: float
+    recent_hours: float
+    messages: int
+    top: List[SurveillanceTerm]
+    spikes: List[SurveillanceSpike]
+
+class HourlyQueries(BaseModel):
+    hour: datetime
+    total: int
+    languages: Dict[str, int]
+
+class LatencySummary(BaseModel):
+    calls: int
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+class DashboardResponse(BaseModel):
+    hours: int
+    language: Optional[str] = None
+    queries_per_hour: List[HourlyQueries]
+    answers: Dict[str, int]
+    total: int
+    filter_rejection_rate: float
+    cache_hit_rate: float
+    llm_latency_ms: LatencySummary
@@ -0,0 +1,105 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from app.services.localization import catalog
+from app.services.normalization import fold_text
+
+# Average calendar lengths; schedules are given in weeks, months and years
+DAYS_PER_UNIT = {'days': 1, 'weeks': 7, 'months': 30.4375, 'years': 365.25}
+
+# A dose given "at 6 weeks" (rather than over a range) stays due this many days
+POINT_WINDOW_DAYS = 28
+
+# Older ages (100 years) are input errors, not children to schedule doses for
+MAX_AGE_DAYS = 100 * DAYS_PER_UNIT['years']
+
+# Numbers with an optional range ("5-6", "12 to 15"), or words; Indic vowel
+# signs are not \w, so words are runs of anything else
+_AGE_TOKEN = re.compile(
+    r'(?P<low>\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(?P<high>\d+(?:\.\d+)?))?'
+    r'|(?P<word>[^\s\d,;:.()\-–]+)'
+)
+
+
+@dataclass(frozen=True)
+class DoseWindow:
+    """Ages (in days, inclusive) at which one dose of a schedule is due."""
+    label: str
+    min_days: int
+    max_days: int
+
+
+def _unit_words(language: str) -> Dict[str, str]:
+    words = {}
+    for lang in ('en', language):
+        for unit in DAYS_PER_UNIT:
+            for word in catalog.keywords(f'age_{unit}', lang):
+                words[word] = unit
+    return words
+
+
+def _number(value: float) -> str:
+    return f'{value:g}'
+
+
+def _spans(text: str, language: str) -> List[Tuple[float, Optional[float], str, str]]:
+    """(low, high, unit, unit word) for each number or range followed by an age unit."""
+    units = _unit_words(language)
+    pending, spans = [], []
+    for match in _AGE_TOKEN.finditer(text):
+        if match.group('low'):
+            high = match.group('high')
+            pending.append((float(match.group('low')), float(high) if high else None))
+        elif match.group('word') in units:
+            # "6, 10, 14 weeks": the unit after a list applies to every number in it
+            word = match.group('word')
+            spans.extend((low, high, units[word], word) for low, high in pending)
+            pending = []
+    return spans
+
+
+def parse_schedule(schedule: str, language: str = 'en') -> List[DoseWindow]:
+    """
+    Dose windows in a free-text schedule such as "6, 10, 14 weeks; boosters at
+    18 months, 5-6 years" or "Single dose at birth", in schedule order.
+    """
+    text = fold_text(schedule)
+    windows = []
+    if catalog.matches('at_birth', text, language) or catalog.matches('at_birth', text, 'en'):
+        windows.append(DoseWindow('at birth', 0, POINT_WINDOW_DAYS - 1))
+    for low, high, unit, word in _spans(text, language):
+        start = round(low * DAYS_PER_UNIT[unit])
+        if high is None:
+            windows.append(DoseWindow(f'{_number(low)} {word}', start, start + POINT_WINDOW_DAYS - 1))
+        else:
+            end = round(high * DAYS_PER_UNIT[unit])
+            windows.append(DoseWindow(f'{_number(low)}-{_number(high)} {word}', start, max(start, end)))
+    return windows
+
+
+def parse_age(text: str, language: str = 'en') -> Optional[int]:
+    """Age in days for text naming one age ("14 months", "10 weeks", "at birth"); None otherwise."""
+    text = fold_text(text)
+    spans = _spans(text, language)
+    if len(spans) == 1:
+        low, _, unit, _ = spans[0]
+        days = low * DAYS_PER_UNIT[unit]
+        return round(days) if days <= MAX_AGE_DAYS else None
+    if not spans and (catalog.matches('at_birth', text, language) or catalog.matches('at_birth', text, 'en')):
+        return 0
+    return None
+
+
+def age_in_days(age: float, unit: str = 'months') -> int:
+    """A numeric age in days, the unit being one of DAYS_PER_UNIT; ValueError past MAX_AGE_DAYS."""
+    days = age * DAYS_PER_UNIT[unit]
+    # Written so NaN fails too; inf would make round() raise OverflowError
+    if not 0 <= days <= MAX_AGE_DAYS:
+        raise ValueError("Age must be between 0 and 100 years")
+    return round(days)
+
+
+def age_from_birth_date(birth_date: date, today: Optional[date] = None) -> int:
+    """Age in days on today (default: the current date)."""
+    return ((today or date.today()) - birth_date).days
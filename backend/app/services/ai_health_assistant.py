@@ -2,12 +2,28 @@ import google.generativeai as genai
 import re
 import logging
 import os
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
+from app.core.concurrency import llm_slots
+from app.core.rate_limit import rate_limiter, count_response_tokens
+from app.services.analytics import chat_rollups
 from app.services.health_database import health_db
+from app.services.intent_router import QueryIntent, intent_router
+from app.services.localization import catalog
+from app.services.retrieval import retrieval_engine
 from app.models.health import DiseaseInfo, VaccinationInfo
 
 logger = logging.getLogger(__name__)
 
+# Extra prompt instructions per query intent
+INTENT_INSTRUCTIONS = {
+    'emergency': "The user may be facing an emergency: start by telling them to call 108, then give only the most important immediate steps.",
+    'first_aid': "Give clear, numbered first aid steps and say when to go to a health centre.",
+    'vaccination': "List every vaccine from the database with its age group and schedule.",
+    'disease': "Cover symptoms, prevention and treatment briefly, using the database information.",
+    'general': "",
+}
+
 class AIHealthAssistant:
     """Handles AI-powered health assistant logic using Gemini."""
     
@@ -51,36 +67,68 @@ class AIHealthAssistant:
             # Add more languages as needed...
         }
     
-    def generate_response(self, user_message: str, language: str = 'en') -> str:
-        """Generates an AI response based on user message and database knowledge."""
+    def generate_response(self, user_message: str, language: str = 'en', user_id: Optional[str] = None,
+                          intent: Optional[QueryIntent] = None) -> str:
+        """Generates an AI response based on user message and database knowledge.
+
+        Token usage is charged to user_id's daily LLM ledger when given.
+        """
+        intent = intent or intent_router.route(user_message, language)
         try:
-            db_results = self.search_health_database(user_message, language)
-            
-            prompt = f"{self.system_prompt.get(language, self.system_prompt['en'])}\n\nRelevant health information from database:\n{db_results}\n\nUser question: {user_message}"
-            
-            response = self.model.generate_content(prompt)
-            
-            if response.text:
-                return self.format_response(response.text, language)
-            else:
-                return self.get_fallback_response(language)
+            prompt = self._build_prompt(user_message, intent)
+            response = self.model.generate_content(prompt, generation_config=self._generation_config(intent))
+            return self._finish_response(response, prompt, intent, user_id)
+        except Exception as e:
+            logger.error(f"Error generating AI response: {e}")
+            return self.get_fallback_response(language)
+
+    async def generate_response_async(self, user_message: str, language: str = 'en', user_id: Optional[str] = None,
+                                      intent: Optional[QueryIntent] = None) -> str:
+        """Async variant of generate_response; cancelling it cancels the Gemini call."""
+        intent = intent or intent_router.route(user_message, language)
+        try:
+            prompt = self._build_prompt(user_message, intent)
+            async with llm_slots.acquire():
+                started = time.perf_counter()
+                try:
+                    response = await self.model.generate_content_async(
+                        prompt, generation_config=self._generation_config(intent)
+                    )
+                finally:
+                    # Failed and cancelled calls count too, so outages show in the percentiles
+                    chat_rollups.record_llm_latency(intent.language, (time.perf_counter() - started) * 1000)
+            return self._finish_response(response, prompt, intent, user_id)
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
             return self.get_fallback_response(language)
+
+    def _build_prompt(self, user_message: str, intent: QueryIntent) -> str:
+        """Builds the Gemini prompt from the system prompt, intent instructions and database knowledge."""
+        language = intent.language
+        db_results = self.search_health_database(user_message, language, intent)
+        instructions = INTENT_INSTRUCTIONS[intent.intent]
+        system_prompt = self.system_prompt.get(language, self.system_prompt['en'])
+        if instructions:
+            system_prompt = f"{system_prompt}\n{instructions}"
+        return f"{system_prompt}\n\nRelevant health information from database:\n{db_results}\n\nUser question: {user_message}"
+
+    @staticmethod
+    def _generation_config(intent: QueryIntent) -> Dict[str, int]:
+        return {'max_output_tokens': intent.max_output_tokens}
+
+    def _finish_response(self, response, prompt: str, intent: QueryIntent, user_id: Optional[str]) -> str:
+        """Charges token usage and formats the Gemini output."""
+        rate_limiter.record_llm_tokens(user_id, count_response_tokens(response, prompt))
+        if response.text:
+            return self.format_response(response.text, intent.language, intent)
+        return self.get_fallback_response(intent.language)
     
-    def search_health_database(self, query: str, language: str) -> str:
-        """Searches the local database for relevant information."""
+    def search_health_database(self, query: str, language: str, intent: Optional[QueryIntent] = None) -> str:
+        """Searches the local database for the information the query's intent needs."""
+        intent = intent or intent_router.route(query, language)
         results = []
         
-        # Check for vaccination keywords first
-        vaccine_keywords = {
-            'en': ['vaccine', 'vaccination', 'immunization', 'polio', 'mmr', 'dpt', 'bcg'],
-            'hi': ['टीका', 'टीकाकरण', 'पोलियो', 'एमएमआर', 'डीपीटी', 'बीसीजी'],
-            'bn': ['টিকা', 'টিকাদান', 'পোলিও', 'এমএমআর', 'ডিপিটি', 'বিসিজি'],
-            # Add more languages as needed...
-        }
-        
-        if any(keyword in query.lower() for keyword in vaccine_keywords.get(language, [])):
+        if intent.intent == 'vaccination':
             vaccines = health_db.get_vaccination_schedule(language=language)
             if vaccines:
                 results.append("Vaccination Schedule:")
@@ -89,50 +137,34 @@ class AIHealthAssistant:
             else:
                 results.append("No vaccination data found for the selected language.")
         
-        # Then, check for disease-related keywords
-        diseases = health_db.search_diseases(query, language)
-        if diseases:
-            results.append("\nDisease Information:")
-            for disease in diseases[:2]:  # Limit to first 2 results
-                results.append(f"- {disease.name}: Symptoms - {disease.symptoms}. Prevention - {disease.prevention}.")
+        # Then the best-matching reference chunks, within the prompt's token budget;
+        # vaccines are already listed in full for vaccination questions
+        sources = ('disease',) if intent.intent in ('vaccination', 'disease') else None
+        chunks = retrieval_engine.retrieve(query, language, sources=sources)
+        if chunks:
+            results.append("\nRelevant Reference Information:")
+            for chunk in chunks:
+                results.append(f"- {chunk.text}")
         
         return "\n".join(results) if results else ""
 
-    def format_response(self, response: str, language: str) -> str:
-        """Formats the response and adds emergency contact if necessary."""
+    def format_response(self, response: str, language: str, intent: Optional[QueryIntent] = None) -> str:
+        """Formats the response and adds emergency contact for emergency queries."""
         # Replace Markdown bold with plain text for easier front-end handling
         response = re.sub(r'\*\*([^*]+)\*\*', r'\1', response)
         response = re.sub(r'\*([^*]+)\*', r'\1', response)
         
-        # Check for emergency keywords and add a prominent warning
-        serious_keywords = {
-            'en': ['chest pain', 'difficulty breathing', 'severe', 'emergency', 'blood', 'unconscious', 'fainting'],
-            'hi': ['सीने में दर्द', 'सांस लेने में कठिनाई', 'गंभीर', 'आपातकाल', 'खून', 'बेहोश'],
-            'bn': ['বুকে ব্যথা', 'শ্বাসকষ্ট', 'গুরুতর', 'জরুরি', 'রক্ত', 'অজ্ঞান'],
-            # Add more languages as needed...
-        }
-        
-        if any(keyword in response.lower() for keyword in serious_keywords.get(language, [])):
-            emergency_note = {
-                'en': "\n⚠️ For medical emergencies, call 108 immediately.",
-                'hi': "\n⚠️ आपातकालीन स्थिति में तुरंत 108 पर कॉल करें।",
-                'bn': "\n⚠️ চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।",
-                # Add more languages as needed...
-            }
-            if emergency_note[language] not in response:
-                response += emergency_note[language]
+        # The query was already classified; the response is not rescanned for emergency words
+        if intent is not None and intent.is_emergency:
+            note = catalog.text('emergency_note', language)
+            if note not in response:
+                response += note
         
         return response
     
     def get_fallback_response(self, language: str) -> str:
         """Provides a simple fallback message if AI generation fails."""
-        fallback = {
-            'en': "I'm sorry, I couldn't process your request right now. Please try rephrasing your question or contact a healthcare professional for urgent matters. For emergencies, call 108.",
-            'hi': "मुझे खेद है, मैं अभी आपके अनुरोध को संसाधित नहीं कर सका। कृपया अपने प्रश्न को दोबारा पूछें या तत्काल मामलों के लिए एक स्वास्थ्य पेशेवर से संपर्क करें। आपातकाल के लिए 108 पर कॉल करें।",
-            'bn': "আমি দুঃখিত, আমি আপনার অনুরোধটি এই মুহূর্তে প্রক্রিয়া করতে পারিনি। অনুগ্রহ করে আপনার প্রশ্নটি পুনরায় লিখুন বা জরুরি প্রয়োজনে একজন স্বাস্থ্যসেবা পেশাদারের সাথে যোগাযোগ করুন। জরুরি অবস্থার জন্য, 108 নম্বরে কল করুন।",
-            # Add more languages as needed...
-        }
-        return fallback.get(language, fallback['en'])
+        return catalog.text('fallback', language)
 
 # Global instance
 ai_assistant = AIHealthAssistant()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.services.health_database import health_db
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600
+
+ANSWER_SOURCES = ('llm', 'faq', 'template', 'emergency', 'canned')
+
+# LLM latency histogram: bin 0 is under LATENCY_BASE_MS, bin i ends at
+# LATENCY_BASE_MS * LATENCY_GROWTH ** i (the last bin is open), so a
+# percentile read from the bins is at most 25% above the true value
+LATENCY_BASE_MS = 25.0
+LATENCY_GROWTH = 1.25
+LATENCY_BINS = 38
+
+
+def latency_bin(ms: float) -> int:
+    """Histogram bin of a latency in milliseconds."""
+    if ms <= LATENCY_BASE_MS:
+        return 0
+    return min(LATENCY_BINS - 1, math.ceil(math.log(ms / LATENCY_BASE_MS) / math.log(LATENCY_GROWTH)))
+
+
+def latency_bin_upper_ms(bin: int) -> float:
+    return LATENCY_BASE_MS * LATENCY_GROWTH ** bin
+
+
+class ChatRollups:
+    """
+    Hourly rollups behind the operational dashboard: answers per language and
+    source, and a latency histogram of LLM calls per language. Counts are
+    gathered in memory as answers are produced and added to the rollup tables
+    every flush_seconds by run_rollup_flush (and before a dashboard read), so
+    recording never touches SQLite and no report ever scans chat_history. The
+    additive upserts let several workers share the tables; buckets older than
+    retention_days are deleted.
+    """
+
+    def __init__(self, db=None, flush_seconds: float = 10, retention_days: int = 90,
+                 clock: Callable[[], float] = time.time):
+        self.db = db or health_db
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days
+        self.clock = clock
+        self._answers: Dict[Tuple[int, str, str], int] = defaultdict(int)
+        self._latencies: Dict[Tuple[int, str, int], List[float]] = defaultdict(lambda: [0, 0.0])
+        self._flushed_at = clock()
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+
+    def record_answer(self, source: str, language: str = 'en'):
+        """Counts one chat answer by how it was produced (see ANSWER_SOURCES)."""
+        with self._lock:
+            self._answers[(self._bucket(), language, source)] += 1
+
+    def record_llm_latency(self, language: str, ms: float):
+        """Counts one LLM call, successful or not, and how long it took."""
+        with self._lock:
+            entry = self._latencies[(self._bucket(), language, latency_bin(ms))]
+            entry[0] += 1
+            entry[1] += ms
+
+    def flush(self) -> bool:
+        """Adds the pending counts to the rollup tables; they are kept for the next flush if that fails."""
+        with self._lock:
+            answers, self._answers = self._answers, defaultdict(int)
+            latencies, self._latencies = self._latencies, defaultdict(lambda: [0, 0.0])
+            self._flushed_at = self.clock()
+        if answers or latencies:
+            saved = self.db.add_chat_rollups(
+                [(*key, count) for key, count in answers.items()],
+                [(*key, calls, total_ms) for key, (calls, total_ms) in latencies.items()],
+            )
+            if not saved:
+                with self._lock:
+                    for key, count in answers.items():
+                        self._answers[key] += count
+                    for key, (calls, total_ms) in latencies.items():
+                        entry = self._latencies[key]
+                        entry[0] += calls
+                        entry[1] += total_ms
+                return False
+        if self._flushed_at - self._pruned_at >= BUCKET_SECONDS:
+            self._pruned_at = self._flushed_at
+            self.db.prune_chat_rollups(self._bucket() - self.retention_days * 86400)
+        return True
+
+    def dashboard(self, hours: int = 24, language: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queries per hour by language, answers per source, the filter rejection
+        rate, the cache hit rate (share of screened questions answered without
+        the LLM: FAQ, template or emergency guidance) and LLM latency
+        percentiles, over the last hours (the current hour included).
+        """
+        self.flush()
+        hours = max(1, min(hours, self.retention_days * 24))
+        current = self._bucket()
+        since = current - (hours - 1) * BUCKET_SECONDS
+        per_hour = {since + i * BUCKET_SECONDS: defaultdict(int) for i in range(hours)}
+        answers = dict.fromkeys(ANSWER_SOURCES, 0)
+        for row in self.db.get_chat_rollups_rows(since, language):
+            # Another worker's clock may already be in the next hour
+            if row['bucket_start'] in per_hour:
+                per_hour[row['bucket_start']][row['language']] += row['answers']
+            answers[row['source']] = answers.get(row['source'], 0) + row['answers']
+
+        bins = [0] * LATENCY_BINS
+        total_ms = 0.0
+        for row in self.db.get_llm_latency_rollups_rows(since, language):
+            bins[min(row['bin'], LATENCY_BINS - 1)] += row['calls']
+            total_ms += row['total_ms']
+        calls = sum(bins)
+
+        total = sum(answers.values())
+        screened = total - answers['canned']
+        return {
+            'hours': hours,
+            'language': language,
+            'queries_per_hour': [
+                {'hour': datetime.fromtimestamp(bucket, timezone.utc), 'total': sum(languages.values()),
+                 'languages': dict(languages)}
+                for bucket, languages in per_hour.items()
+            ],
+            'answers': answers,
+            'total': total,
+            'filter_rejection_rate': round(answers['canned'] / total, 4) if total else 0.0,
+            'cache_hit_rate': round((screened - answers['llm']) / screened, 4) if screened else 0.0,
+            'llm_latency_ms': {
+                'calls': calls,
+                'mean': round(total_ms / calls, 1) if calls else None,
+                'p50': self._percentile(bins, 0.5),
+                'p90': self._percentile(bins, 0.9),
+                'p99': self._percentile(bins, 0.99),
+            },
+        }
+
+    @staticmethod
+    def _percentile(bins: List[int], quantile: float) -> Optional[float]:
+        """Upper edge of the bin holding the quantile; None without calls."""
+        calls = sum(bins)
+        if not calls:
+            return None
+        rank, seen = quantile * calls, 0
+        for bin, count in enumerate(bins):
+            seen += count
+            if count and seen >= rank:
+                return round(latency_bin_upper_ms(bin), 1)
+        return round(latency_bin_upper_ms(LATENCY_BINS - 1), 1)
+
+    def _bucket(self) -> int:
+        return int(self.clock() // BUCKET_SECONDS) * BUCKET_SECONDS
+
+
+async def run_rollup_flush(rollups: ChatRollups):
+    """Writes the pending rollup counts every flush_seconds, in a worker thread."""
+    while True:
+        await asyncio.sleep(rollups.flush_seconds)
+        try:
+            await asyncio.to_thread(rollups.flush)
+        except Exception as e:
+            logger.error(f"Rollup flush failed: {e}")
+
+# Global instance
+chat_rollups = ChatRollups(
+    flush_seconds=float(os.getenv('ROLLUP_FLUSH_SECONDS', 10)),
+    retention_days=int(os.getenv('ROLLUP_RETENTION_DAYS', 90)),
+)
@@ -0,0 +1,158 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.core.metrics import metrics
+from app.services.analytics import chat_rollups
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import query_normalizer
+
+DISEASE_FIELDS = ('symptoms', 'prevention', 'treatment')
+
+_TOKEN_PATTERN = re.compile(r'[^\s,.;:!?।()"\'/-]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words, split on whitespace and punctuation (including the danda)."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def record_answer_source(source: str, language: str = 'en'):
+    """Count how a chat answer was produced: 'llm', 'faq', 'template', 'emergency' or 'canned'."""
+    metrics.increment(f'answers.{source}')
+    chat_rollups.record_answer(source, language)
+
+
+def answer_source_summary() -> Dict[str, Any]:
+    """Answer counts per source and the share served without an LLM call."""
+    counts = {source: metrics.get(f'answers.{source}') for source in ('llm', 'faq', 'template', 'emergency', 'canned')}
+    total = sum(counts.values())
+    without_llm = total - counts['llm']
+    return {**counts, 'without_llm_share': round(without_llm / total, 4) if total else 0.0}
+
+
+@dataclass
+class TemplateAnswer:
+    """A reference-data answer: ResponseFormatter-style sections plus their plain text."""
+    intent: str
+    confidence: float
+    sections: List[Dict[str, Any]]
+    text: str
+
+
+@dataclass
+class _LanguageIndex:
+    diseases: List[Tuple[Dict[str, Any], Set[str], Set[str]]]  # (row, name words, identifying words)
+    vaccines: List[Tuple[Dict[str, Any], Set[str]]]
+
+
+class AnswerEngine:
+    """
+    Answers questions that are fully covered by the reference tables
+    ("symptoms of malaria", "vaccination schedule") from templates, without
+    Gemini. Confidence is the share of query words the matched intent
+    explains; below min_confidence the question is left to the LLM.
+    """
+
+    def __init__(self, db=None, min_confidence: float = 0.8):
+        self.db = db or health_db
+        self.min_confidence = min_confidence
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def answer(self, query: str, language: str = 'en') -> Optional[TemplateAnswer]:
+        """Template answer for query, or None when it needs the LLM."""
+        tokens = tokenize(query_normalizer.normalize(query, language).text)
+        if not tokens or not catalog.supports(language):
+            return None
+        index = self._indexes.get(language)
+        token_set = set(tokens)
+
+        diseases = [(row, name_words) for row, name_words, keys in index.diseases if keys & token_set]
+        fields = [f for f in DISEASE_FIELDS if self._has_stem(token_set, catalog.prefixes(f, language))]
+        asks_vaccines = self._has_stem(token_set, catalog.prefixes('vaccine', language))
+
+        if diseases and len(diseases) <= 2 and not asks_vaccines:
+            intent = 'disease_info'
+            covered = set().union(*(name_words for _, name_words in diseases))
+        elif asks_vaccines and not diseases and index.vaccines:
+            intent = 'vaccination_schedule'
+            covered = set().union(*(name_words for _, name_words in index.vaccines))
+        else:
+            return None
+
+        confidence = sum(1 for t in tokens if self._is_covered(t, language, covered)) / len(tokens)
+        if confidence < self.min_confidence:
+            return None
+
+        headers = catalog.text('section_headers', language)
+        if intent == 'disease_info':
+            sections = self._disease_sections([row for row, _ in diseases], fields or list(DISEASE_FIELDS), headers)
+        else:
+            sections = self._vaccination_sections(index.vaccines, token_set, headers)
+        sections.append({'title': '', 'content': catalog.text('closing_note', language), 'type': 'text'})
+        return TemplateAnswer(intent=intent, confidence=confidence, sections=sections,
+                              text=self.render_text(sections))
+
+    @staticmethod
+    def render_text(sections: List[Dict[str, Any]]) -> str:
+        """Plain-text form of the sections, for history and text-only clients."""
+        blocks = []
+        for section in sections:
+            lines = [section['title'].replace('**', '')] if section.get('title') else []
+            if section.get('content'):
+                lines.append(section['content'])
+            lines.extend(f"• {item}" for item in section.get('items', []))
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+    def _disease_sections(self, rows: List[Dict[str, Any]], fields: List[str], headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        sections = []
+        for row in rows:
+            sections.append({'title': headers['general'], 'content': row['name'], 'type': 'text'})
+            for field in fields:
+                sections.append({
+                    'title': headers[field],
+                    'content': '',
+                    'type': 'list',
+                    'items': [item.strip()[:1].upper() + item.strip()[1:] for item in row[field].split(',') if item.strip()],
+                })
+        return sections
+
+    def _vaccination_sections(self, vaccines, token_set: Set[str], headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        # "polio vaccine" narrows the list; "vaccination schedule" shows all of it
+        named = [row for row, name_words in vaccines if name_words & token_set]
+        rows = named or [row for row, _ in vaccines]
+        return [{
+            'title': headers['vaccination'],
+            'content': '',
+            'type': 'list',
+            'items': [f"{row['vaccine_name']} ({row['age_group']}): {row['schedule']}. {row['description']}." for row in rows],
+        }]
+
+    def _build(self, language: str) -> _LanguageIndex:
+        """Disease and vaccine name words for the language."""
+        # Name words too generic to identify a disease on their own
+        generic = catalog.keywords('generic_name_words', language) | catalog.keywords('generic_name_words', 'en')
+        diseases = []
+        for row in self.db.search_diseases_rows('', language):
+            name_words = set(tokenize(row['name']))
+            keys = {w for w in name_words if len(w) >= 3 and w not in generic and not w.isdigit()}
+            diseases.append((row, name_words, keys))
+        vaccines = [(row, set(tokenize(row['vaccine_name'])))
+                    for row in self.db.get_vaccination_schedule_rows(language=language)]
+        return _LanguageIndex(diseases=diseases, vaccines=vaccines)
+
+    def _is_covered(self, token: str, language: str, covered: Set[str]) -> bool:
+        return (token in covered
+                or token in catalog.keywords('filler', language)
+                or token in catalog.keywords('filler', 'en')
+                or token.startswith(catalog.prefixes('vaccine', language))
+                or any(token.startswith(catalog.prefixes(f, language)) for f in DISEASE_FIELDS))
+
+    @staticmethod
+    def _has_stem(tokens: Set[str], stems: Tuple[str, ...]) -> bool:
+        return bool(stems) and any(token.startswith(stems) for token in tokens)
+
+# Global instance
+answer_engine = AnswerEngine(min_confidence=float(os.getenv('ANSWER_ENGINE_MIN_CONFIDENCE', 0.8)))
@@ -0,0 +1,81 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from app.services.answer_engine import tokenize
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import fold_text
+
+# Match tiers, best first: the name starts with the prefix, a later word of
+# the name does ("type" -> "Diabetes Type 2"), or a colloquial synonym does
+TIERS = ('name', 'word', 'synonym')
+
+
+@dataclass
+class _Tier:
+    keys: List[str]                       # sorted folded keys, for bisect
+    entries: List[Tuple[str, str]]        # (canonical name, kind) per key
+
+
+@dataclass
+class _CompletionIndex:
+    tiers: List[_Tier]
+
+
+class Autocomplete:
+    """
+    Prefix suggestions of canonical disease and vaccine names, per language.
+    Each match tier is a sorted array of folded keys; a lookup bisects to the
+    first key with the prefix and walks forward only until it has `limit`
+    distinct names, so its cost does not grow with the catalog.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or health_db
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def suggest(self, prefix: str, language: str = 'en', limit: int = 8) -> List[Dict[str, str]]:
+        """Up to limit names for the typed prefix, best tier first, alphabetical within a tier."""
+        text = fold_text(prefix)
+        if not text:
+            return []
+        index = self._indexes.get(language)
+        suggestions, seen = [], set()
+        for tier in index.tiers:
+            position = bisect_left(tier.keys, text)
+            while position < len(tier.keys) and tier.keys[position].startswith(text):
+                name, kind = tier.entries[position]
+                if name not in seen:
+                    seen.add(name)
+                    suggestions.append({'name': name, 'kind': kind})
+                    if len(suggestions) == limit:
+                        return suggestions
+                position += 1
+        return suggestions
+
+    def _build(self, language: str) -> _CompletionIndex:
+        names = [(row['name'], 'disease') for row in self.db.search_diseases_rows('', language)]
+        names += [(row['vaccine_name'], 'vaccine') for row in self.db.get_vaccination_schedule_rows(language=language)]
+        synonyms = [(fold_text(term), variants) for term, variants in catalog.synonyms(language).items()]
+
+        keyed: Dict[str, set] = {tier: set() for tier in TIERS}
+        for name, kind in names:
+            folded = fold_text(name)
+            keyed['name'].add((folded, name, kind))
+            words = tokenize(folded)
+            for start in range(1, len(words)):
+                keyed['word'].add((' '.join(words[start:]), name, kind))
+            for term, variants in synonyms:
+                if term in folded:
+                    keyed['synonym'].update((fold_text(variant), name, kind) for variant in variants)
+
+        tiers = []
+        for tier in TIERS:
+            # Shorter names sort first among equal keys, which is what a user expects to see
+            ordered = sorted(keyed[tier], key=lambda item: (item[0], len(item[1]), item[1]))
+            tiers.append(_Tier(keys=[key for key, _, _ in ordered],
+                               entries=[(name, kind) for _, name, kind in ordered]))
+        return _CompletionIndex(tiers=tiers)
+
+# Global instance
+autocomplete = Autocomplete()
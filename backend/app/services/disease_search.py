@@ -0,0 +1,169 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from app.services.answer_engine import DISEASE_FIELDS, tokenize
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import fold_text, query_normalizer
+
+# Row fields searched, as the SQL LIKE search did; a name match outranks a symptom match
+FIELD_WEIGHTS = {'name': 3, 'symptoms': 2, 'prevention': 1}
+
+# Rows that contain the whole query as a substring rank above single-word matches
+SUBSTRING_SCORE = 10
+
+# Fuzzy lookup: words this short are too ambiguous to correct, and a word is
+# only corrected to terms whose trigram (Dice) similarity reaches the minimum
+FUZZY_MIN_LENGTH = 4
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_TERMS = 2
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class _SearchIndex:
+    rows: List[Dict[str, Any]]
+    haystacks: List[str]                  # folded searchable text per row
+    phrases: Dict[str, Dict[int, int]]    # word or phrase (incl. synonyms) -> {row position: weight}
+    max_phrase_words: int
+    stopwords: Set[str]
+    field_stems: Tuple[str, ...]          # "symptoms of ..." names a field, not a disease
+    terms: List[str]                      # name/symptom words and synonyms, for fuzzy lookup
+    term_sizes: List[int]                 # trigram count per term
+    trigrams: Dict[str, FrozenSet[int]]   # trigram -> term ids
+
+
+class DiseaseSearch:
+    """
+    Ranked disease search over an in-memory index per (data version, language).
+    The locale synonyms ("loose motion", "sugar", "BP") are compiled into the
+    index when it is built, so a query is a few dict lookups instead of extra
+    LIKE clauses. Unknown words ("malria", "tyfoid") are matched through a
+    trigram index of name and symptom words, which only touches terms sharing
+    a trigram with the word. Only queries too short for that ("dia") fall back
+    to a substring scan of the rows.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or health_db
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def search(self, query: str, language: str = 'en', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Disease rows matching the query, best first; all rows for an empty query."""
+        normalized = query_normalizer.normalize(query, language)
+        index = self._indexes.get(normalized.language)
+        if not normalized.text:
+            return index.rows[:limit]
+
+        scores = self._phrase_scores(index, tokenize(normalized.text))
+        # Longer queries rely on the trigram lookup: a scan per miss would visit every row
+        if not scores and len(normalized.text) < FUZZY_MIN_LENGTH:
+            for position, haystack in enumerate(index.haystacks):
+                if normalized.text in haystack:
+                    scores[position] += SUBSTRING_SCORE
+        rank = lambda position: (-scores[position], position)
+        ranked = sorted(scores, key=rank) if limit is None else heapq.nsmallest(limit, scores, key=rank)
+        return [index.rows[position] for position in ranked]
+
+    def _phrase_scores(self, index: _SearchIndex, tokens: List[str]) -> Dict[int, float]:
+        """
+        Score rows by the words and phrases of the query found in the index;
+        longer phrases weigh more, fuzzy word matches by their similarity.
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for size in range(min(index.max_phrase_words, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                token = tokens[start]
+                if size == 1 and (token in index.stopwords or token.startswith(index.field_stems)):
+                    continue
+                postings = index.phrases.get(' '.join(tokens[start:start + size]))
+                if postings:
+                    for position, weight in postings.items():
+                        scores[position] += size * weight
+                elif size == 1 and len(token) >= FUZZY_MIN_LENGTH and not token.isdigit():
+                    for similarity, term in self._fuzzy_terms(index, token):
+                        for position, weight in index.phrases[term].items():
+                            scores[position] += similarity * weight
+        return scores
+
+    @staticmethod
+    def _fuzzy_terms(index: _SearchIndex, word: str) -> List[Tuple[float, str]]:
+        """Indexed terms most similar to a misspelled word, by shared trigrams."""
+        grams = sorted(_trigrams(word), key=lambda gram: len(index.trigrams.get(gram, ())))
+        # A term within the minimum similarity shares at least min_shared trigrams,
+        # so it appears in one of the rarest len - min_shared + 1 of them; the
+        # common ones ("  t", "ia ") are only probed for those candidates.
+        min_shared = math.ceil(FUZZY_MIN_SIMILARITY * len(grams) / (2 - FUZZY_MIN_SIMILARITY))
+        split = len(grams) - min_shared + 1
+        shared = Counter()
+        for gram in grams[:split]:
+            postings = index.trigrams.get(gram)
+            if postings:
+                shared.update(postings)
+        common = [index.trigrams[gram] for gram in grams[split:] if gram in index.trigrams]
+        matches = []
+        for term_id, count in shared.items():
+            count += sum(term_id in postings for postings in common)
+            similarity = 2 * count / (len(grams) + index.term_sizes[term_id])
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                matches.append((similarity, index.terms[term_id]))
+        return heapq.nlargest(FUZZY_MAX_TERMS, matches)
+
+    def _build(self, language: str) -> _SearchIndex:
+        rows = self.db.search_diseases_rows('', language)
+        stopwords = set(catalog.keywords('filler', language)) | set(catalog.keywords('filler', 'en'))
+        synonyms = [(fold_text(term), [' '.join(tokenize(fold_text(v))) for v in variants])
+                    for term, variants in catalog.synonyms(language).items()]
+        phrases: Dict[str, Dict[int, int]] = defaultdict(dict)
+        max_phrase_words = 1
+
+        def add(phrase: str, position: int, weight: int):
+            nonlocal max_phrase_words
+            if phrase and weight > phrases[phrase].get(position, 0):
+                phrases[phrase][position] = weight
+                max_phrase_words = max(max_phrase_words, phrase.count(' ') + 1)
+
+        haystacks = []
+        fuzzy_terms: Set[str] = set()
+        for position, row in enumerate(rows):
+            fields = {field: fold_text(row[field] or '') for field in FIELD_WEIGHTS}
+            haystacks.append(' | '.join(fields.values()))
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    if token not in stopwords:
+                        add(token, position, weight)
+                        if field != 'prevention':
+                            fuzzy_terms.add(token)
+                # Colloquial terms point at every row whose text uses the catalog term
+                for term, variants in synonyms:
+                    if term in text:
+                        add(' '.join(tokenize(term)), position, weight)
+                        for variant in variants:
+                            add(variant, position, weight)
+                            if ' ' not in variant:
+                                fuzzy_terms.add(variant)
+        field_stems = tuple(stem for lang in {language, 'en'} for field in DISEASE_FIELDS
+                            for stem in catalog.prefixes(field, lang))
+
+        terms = sorted(t for t in fuzzy_terms if len(t) >= FUZZY_MIN_LENGTH - 1 and not t.isdigit())
+        trigrams: Dict[str, Set[int]] = defaultdict(set)
+        term_sizes = []
+        for term_id, term in enumerate(terms):
+            grams = _trigrams(term)
+            term_sizes.append(len(grams))
+            for gram in grams:
+                trigrams[gram].add(term_id)
+        return _SearchIndex(rows=rows, haystacks=haystacks, phrases=dict(phrases),
+                            max_phrase_words=max_phrase_words, stopwords=stopwords, field_stems=field_stems,
+                            terms=terms, term_sizes=term_sizes,
+                            trigrams={gram: frozenset(ids) for gram, ids in trigrams.items()})
+
+# Global instance
+disease_search = DiseaseSearch()
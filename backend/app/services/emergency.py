@@ -0,0 +1,40 @@
+import logging
+from typing import TYPE_CHECKING, Optional
+from app.core.metrics import metrics
+from app.services.health_filter import HealthContextFilter
+from app.services.localization import catalog
+
+if TYPE_CHECKING:
+    from app.services.intent_router import QueryIntent
+
+logger = logging.getLogger(__name__)
+
+class EmergencyFastPath:
+    """
+    Detects emergency queries and serves precomputed, localized 108 guidance
+    (the locale's emergency_guidance), shown before any LLM output so
+    time-to-critical-advice does not depend on Gemini latency.
+    """
+    
+    def __init__(self, health_filter: Optional[HealthContextFilter] = None):
+        self.health_filter = health_filter or HealthContextFilter()
+    
+    def detect(self, query: str, language: str = 'en') -> bool:
+        """True when the query mentions emergency symptoms in English or the given language."""
+        if self.health_filter.is_emergency(query):
+            return True
+        return catalog.matches('emergency', query, language)
+    
+    def guidance(self, language: str = 'en') -> str:
+        """Precomputed emergency guidance block for the language (English fallback)."""
+        return catalog.text('emergency_guidance', language)
+    
+    def for_intent(self, intent: 'QueryIntent') -> Optional[str]:
+        """Guidance block when the routed query is an emergency, otherwise None."""
+        if not intent.is_emergency:
+            return None
+        metrics.increment('emergency.fast_path')
+        return self.guidance(intent.language)
+
+# Global instance
+emergency_fast_path = EmergencyFastPath()
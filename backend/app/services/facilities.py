@@ -0,0 +1,321 @@
+import asyncio
+import csv
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Accepted CSV column names, first match wins; only name and coordinates are required
+COLUMNS = {
+    'id': ('facility_id', 'id'),
+    'name': ('name', 'facility_name'),
+    'type': ('type', 'facility_type'),
+    'latitude': ('latitude', 'lat'),
+    'longitude': ('longitude', 'lon', 'lng'),
+    'phone': ('phone', 'contact'),
+    'address': ('address',),
+    'district': ('district',),
+    'state': ('state',),
+}
+
+
+@dataclass
+class _Cell:
+    ids: np.ndarray                       # facility ids (objects), parallel to the columns below
+    points: np.ndarray                    # (3, facilities): latitude and longitude in radians, cos(latitude)
+    types: np.ndarray                     # type codes, see _FacilityGrid.type_codes
+
+
+@dataclass
+class _FacilityGrid:
+    version: Optional[str]
+    facilities: Dict[str, Dict[str, Any]]
+    cells: Dict[Tuple[int, int], _Cell]
+    type_codes: Dict[str, int]
+    extent: Optional[Tuple[int, int, int, int]] = None   # first and last occupied row, then column
+    everything: Optional[_Cell] = None                    # every cell's columns joined, for full scans
+
+
+def read_facilities(path: str) -> Dict[str, Dict[str, Any]]:
+    """Facilities in a CSV by id; rows without a name or valid coordinates are skipped."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = {column.strip().lower(): position for position, column in enumerate(next(reader, []))}
+        columns = [(field, next((header[name] for name in names if name in header), None))
+                   for field, names in COLUMNS.items()]
+        present = {field for field, position in columns if position is not None}
+        if not {'name', 'latitude', 'longitude'} <= present:
+            raise ValueError(f"{path}: needs name, latitude and longitude columns")
+        facilities, skipped = {}, 0
+        for row in reader:
+            record = {field: row[position].strip() if position is not None and position < len(row) else ''
+                      for field, position in columns}
+            try:
+                latitude, longitude = float(record['latitude']), float(record['longitude'])
+            except ValueError:
+                skipped += 1
+                continue
+            if not record['name'] or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                skipped += 1
+                continue
+            record.update(latitude=latitude, longitude=longitude)
+            record['id'] = record['id'] or f"{record['name']}@{latitude:.5f},{longitude:.5f}"
+            facilities[record['id']] = record
+    if skipped:
+        logger.warning(f"Skipped {skipped} facility rows without a name or valid coordinates in {path}")
+    return facilities
+
+
+class FacilityIndex:
+    """
+    Nearest health facilities (PHCs, CHCs, hospitals) to a point, from a CSV.
+    Facilities are bucketed into a lat/lon grid of cell_degrees cells. A lookup
+    searches rings of cells outward from the point's cell and stops once the
+    k-th best distance is within the great-circle distance to the edge of the
+    searched area, so it touches a few cells however long the list is. Far
+    from every facility, once the searched square outgrows the occupied cells,
+    one vectorized pass over all facilities finishes the search instead.
+
+    The CSV is re-checked every reload_seconds by run_facility_reload, off the
+    request path. On a change only the cells whose facilities were added,
+    removed or edited are rebuilt, and the new grid replaces the old one in a
+    single assignment.
+    """
+
+    def __init__(self, csv_path: str, reload_seconds: float = 30, cell_degrees: float = 0.25):
+        self.csv_path = csv_path
+        self.reload_seconds = reload_seconds
+        self.cell_degrees = cell_degrees
+        self._columns = round(360 / cell_degrees)
+        self._rows = round(180 / cell_degrees)
+        self._grid = _FacilityGrid(version=None, facilities={}, cells={}, type_codes={})
+        self._signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._grid.version
+
+    @property
+    def size(self) -> int:
+        return len(self._grid.facilities)
+
+    def load(self) -> bool:
+        """Applies the CSV if it changed since the last load; False when there is none to use."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return True
+        # One loader at a time; lookups keep using the current grid meanwhile
+        if not self._lock.acquire(blocking=False):
+            return self._grid.version is not None
+        try:
+            facilities = read_facilities(self.csv_path)
+            changed = self.update(facilities, version=f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+            self._signature = signature
+            logger.info(f"Loaded {len(facilities)} facilities ({changed} cells rebuilt)")
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading facilities: {e}")
+            return self._grid.version is not None
+        finally:
+            self._lock.release()
+
+    def update(self, facilities: Dict[str, Dict[str, Any]], version: str) -> int:
+        """Replaces the facility set, rebuilding only the cells it changes; returns how many."""
+        old = self._grid
+        changed = {facility_id: record for facility_id, record in facilities.items()
+                   if old.facilities.get(facility_id) != record}
+        members: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        for facility_id, record in changed.items():
+            members.setdefault(self._record_cell(record), []).append(record)
+        stale = [old.facilities[facility_id] for facility_id in changed if facility_id in old.facilities]
+        stale += [record for facility_id, record in old.facilities.items() if facility_id not in facilities]
+        for record in stale:
+            members.setdefault(self._record_cell(record), [])
+        # Unchanged facilities stay where they were, so a dirty cell's other members come from its old arrays
+        for cell, records in members.items():
+            if cell in old.cells:
+                records.extend(facilities[facility_id] for facility_id in old.cells[cell].ids
+                               if facility_id in facilities and facility_id not in changed)
+
+        type_codes = dict(old.type_codes)
+        cells = dict(old.cells)
+        for cell, records in members.items():
+            if records:
+                cells[cell] = self._build_cell(records, type_codes)
+            else:
+                cells.pop(cell, None)
+        extent = everything = None
+        if cells:
+            rows, columns = zip(*cells)
+            extent = (min(rows), max(rows), min(columns), max(columns))
+            everything = _Cell(ids=np.concatenate([cell.ids for cell in cells.values()]),
+                               points=np.concatenate([cell.points for cell in cells.values()], axis=1),
+                               types=np.concatenate([cell.types for cell in cells.values()]))
+        self._grid = _FacilityGrid(version=version, facilities=facilities, cells=cells,
+                                   type_codes=type_codes, extent=extent, everything=everything)
+        return len(members)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5,
+                types: Optional[Iterable[str]] = None, max_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Up to k facilities nearest the point, closest first, with distance_km."""
+        metrics.increment('facilities.lookups')
+        grid = self._grid
+        if grid.extent is None:
+            return []
+        allowed = None
+        if types:
+            allowed = np.zeros(len(grid.type_codes) + 1, dtype=bool)
+            for name in types:
+                code = grid.type_codes.get(name.strip().lower())
+                if code is not None:
+                    allowed[code] = True
+            if not allowed.any():
+                return []
+
+        longitude = (longitude + 180) % 360 - 180
+        lat0, lon0 = math.radians(latitude), math.radians(longitude)
+        cos_lat0 = math.cos(lat0)
+        row0, column0 = self._cell_of(latitude, longitude)
+        distances, ids = np.empty(0), np.empty(0, dtype=object)
+        # Rings past the occupied rows and columns hold nothing, so with fewer than k
+        # matches the search ends there instead of walking the whole globe
+        first_row, last_row, first_column, last_column = grid.extent
+        last_ring = max(row0 - first_row, last_row - row0,
+                        min(self._columns // 2, max(column0 - first_column, last_column - column0)))
+        # Rings short of the occupied extent are empty too, so far from every facility
+        # the search starts at the first ring that reaches it
+        if first_column <= column0 <= last_column:
+            column_gap = 0
+        else:
+            column_gap = min(self._column_distance(column0, first_column), self._column_distance(column0, last_column))
+        first_ring = max(1, row0 - last_row, first_row - row0, column_gap)
+        # Ring 0 alone is rarely enough, so the first step searches the 3x3 block
+        for ring in range(first_ring, max(last_ring, first_ring) + 1):
+            # Once the searched square has more cells than the grid holds, one pass
+            # over every facility is cheaper than walking on, and ends the search
+            final = (2 * ring + 1) ** 2 > len(grid.cells)
+            if final:
+                distances, ids = np.empty(0), np.empty(0, dtype=object)
+                entries = [grid.everything]
+            else:
+                cells = self._ring(row0, column0, ring)
+                if ring == 1:
+                    cells = chain(self._ring(row0, column0, 0), cells)
+                entries = [entry for entry in map(grid.cells.get, cells) if entry is not None]
+            if entries:
+                points = np.concatenate([entry.points for entry in entries], axis=1)
+                ring_ids = np.concatenate([entry.ids for entry in entries])
+                if allowed is not None:
+                    keep = allowed[np.concatenate([entry.types for entry in entries])]
+                    points, ring_ids = points[:, keep], ring_ids[keep]
+                lat, lon, cos_lat = points
+                a = np.sin((lat - lat0) / 2) ** 2 + cos_lat0 * cos_lat * np.sin((lon - lon0) / 2) ** 2
+                distances = np.concatenate([distances, 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))])
+                ids = np.concatenate([ids, ring_ids])
+                if len(distances) > k:
+                    best = np.argpartition(distances, k - 1)[:k]
+                    distances, ids = distances[best], ids[best]
+            if final:
+                break
+            bound = self._searched_radius_km(latitude, longitude, cos_lat0, row0, column0, ring)
+            if max_km is not None and bound >= max_km:
+                break
+            if len(distances) == k and distances.max() <= bound:
+                break
+
+        results = []
+        for position in np.lexsort((ids, distances)).tolist():
+            distance = float(distances[position])
+            if max_km is not None and distance > max_km:
+                break
+            record = grid.facilities[ids[position]]
+            results.append({**record, 'distance_km': round(distance, 3)})
+        return results
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        row = min(int(math.floor((latitude + 90) / self.cell_degrees)), self._rows - 1)
+        column = int(math.floor((longitude + 180) / self.cell_degrees)) % self._columns
+        return row, column
+
+    def _record_cell(self, record: Dict[str, Any]) -> Tuple[int, int]:
+        return self._cell_of(record['latitude'], record['longitude'])
+
+    def _column_distance(self, column: int, other: int) -> int:
+        """Columns between two grid columns, the short way around."""
+        difference = abs(column - other)
+        return min(difference, self._columns - difference)
+
+    def _ring(self, row0: int, column0: int, ring: int) -> Iterable[Tuple[int, int]]:
+        """Cells at Chebyshev distance ring from (row0, column0), longitude wrapping around."""
+        if ring == 0:
+            yield row0, column0
+            return
+        width = min(2 * ring + 1, self._columns)
+        columns = {(column0 - ring + offset) % self._columns for offset in range(width)}
+        for row in (row0 - ring, row0 + ring):
+            if 0 <= row < self._rows:
+                for column in columns:
+                    yield row, column
+        if 2 * ring + 1 <= self._columns:
+            for row in range(max(row0 - ring + 1, 0), min(row0 + ring, self._rows)):
+                yield row, (column0 - ring) % self._columns
+                yield row, (column0 + ring) % self._columns
+
+    def _searched_radius_km(self, latitude: float, longitude: float, cos_lat0: float,
+                            row0: int, column0: int, ring: int) -> float:
+        """Great-circle distance from the point to the nearest place outside the searched cells."""
+        step = self.cell_degrees
+        edges = []
+        south = (row0 - ring) * step - 90
+        north = (row0 + ring + 1) * step - 90
+        if south > -90:
+            edges.append(math.radians(latitude - south))
+        if north < 90:
+            edges.append(math.radians(north - latitude))
+        if 2 * ring + 1 < self._columns:
+            # Distance to the meridian a longitude difference d away: asin(cos(lat) * sin(d))
+            for degrees in (longitude + 180 - (column0 - ring) * step, (column0 + ring + 1) * step - longitude - 180):
+                edges.append(math.asin(cos_lat0 * math.sin(min(math.radians(degrees), math.pi / 2))))
+        return EARTH_RADIUS_KM * min(edges) if edges else math.inf
+
+    @staticmethod
+    def _build_cell(records: List[Dict[str, Any]], type_codes: Dict[str, int]) -> _Cell:
+        lat = np.radians(np.array([record['latitude'] for record in records]))
+        types = [record['type'].lower() for record in records]
+        for name in types:
+            type_codes.setdefault(name, len(type_codes))
+        return _Cell(
+            ids=np.array([record['id'] for record in records], dtype=object),
+            points=np.stack([lat, np.radians(np.array([record['longitude'] for record in records])), np.cos(lat)]),
+            types=np.array([type_codes[name] for name in types], dtype=np.int32),
+        )
+
+async def run_facility_reload(index: FacilityIndex):
+    """Re-checks the facility CSV every reload_seconds, in a worker thread."""
+    while True:
+        await asyncio.sleep(index.reload_seconds)
+        try:
+            await asyncio.to_thread(index.load)
+        except Exception as e:
+            logger.error(f"Facility reload failed: {e}")
+
+# Global instance
+facility_index = FacilityIndex(
+    os.getenv('FACILITIES_CSV', 'facilities.csv'),
+    reload_seconds=float(os.getenv('FACILITIES_RELOAD_SECONDS', 30)),
+    cell_degrees=float(os.getenv('FACILITIES_CELL_DEGREES', 0.25)),
+)
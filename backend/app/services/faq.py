@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.core.metrics import metrics
+from app.services.answer_engine import answer_engine, tokenize
+from app.services.health_database import health_db
+from app.services.localization import catalog
+from app.services.normalization import query_normalizer
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = 'CURRENT'
+
+
+def normalize_question(question: str, language: str = 'en') -> str:
+    """Lookup key for a question: normalized words without punctuation or filler words."""
+    tokens = tokenize(query_normalizer.normalize(question, language).text)
+    filler = catalog.keywords('filler', language) | catalog.keywords('filler', 'en')
+    content = [t for t in tokens if t not in filler]
+    return " ".join(content or tokens)
+
+
+def usable_answer(answer: Optional[str], language: str = 'en') -> bool:
+    """Whether an answer is worth curating: present, and not the failed-generation fallback."""
+    from app.services.ai_health_assistant import ai_assistant
+
+    return bool(answer) and answer != ai_assistant.get_fallback_response(language)
+
+
+class FAQMiner:
+    """
+    Offline FAQ job: mines frequent questions from chat_history into
+    faq_candidates for review, and publishes approved ones as a versioned
+    JSON index (faq-<version>.json plus a CURRENT pointer file).
+    """
+
+    def __init__(self, index_dir: str, db=None):
+        self.index_dir = index_dir
+        self.db = db or health_db
+
+    def mine(self, min_count: int = 3, per_language: int = 50, since_days: Optional[int] = 30) -> int:
+        """Upserts the most frequent questions per language as candidates; returns how many."""
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        samples: Dict[tuple, Counter] = defaultdict(Counter)
+        answers: Dict[tuple, str] = {}
+        for row in self.db.get_chat_questions_rows(since_days):
+            language = row['language'] or 'en'
+            key = normalize_question(row['user_message'], language)
+            if not key:
+                continue
+            counts[language][key] += 1
+            samples[(language, key)][row['user_message'].strip()] += 1
+            # Latest real answer wins; failed generations are not worth curating
+            if usable_answer(row['bot_response'], language):
+                answers[(language, key)] = row['bot_response']
+
+        mined = 0
+        for language, counter in counts.items():
+            for key, frequency in counter.most_common(per_language):
+                if frequency < min_count:
+                    break
+                sample = samples[(language, key)].most_common(1)[0][0]
+                self.db.upsert_faq_candidate(language, key, sample, answers.get((language, key)), frequency)
+                mined += 1
+        logger.info(f"FAQ mining recorded {mined} candidates")
+        return mined
+
+    def generate_answers(self, regenerate: bool = False) -> int:
+        """
+        Fills in (or regenerates) answers for pending candidates in one batch.
+        A failed generation stores nothing, so the candidate is retried next run.
+        """
+        from app.services.ai_health_assistant import ai_assistant
+
+        generated = 0
+        for candidate in self.db.get_faq_candidates_rows(status='pending'):
+            language = candidate['language']
+            if usable_answer(candidate['answer'], language) and not regenerate:
+                continue
+            template = answer_engine.answer(candidate['sample_question'], language)
+            answer = template.text if template is not None else ai_assistant.generate_response(
+                candidate['sample_question'], language, user_id='faq-job'
+            )
+            if not usable_answer(answer, language):
+                logger.warning(f"No answer generated for FAQ candidate {candidate['id']}")
+                continue
+            self.db.update_faq_candidate(candidate['id'], answer=answer)
+            generated += 1
+        return generated
+
+    def publish(self) -> Optional[str]:
+        """Writes approved candidates as a new index version and points CURRENT at it."""
+        entries: Dict[str, Dict[str, Dict[str, str]]] = defaultdict(dict)
+        for candidate in self.db.get_faq_candidates_rows(status='approved'):
+            if usable_answer(candidate['answer'], candidate['language']):
+                entries[candidate['language']][candidate['normalized_question']] = {
+                    'question': candidate['sample_question'],
+                    'answer': candidate['answer'],
+                }
+        if not entries:
+            logger.info("No approved FAQ entries to publish")
+            return None
+
+        body = json.dumps(entries, ensure_ascii=False, sort_keys=True)
+        version = f"{datetime.utcnow():%Y%m%d%H%M%S}-{hashlib.sha256(body.encode('utf-8')).hexdigest()[:8]}"
+        os.makedirs(self.index_dir, exist_ok=True)
+        filename = f"faq-{version}.json"
+        with open(os.path.join(self.index_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'published_at': datetime.utcnow().isoformat(), 'entries': entries},
+                      f, ensure_ascii=False)
+        # Swap the pointer atomically so readers never see a half-written index
+        pointer = os.path.join(self.index_dir, CURRENT_POINTER)
+        with open(pointer + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(filename)
+        os.replace(pointer + '.tmp', pointer)
+        logger.info(f"Published FAQ index {version}")
+        return version
+
+    def coverage(self, index: 'FAQIndex', since_days: Optional[int] = 30) -> Dict[str, Any]:
+        """Share of recent chat questions the given index would have answered."""
+        total = hits = 0
+        for row in self.db.get_chat_questions_rows(since_days):
+            total += 1
+            language = row['language'] or 'en'
+            if normalize_question(row['user_message'], language) in index.entries.get(language, {}):
+                hits += 1
+        return {'questions': total, 'answered': hits, 'coverage': round(hits / total, 4) if total else 0.0}
+
+
+class FAQIndex:
+    """
+    Published FAQ answers held in memory as {language: {normalized question: entry}}.
+    The CURRENT pointer is re-checked at most every reload_seconds, so a new
+    publish is picked up without a restart.
+    """
+
+    def __init__(self, index_dir: str, reload_seconds: float = 30):
+        self.index_dir = index_dir
+        self.reload_seconds = reload_seconds
+        self.version: Optional[str] = None
+        self.entries: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._loaded_file: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Loads the version CURRENT points at; False when nothing is published yet."""
+        try:
+            with open(os.path.join(self.index_dir, CURRENT_POINTER), encoding='utf-8') as f:
+                filename = f.read().strip()
+            if filename == self._loaded_file:
+                return True
+            with open(os.path.join(self.index_dir, filename), encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading FAQ index: {e}")
+            return False
+        with self._lock:
+            self.entries = data['entries']
+            self.version = data['version']
+            self._loaded_file = filename
+        logger.info(f"Loaded FAQ index {self.version}")
+        return True
+
+    def lookup(self, question: str, language: str = 'en') -> Optional[str]:
+        """Published answer for the question, or None; counts hits for coverage."""
+        now = time.monotonic()
+        if now - self._checked_at > self.reload_seconds:
+            self._checked_at = now
+            self.load()
+        metrics.increment('faq.lookups')
+        entry = self.entries.get(language, {}).get(normalize_question(question, language))
+        if entry is None:
+            return None
+        metrics.increment('faq.hits')
+        return entry['answer']
+
+    def coverage(self) -> Dict[str, Any]:
+        """Share of live chat traffic answered from the FAQ since startup."""
+        lookups = metrics.get('faq.lookups')
+        hits = metrics.get('faq.hits')
+        return {
+            'version': self.version,
+            'lookups': lookups,
+            'hits': hits,
+            'coverage': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+async def run_faq_schedule(miner: FAQMiner, interval_seconds: float, min_count: int):
+    """Periodically mines new candidates; publishing stays a reviewed, manual step."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(miner.mine, min_count)
+        except Exception as e:
+            logger.error(f"Scheduled FAQ mining failed: {e}")
+
+# Global instances
+FAQ_INDEX_DIR = os.getenv('FAQ_INDEX_DIR', 'faq_index')
+faq_index = FAQIndex(FAQ_INDEX_DIR, reload_seconds=float(os.getenv('FAQ_RELOAD_SECONDS', 30)))
+faq_miner = FAQMiner(FAQ_INDEX_DIR)
@@ -1,7 +1,12 @@
 import google.generativeai as genai
 import os
-from typing import List, Optional
+import time
+from typing import AsyncIterator, List, Optional
+from ..core.concurrency import llm_slots
+from ..core.rate_limit import rate_limiter, count_response_tokens
 from ..models.chat import Message, MessageRole
+from .analytics import chat_rollups
+from .intent_router import QueryIntent
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,20 +49,32 @@ RESPONSE FORMAT:
 Remember: You are providing general health information only, not medical advice.
 """
 
-    async def get_health_response(self, query: str, context: List[Message] = None) -> str:
+    async def get_health_response(self, query: str, context: List[Message] = None, user_id: Optional[str] = None,
+                                  intent: Optional[QueryIntent] = None) -> str:
         """
-        Generate health-focused response using Gemini API
+        Generate health-focused response using Gemini API.
+        Cancelling the caller cancels the Gemini call and frees its slot.
+        Token usage is charged to user_id's daily LLM ledger when given;
+        intent, when given, sets the output token budget and emergency notice.
         """
         try:
             # Prepare conversation context
             conversation_context = self._prepare_context(query, context)
             
             # Generate response
-            response = self.model.generate_content(conversation_context)
+            async with llm_slots.acquire():
+                started = time.perf_counter()
+                try:
+                    response = await self.model.generate_content_async(
+                        conversation_context, generation_config=self._generation_config(intent)
+                    )
+                finally:
+                    self._record_latency(intent, started)
+            rate_limiter.record_llm_tokens(user_id, count_response_tokens(response, conversation_context))
             
             if response.text:
                 # Add medical disclaimer if not already present
-                formatted_response = self._format_health_response(response.text)
+                formatted_response = self._format_health_response(response.text, intent)
                 return formatted_response
             else:
                 return self._get_fallback_response()
@@ -66,6 +83,37 @@ Remember: You are providing general health information only, not medical advice.
             logger.error(f"Gemini API error: {str(e)}")
             return self._get_error_response()
 
+    async def stream_health_response(self, query: str, context: List[Message] = None, user_id: Optional[str] = None,
+                                     intent: Optional[QueryIntent] = None) -> AsyncIterator[str]:
+        """
+        Stream a health response from Gemini as raw text chunks.
+        Callers should replace the streamed text with format_health_disclaimer(full_text)
+        once the stream ends; API errors are raised to the caller.
+        """
+        conversation_context = self._prepare_context(query, context)
+        async with llm_slots.acquire():
+            started = time.perf_counter()
+            try:
+                response = await self.model.generate_content_async(
+                    conversation_context, stream=True, generation_config=self._generation_config(intent)
+                )
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                self._record_latency(intent, started)
+        rate_limiter.record_llm_tokens(user_id, count_response_tokens(response, conversation_context))
+
+    @staticmethod
+    def _generation_config(intent: Optional[QueryIntent]) -> Optional[dict]:
+        return {'max_output_tokens': intent.max_output_tokens} if intent is not None else None
+
+    @staticmethod
+    def _record_latency(intent: Optional[QueryIntent], started: float):
+        """Records a Gemini call, finished, failed or cancelled, timed from perf_counter() value started."""
+        language = intent.language if intent is not None else 'en'
+        chat_rollups.record_llm_latency(language, (time.perf_counter() - started) * 1000)
+
     def _prepare_context(self, query: str, context: List[Message] = None) -> str:
         """
         Prepare conversation context for Gemini API
@@ -86,7 +134,7 @@ Remember: You are providing general health information only, not medical advice.
         
         return conversation
 
-    def _format_health_response(self, response: str) -> str:
+    def _format_health_response(self, response: str, intent: Optional[QueryIntent] = None) -> str:
         """
         Format response with appropriate medical disclaimers
         """
@@ -98,9 +146,13 @@ Remember: You are providing general health information only, not medical advice.
             disclaimer = "\n\n⚠️ **Important:** This information is for general guidance only and should not replace professional medical advice. Please consult with a healthcare provider for proper diagnosis and treatment."
             response += disclaimer
         
-        # Check for emergency situations
-        emergency_keywords = ['emergency', 'urgent', 'severe', 'call 911', 'immediate']
-        if any(keyword in response.lower() for keyword in emergency_keywords):
+        # Check for emergency situations; a routed query is not rescanned
+        if intent is not None:
+            is_emergency = intent.is_emergency
+        else:
+            emergency_keywords = ['emergency', 'urgent', 'severe', 'call 911', 'immediate']
+            is_emergency = any(keyword in response.lower() for keyword in emergency_keywords)
+        if is_emergency:
             emergency_notice = "\n\n🚨 **Emergency:** If this is a medical emergency, please call 911 or go to your nearest emergency room immediately."
             response = emergency_notice + "\n\n" + response
         
@@ -131,8 +183,8 @@ Remember: You are providing general health information only, not medical advice.
             "⚠️ **Important:** This service provides general health information only and should not replace professional medical care."
         )
 
-    def format_health_disclaimer(self, response: str) -> str:
+    def format_health_disclaimer(self, response: str, intent: Optional[QueryIntent] = None) -> str:
         """
         Ensure proper health disclaimers are included
         """
-        return self._format_health_response(response)
\ No newline at end of file
+        return self._format_health_response(response, intent)
\ No newline at end of file
@@ -1,20 +1,79 @@
 import sqlite3
 import json
+import hashlib
 import logging
-from typing import Dict, List, Optional
+import os
+import threading
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
 from datetime import datetime
 from app.models.health import DiseaseInfo, VaccinationInfo, HealthChatHistory
+from app.services.age_parsing import parse_schedule
 
 logger = logging.getLogger(__name__)
 
+# Response bodies shorter than this are stored as plain text; compression would barely pay
+RESPONSE_COMPRESS_MIN_BYTES = 256
+
+# Chat rows read their answer from response_bodies; rows written before it existed keep theirs inline
+_CHAT_RESPONSE_COLUMNS = (
+    "COALESCE(b.body, c.bot_response) AS bot_response, b.compressed AS response_compressed"
+)
+_CHAT_RESPONSE_JOIN = "chat_history AS c LEFT JOIN response_bodies AS b ON b.hash = c.response_hash"
+
+def _dict_factory(cursor, row) -> Dict[str, Any]:
+    """sqlite3 row factory that maps column names to values."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+@lru_cache(maxsize=1024)
+def _inflate(body: bytes) -> str:
+    """Text of a compressed response body; the same few answers come back again and again."""
+    return zlib.decompress(body).decode('utf-8')
+
+def _response_text(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replaces compressed bot_response bodies in chat rows with their text."""
+    for row in rows:
+        if row.pop('response_compressed'):
+            row['bot_response'] = _inflate(row['bot_response'])
+    return rows
+
+T = TypeVar('T')
+
+class ReferenceDataCache(Generic[T]):
+    """
+    Per-language values derived from the reference tables (search indexes,
+    dose arrays), built on first use. Adding one for a new data_version
+    drops those of older versions, so re-imported data is picked up.
+    """
+
+    def __init__(self, db: 'HealthDatabase', build: Callable[[str], T]):
+        self.db = db
+        self.build = build
+        self._entries: Dict[Tuple[str, str], T] = {}
+        self._lock = threading.Lock()
+
+    def get(self, language: str) -> T:
+        key = (self.db.data_version, language)
+        value = self._entries.get(key)
+        if value is None:
+            value = self.build(language)
+            with self._lock:
+                self._entries = {k: v for k, v in self._entries.items() if k[0] == key[0]}
+                self._entries[key] = value
+        return value
+
 class HealthDatabase:
     """Manages the health database and provides health-related data access."""
     
-    def __init__(self, db_path: str = "health_data.db"):
+    def __init__(self, db_path: str = "health_data.db", compress_responses: bool = True):
         """Initializes the database connection and loads initial data."""
         self.db_path = db_path
+        self.compress_responses = compress_responses
+        self.data_version = None
         self.init_database()
         self.load_health_data()
+        self.refresh_data_version()
 
     def get_connection(self):
         """Get a fresh database connection."""
@@ -47,16 +106,75 @@ class HealthDatabase:
                         language TEXT DEFAULT 'en'
                     )
                 ''')
+                # Dose age windows parsed from vaccinations.schedule, rebuilt with the data version
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS vaccination_doses (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        vaccination_id INTEGER NOT NULL REFERENCES vaccinations(id),
+                        label TEXT NOT NULL,
+                        min_age_days INTEGER NOT NULL,
+                        max_age_days INTEGER NOT NULL
+                    )
+                ''')
+                # Bot answers repeat word for word (fallbacks, FAQ and template answers), so each
+                # distinct one is stored once, keyed by its SHA-256 and zlib-compressed when long
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS response_bodies (
+                        hash BLOB PRIMARY KEY,
+                        compressed INTEGER NOT NULL DEFAULT 0,
+                        body BLOB NOT NULL
+                    ) WITHOUT ROWID
+                ''')
+                # bot_response is left empty on rows that reference response_bodies
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS chat_history (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         user_message TEXT NOT NULL,
-                        bot_response TEXT NOT NULL,
+                        bot_response TEXT NOT NULL DEFAULT '',
                         language TEXT DEFAULT 'en',
                         timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        user_id TEXT
+                        user_id TEXT,
+                        response_hash BLOB
                     )
                 ''')
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(chat_history)")}
+                if 'response_hash' not in columns:
+                    cursor.execute("ALTER TABLE chat_history ADD COLUMN response_hash BLOB")
+                # Frequent questions mined from chat_history, reviewed before publishing
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS faq_candidates (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        language TEXT NOT NULL,
+                        normalized_question TEXT NOT NULL,
+                        sample_question TEXT NOT NULL,
+                        answer TEXT,
+                        frequency INTEGER NOT NULL DEFAULT 0,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE (language, normalized_question)
+                    )
+                ''')
+                # Dashboard rollups, added to as answers are produced (see services/analytics.py);
+                # bucket_start is the hour in Unix seconds, latency bins are geometric
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS chat_rollups (
+                        bucket_start INTEGER NOT NULL,
+                        language TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        answers INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (bucket_start, language, source)
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_latency_rollups (
+                        bucket_start INTEGER NOT NULL,
+                        language TEXT NOT NULL,
+                        bin INTEGER NOT NULL,
+                        calls INTEGER NOT NULL DEFAULT 0,
+                        total_ms REAL NOT NULL DEFAULT 0,
+                        PRIMARY KEY (bucket_start, language, bin)
+                    ) WITHOUT ROWID
+                ''')
                 conn.commit()
                 logger.info("Health database initialized successfully.")
         except sqlite3.Error as e:
@@ -108,37 +226,74 @@ class HealthDatabase:
         except sqlite3.Error as e:
             logger.error(f"Error loading health data: {e}")
 
-    def search_diseases(self, query: str, language: str = 'en') -> List[DiseaseInfo]:
-        """Searches for diseases based on keywords in name, symptoms, or prevention."""
+    def normalize_vaccination_doses(self) -> int:
+        """Re-derives vaccination_doses from the free-text schedules; returns the number of doses."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT id, schedule, language FROM vaccinations')
+                doses = [
+                    (vaccination_id, window.label, window.min_days, window.max_days)
+                    for vaccination_id, schedule, language in cursor.fetchall()
+                    for window in parse_schedule(schedule, language or 'en')
+                ]
+                cursor.execute('DELETE FROM vaccination_doses')
+                cursor.executemany(
+                    'INSERT INTO vaccination_doses (vaccination_id, label, min_age_days, max_age_days) VALUES (?, ?, ?, ?)',
+                    doses
+                )
+                conn.commit()
+                return len(doses)
+        except sqlite3.Error as e:
+            logger.error(f"Error normalizing vaccination doses: {e}")
+            return 0
+
+    def refresh_data_version(self) -> str:
+        """Recomputes the content hash of the reference tables (diseases, vaccinations).
+
+        Call after importing reference data; the derived dose windows are rebuilt first.
+        """
+        self.normalize_vaccination_doses()
+        digest = hashlib.sha256()
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                for table in ('diseases', 'vaccinations'):
+                    cursor.execute(f'SELECT * FROM {table} ORDER BY id')
+                    for row in cursor:
+                        digest.update(repr(row).encode('utf-8'))
+        except sqlite3.Error as e:
+            logger.error(f"Error computing data version: {e}")
+        self.data_version = digest.hexdigest()[:16]
+        return self.data_version
+
+    def search_diseases_rows(self, query: str, language: str = 'en') -> List[Dict[str, Any]]:
+        """Searches diseases and returns plain row dicts, ready for direct JSON encoding."""
         query = query.lower()
         try:
             with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT name, symptoms, prevention, treatment, severity, language 
                     FROM diseases 
                     WHERE language = ? AND (LOWER(name) LIKE ? OR LOWER(symptoms) LIKE ? OR LOWER(prevention) LIKE ?)
                 ''', (language, f'%{query}%', f'%{query}%', f'%{query}%'))
-                
-                results = []
-                for row in cursor.fetchall():
-                    results.append(DiseaseInfo(
-                        name=row[0],
-                        symptoms=row[1],
-                        prevention=row[2],
-                        treatment=row[3],
-                        severity=row[4],
-                        language=row[5]
-                    ))
-                return results
+                return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error searching diseases: {e}")
             return []
+
+    def search_diseases(self, query: str, language: str = 'en') -> List[DiseaseInfo]:
+        """Searches for diseases based on keywords in name, symptoms, or prevention."""
+        # Rows come from our own NOT NULL columns, so validation is skipped
+        return [DiseaseInfo.model_construct(**row) for row in self.search_diseases_rows(query, language)]
     
-    def get_vaccination_schedule(self, age_group: str = None, language: str = 'en') -> List[VaccinationInfo]:
-        """Retrieves vaccination schedule based on age group or all."""
+    def get_vaccination_schedule_rows(self, age_group: str = None, language: str = 'en') -> List[Dict[str, Any]]:
+        """Retrieves the vaccination schedule as plain row dicts."""
         try:
             with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
                 cursor = conn.cursor()
                 if age_group:
                     cursor.execute('''
@@ -151,70 +306,255 @@ class HealthDatabase:
                         SELECT vaccine_name, age_group, schedule, description, side_effects, language 
                         FROM vaccinations WHERE language = ?
                     ''', (language,))
-                
-                results = []
-                for row in cursor.fetchall():
-                    results.append(VaccinationInfo(
-                        vaccine_name=row[0],
-                        age_group=row[1],
-                        schedule=row[2],
-                        description=row[3],
-                        side_effects=row[4],
-                        language=row[5]
-                    ))
-                return results
+                return cursor.fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error retrieving vaccination schedule: {e}")
             return []
 
+    def get_vaccination_doses_rows(self, language: str = 'en') -> List[Dict[str, Any]]:
+        """Every dose window with its vaccination, as plain row dicts ordered by age."""
+        try:
+            with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT v.vaccine_name, v.age_group, v.schedule, v.description, v.side_effects, v.language,
+                           d.label AS dose, d.min_age_days, d.max_age_days
+                    FROM vaccination_doses d JOIN vaccinations v ON v.id = d.vaccination_id
+                    WHERE v.language = ?
+                    ORDER BY d.min_age_days, v.id
+                ''', (language,))
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving vaccination doses: {e}")
+            return []
+
+    def get_vaccination_schedule(self, age_group: str = None, language: str = 'en') -> List[VaccinationInfo]:
+        """Retrieves vaccination schedule based on age group or all."""
+        return [VaccinationInfo.model_construct(**row) for row in self.get_vaccination_schedule_rows(age_group, language)]
+
     def save_chat_history(self, user_message: str, bot_response: str, language: str, user_id: str = None):
         """Saves a chat interaction to the database."""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO chat_history (user_message, bot_response, language, user_id)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_message, bot_response, language, user_id))
+                    INSERT INTO chat_history (user_message, bot_response, language, user_id, response_hash)
+                    VALUES (?, '', ?, ?, ?)
+                ''', (user_message, language, user_id, self._store_response_body(conn, bot_response)))
                 conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Error saving chat history: {e}")
 
-    def get_chat_history(self, user_id: str = None, language: str = None, limit: int = 50) -> List[HealthChatHistory]:
-        """Retrieves chat history for a user."""
+    def _store_response_body(self, conn, text: str) -> bytes:
+        """Key of the text in response_bodies, adding it if it is not there yet."""
+        data = text.encode('utf-8')
+        key = hashlib.sha256(data).digest()
+        if conn.execute("SELECT 1 FROM response_bodies WHERE hash = ?", (key,)).fetchone() is None:
+            body, compressed = text, 0
+            if self.compress_responses and len(data) >= RESPONSE_COMPRESS_MIN_BYTES:
+                packed = zlib.compress(data, 6)
+                if len(packed) < len(data):
+                    body, compressed = packed, 1
+            conn.execute("INSERT OR IGNORE INTO response_bodies (hash, compressed, body) VALUES (?, ?, ?)",
+                         (key, compressed, body))
+        return key
+
+    def migrate_chat_responses(self, batch_size: int = 1000) -> int:
+        """
+        Moves answers still stored inline in chat_history into response_bodies,
+        one committed batch at a time; returns how many rows were moved.
+        """
+        moved, last_id = 0, 0
+        try:
+            with self.get_connection() as conn:
+                while True:
+                    rows = conn.execute('''
+                        SELECT id, bot_response FROM chat_history
+                        WHERE id > ? AND response_hash IS NULL
+                        ORDER BY id LIMIT ?
+                    ''', (last_id, batch_size)).fetchall()
+                    if not rows:
+                        return moved
+                    conn.executemany(
+                        "UPDATE chat_history SET bot_response = '', response_hash = ? WHERE id = ?",
+                        [(self._store_response_body(conn, text), row_id) for row_id, text in rows],
+                    )
+                    conn.commit()
+                    moved += len(rows)
+                    last_id = rows[-1][0]
+        except sqlite3.Error as e:
+            logger.error(f"Error moving chat responses: {e}")
+            return moved
+
+    def get_chat_history_rows(self, user_id: str = None, language: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Retrieves chat history as plain row dicts with ISO 8601 timestamps formatted by SQLite."""
         try:
             with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
                 cursor = conn.cursor()
-                query = "SELECT id, user_message, bot_response, language, timestamp, user_id FROM chat_history WHERE 1=1"
+                query = (
+                    f"SELECT c.id, c.user_message, {_CHAT_RESPONSE_COLUMNS}, c.language, "
+                    "strftime('%Y-%m-%dT%H:%M:%S', c.timestamp) AS timestamp, c.user_id "
+                    f"FROM {_CHAT_RESPONSE_JOIN} WHERE 1=1"
+                )
                 params = []
                 
                 if user_id:
-                    query += " AND user_id = ?"
+                    query += " AND c.user_id = ?"
                     params.append(user_id)
                 
                 if language:
-                    query += " AND language = ?"
+                    query += " AND c.language = ?"
                     params.append(language)
                 
-                query += " ORDER BY timestamp DESC LIMIT ?"
+                query += " ORDER BY c.timestamp DESC LIMIT ?"
                 params.append(limit)
                 
                 cursor.execute(query, params)
-                
-                results = []
-                for row in cursor.fetchall():
-                    results.append(HealthChatHistory(
-                        id=row[0],
-                        user_message=row[1],
-                        bot_response=row[2],
-                        language=row[3],
-                        timestamp=datetime.fromisoformat(row[4]) if row[4] else None,
-                        user_id=row[5]
-                    ))
-                return results
+                return _response_text(cursor.fetchall())
         except sqlite3.Error as e:
             logger.error(f"Error retrieving chat history: {e}")
             return []
 
+    def get_chat_history(self, user_id: str = None, language: str = None, limit: int = 50) -> List[HealthChatHistory]:
+        """Retrieves chat history for a user."""
+        results = []
+        for row in self.get_chat_history_rows(user_id, language, limit):
+            timestamp = row['timestamp']
+            row['timestamp'] = datetime.fromisoformat(timestamp) if timestamp else None
+            results.append(HealthChatHistory.model_construct(**row))
+        return results
+
+    def get_chat_questions_rows(self, since_days: Optional[int] = None) -> List[Dict[str, Any]]:
+        """User messages with their answers, oldest first, for FAQ mining."""
+        try:
+            with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
+                query = f"SELECT c.user_message, {_CHAT_RESPONSE_COLUMNS}, c.language FROM {_CHAT_RESPONSE_JOIN}"
+                params = []
+                if since_days:
+                    query += " WHERE c.timestamp >= datetime('now', ?)"
+                    params.append(f'-{int(since_days)} days')
+                query += " ORDER BY c.id"
+                return _response_text(conn.execute(query, params).fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Error reading chat history for mining: {e}")
+            return []
+
+    def upsert_faq_candidate(self, language: str, normalized_question: str, sample_question: str,
+                             answer: Optional[str], frequency: int):
+        """Records a mined question; review status and curated answers are kept."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    INSERT INTO faq_candidates (language, normalized_question, sample_question, answer, frequency)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (language, normalized_question) DO UPDATE SET
+                        sample_question = excluded.sample_question,
+                        frequency = excluded.frequency,
+                        answer = COALESCE(faq_candidates.answer, excluded.answer),
+                        updated_at = CURRENT_TIMESTAMP
+                ''', (language, normalized_question, sample_question, answer, frequency))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error saving FAQ candidate: {e}")
+
+    def get_faq_candidates_rows(self, status: Optional[str] = None, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """FAQ candidates, most frequent first."""
+        try:
+            with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
+                query = "SELECT * FROM faq_candidates WHERE 1=1"
+                params = []
+                if status:
+                    query += " AND status = ?"
+                    params.append(status)
+                if language:
+                    query += " AND language = ?"
+                    params.append(language)
+                query += " ORDER BY frequency DESC, id"
+                return conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving FAQ candidates: {e}")
+            return []
+
+    def update_faq_candidate(self, candidate_id: int, status: Optional[str] = None, answer: Optional[str] = None) -> bool:
+        """Sets a candidate's review status and/or answer; False if it does not exist."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute('''
+                    UPDATE faq_candidates
+                    SET status = COALESCE(?, status), answer = COALESCE(?, answer), updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (status, answer, candidate_id))
+                conn.commit()
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error updating FAQ candidate: {e}")
+            return False
+
+    def add_chat_rollups(self, answers: List[tuple], latencies: List[tuple]):
+        """
+        Adds (bucket_start, language, source, answers) and (bucket_start, language,
+        bin, calls, total_ms) increments to the rollups in one transaction.
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO chat_rollups (bucket_start, language, source, answers)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (bucket_start, language, source) DO UPDATE SET
+                        answers = chat_rollups.answers + excluded.answers
+                ''', answers)
+                conn.executemany('''
+                    INSERT INTO llm_latency_rollups (bucket_start, language, bin, calls, total_ms)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (bucket_start, language, bin) DO UPDATE SET
+                        calls = llm_latency_rollups.calls + excluded.calls,
+                        total_ms = llm_latency_rollups.total_ms + excluded.total_ms
+                ''', latencies)
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving chat rollups: {e}")
+            return False
+
+    def get_chat_rollups_rows(self, since: int, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Answer counts per hour, language and source from bucket_start since onwards."""
+        return self._rollup_rows('SELECT bucket_start, language, source, answers FROM chat_rollups',
+                                 since, language)
+
+    def get_llm_latency_rollups_rows(self, since: int, language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """LLM call counts per hour, language and latency bin from bucket_start since onwards."""
+        return self._rollup_rows('SELECT bucket_start, language, bin, calls, total_ms FROM llm_latency_rollups',
+                                 since, language)
+
+    def _rollup_rows(self, query: str, since: int, language: Optional[str]) -> List[Dict[str, Any]]:
+        try:
+            with self.get_connection() as conn:
+                conn.row_factory = _dict_factory
+                query += " WHERE bucket_start >= ?"
+                params = [since]
+                if language:
+                    query += " AND language = ?"
+                    params.append(language)
+                return conn.execute(query + " ORDER BY bucket_start", params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving chat rollups: {e}")
+            return []
+
+    def prune_chat_rollups(self, before: int) -> int:
+        """Deletes rollup buckets older than before; returns how many rows went."""
+        try:
+            with self.get_connection() as conn:
+                deleted = conn.execute("DELETE FROM chat_rollups WHERE bucket_start < ?", (before,)).rowcount
+                deleted += conn.execute("DELETE FROM llm_latency_rollups WHERE bucket_start < ?", (before,)).rowcount
+                conn.commit()
+                return deleted
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning chat rollups: {e}")
+            return 0
+
 # Global instance
-health_db = HealthDatabase()
\ No newline at end of file
+health_db = HealthDatabase(compress_responses=os.getenv('CHAT_RESPONSE_COMPRESSION', 'true').lower() != 'false')
\ No newline at end of file
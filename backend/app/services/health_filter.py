@@ -1,6 +1,11 @@
 import re
 from typing import List, Tuple
 from dataclasses import dataclass
+from app.services.localization import catalog
+from app.services.normalization import NormalizedQuery, query_normalizer
+
+# Locale keyword lists that mark a query in another language as health-related
+LOCALIZED_HEALTH_KEYS = ('emergency', 'first_aid', 'disease', 'vaccine', 'symptoms', 'prevention', 'treatment')
 
 @dataclass
 class FilterResult:
@@ -36,6 +41,21 @@ class HealthContextFilter:
                          'stroke', 'poisoning', 'overdose', 'suicide', 'self harm']
         }
         
+        # Acute emergencies that get the 108 guidance up front. Narrower than the 'emergency'
+        # keywords above, which only mark a query as health-related: "how severe is diabetes"
+        # "bleeding gums" or "emergency contraception" are not emergencies
+        self.acute_emergency_keywords = [
+            'medical emergency', 'unconscious', 'fainted', 'not breathing', "can't breathe", 'cannot breathe',
+            'difficulty breathing', 'chest pain', 'heart attack', 'having a stroke', 'seizure',
+            'heavy bleeding', 'bleeding heavily', 'poisoning', 'poisoned', 'overdose', 'suicide',
+            'self harm', 'snake bite', 'snakebite', 'choking', 'severe burn',
+        ]
+        
+        # Compiled once, whole words only: emergency detection runs before anything else on every query
+        self._emergency_pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(keyword) for keyword in self.acute_emergency_keywords) + r')\b'
+        )
+        
         # Non-health topics that should be rejected
         self.non_health_keywords = {
             'technology': ['computer', 'software', 'programming', 'coding', 'website', 'app',
@@ -55,11 +75,13 @@ class HealthContextFilter:
         """
         Determine if a query is health-related using keyword matching and pattern analysis
         """
-        query_lower = query.lower()
+        # NFC, case folding and romanized spellings, shared with search and routing
+        normalized = query_normalizer.normalize(query)
+        query_lower = normalized.text
         
         # Check for emergency keywords first
         emergency_score = self._calculate_keyword_score(query_lower, self.health_keywords['emergency'])
-        if emergency_score > 0:
+        if emergency_score > 0 or catalog.matches('emergency', query_lower, normalized.language):
             return FilterResult(
                 is_health_related=True,
                 confidence=1.0,
@@ -70,6 +92,7 @@ class HealthContextFilter:
         health_score = 0
         for category, keywords in self.health_keywords.items():
             health_score += self._calculate_keyword_score(query_lower, keywords)
+        health_score += self._localized_score(normalized)
         
         # Calculate non-health score
         non_health_score = 0
@@ -115,6 +138,19 @@ class HealthContextFilter:
                 reason="Ambiguous query - defaulting based on keyword balance"
             )
 
+    def is_emergency(self, query: str) -> bool:
+        """
+        Fast check for acute emergency phrases, without scoring the whole query
+        """
+        return self._emergency_pattern.search(query.lower()) is not None
+
+    def _localized_score(self, normalized: NormalizedQuery) -> int:
+        """Score for health keywords in the query's own language, from the locale catalog"""
+        if normalized.language == 'en':
+            return 0
+        return sum(2 for key in LOCALIZED_HEALTH_KEYS
+                   if catalog.matches(key, normalized.text, normalized.language))
+
     def _calculate_keyword_score(self, text: str, keywords: List[str]) -> int:
         """Calculate score based on keyword matches"""
         score = 0
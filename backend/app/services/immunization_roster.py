@@ -0,0 +1,217 @@
+import codecs
+import csv
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from app.core.serialization import dumps
+from app.services.health_database import ReferenceDataCache, health_db
+
+# Children computed per vectorized step (and per streamed flush)
+ROSTER_BATCH_SIZE = 1000
+
+# Accepted column names, first match wins
+ID_COLUMNS = ('child_id', 'id')
+DOB_COLUMNS = ('dob', 'date_of_birth', 'birth_date')
+
+
+class RosterFormatError(ValueError):
+    """The roster header or format cannot be read at all."""
+
+
+class RosterReader:
+    """
+    Turns roster lines into {'child_id', 'dob'} rows. The format is taken from
+    the first line: JSON objects (JSONL) or a CSV header naming the columns.
+    A malformed line becomes a row with an 'error' instead of ending the roster.
+    """
+
+    def __init__(self):
+        self._format: Optional[str] = None
+        self._columns: Optional[Tuple[int, int]] = None
+        self._line_no = 0
+
+    def rows(self, lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+        for line in lines:
+            self._line_no += 1
+            line = line.strip().lstrip('﻿')
+            if not line:
+                continue
+            if self._format is None:
+                self._format = 'jsonl' if line.startswith('{') else 'csv'
+                if self._format == 'csv':
+                    self._columns = self._header(line)
+                    continue
+            yield self._jsonl_row(line) if self._format == 'jsonl' else self._csv_row(line)
+
+    @staticmethod
+    def _header(line: str) -> Tuple[int, int]:
+        header = [column.strip().lower() for column in next(csv.reader([line]))]
+        id_column = next((header.index(c) for c in ID_COLUMNS if c in header), None)
+        dob_column = next((header.index(c) for c in DOB_COLUMNS if c in header), None)
+        if id_column is None or dob_column is None:
+            raise RosterFormatError(f"CSV header needs one of {ID_COLUMNS} and one of {DOB_COLUMNS}")
+        return id_column, dob_column
+
+    def _csv_row(self, line: str) -> Dict[str, str]:
+        fields = next(csv.reader([line]))
+        id_column, dob_column = self._columns
+        if len(fields) <= max(id_column, dob_column):
+            return {'child_id': f'line {self._line_no}', 'error': 'missing columns'}
+        return {'child_id': fields[id_column].strip(), 'dob': fields[dob_column].strip()}
+
+    def _jsonl_row(self, line: str) -> Dict[str, str]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return {'child_id': f'line {self._line_no}', 'error': 'invalid JSON'}
+        child_id = next((record[c] for c in ID_COLUMNS if c in record), None) if isinstance(record, dict) else None
+        dob = next((record[c] for c in DOB_COLUMNS if c in record), None) if isinstance(record, dict) else None
+        if child_id is None or dob is None:
+            return {'child_id': str(child_id or f'line {self._line_no}'), 'error': 'missing child_id or dob'}
+        return {'child_id': str(child_id), 'dob': str(dob)}
+
+
+@dataclass
+class _ScheduleArrays:
+    vaccines: List[str]
+    doses: List[str]
+    min_days: np.ndarray                  # (doses,) ordered by min_days
+    max_days: np.ndarray
+
+
+class ImmunizationRoster:
+    """
+    Due and overdue doses for a whole roster of children, against the dose
+    windows derived from the vaccination schedule. Each batch is a few NumPy
+    operations over a (children x doses) grid of ages in datetime64[D];
+    results are produced batch by batch so they can be streamed.
+
+    Overdue means the dose's window has passed: the roster carries no record of
+    doses given, so the worker checks those against the child's card.
+    """
+
+    def __init__(self, db=None, max_rows: Optional[int] = None, batch_size: int = ROSTER_BATCH_SIZE):
+        self.db = db or health_db
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self._schedules = ReferenceDataCache(self.db, self._build_schedule)
+
+    def compute(self, rows: List[Dict[str, str]], language: str = 'en',
+                as_of: Optional[date] = None) -> List[Dict[str, Any]]:
+        """One result per roster row, in order: due, overdue and next doses, or an error."""
+        schedule = self._schedules.get(language)
+        as_of = np.datetime64(as_of or date.today(), 'D')
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        valid, births = [], []
+        for position, row in enumerate(rows):
+            if 'error' in row:
+                results[position] = row
+                continue
+            # Not np.datetime64: it takes '2020', 'today', '-5' and '' as dates
+            try:
+                birth = np.datetime64(date.fromisoformat(row['dob']), 'D')
+            except (TypeError, ValueError):
+                results[position] = {'child_id': row['child_id'], 'error': f"invalid dob {row['dob']!r}"}
+                continue
+            if birth > as_of:
+                results[position] = {'child_id': row['child_id'], 'error': 'dob is after the as-of date'}
+                continue
+            valid.append(position)
+            births.append(birth)
+        if not valid:
+            return results
+
+        dob = np.array(births, dtype='datetime64[D]')
+        age = (as_of - dob).astype(np.int64)[:, None]
+        due = (age >= schedule.min_days) & (age <= schedule.max_days)
+        overdue = age > schedule.max_days
+        upcoming = age < schedule.min_days
+        # Windows are sorted by start, so the first upcoming dose is the next one;
+        # a language without dose windows has none (argmax needs at least one column)
+        if schedule.doses:
+            next_dose = np.where(upcoming.any(axis=1), upcoming.argmax(axis=1), -1)
+        else:
+            next_dose = np.full(len(valid), -1)
+        opens = np.datetime_as_string(dob[:, None] + schedule.min_days.astype('timedelta64[D]'))
+        closes = np.datetime_as_string(dob[:, None] + schedule.max_days.astype('timedelta64[D]'))
+
+        for child, position in enumerate(valid):
+            results[position] = {
+                'child_id': rows[position]['child_id'],
+                'dob': str(dob[child]),
+                'age_days': int(age[child, 0]),
+                'due': [self._dose(schedule, d, opens[child, d], closes[child, d])
+                        for d in np.flatnonzero(due[child])],
+                'overdue': [self._dose(schedule, d, opens[child, d], closes[child, d])
+                            for d in np.flatnonzero(overdue[child])],
+                'next': (self._dose(schedule, next_dose[child], opens[child, next_dose[child]],
+                                    closes[child, next_dose[child]]) if next_dose[child] >= 0 else None),
+            }
+        return results
+
+    @staticmethod
+    def _dose(schedule: _ScheduleArrays, dose: int, opens: str, closes: str) -> Dict[str, str]:
+        return {'vaccine': schedule.vaccines[dose], 'dose': schedule.doses[dose], 'from': opens, 'until': closes}
+
+    def stream(self, lines: Iterable[str], language: str = 'en',
+               as_of: Optional[date] = None) -> Iterator[bytes]:
+        """NDJSON results for roster lines, one batch at a time, reading the roster as it goes."""
+        batch = []
+        for row in RosterReader().rows(lines):
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                yield self._lines(batch, language, as_of)
+                batch = []
+        if batch:
+            yield self._lines(batch, language, as_of)
+
+    def results(self, rows: List[Dict[str, str]], language: str = 'en',
+                as_of: Optional[date] = None) -> Iterator[bytes]:
+        """NDJSON results for rows already read, one batch at a time."""
+        for start in range(0, len(rows), self.batch_size):
+            yield self._lines(rows[start:start + self.batch_size], language, as_of)
+
+    async def read_rows(self, chunks: AsyncIterable[bytes]) -> List[Dict[str, str]]:
+        """
+        Rows of a roster arriving as a byte stream (a request body), parsed as it
+        arrives. Reading stops one row past max_rows, so the caller can reject it.
+        """
+        reader, rows = RosterReader(), []
+        async for lines in _lines_from_chunks(chunks):
+            rows.extend(reader.rows(lines))
+            if self.max_rows is not None and len(rows) > self.max_rows:
+                break
+        return rows
+
+    def _lines(self, batch: List[Dict[str, str]], language: str, as_of: Optional[date]) -> bytes:
+        return b''.join(dumps(result) + b'\n' for result in self.compute(batch, language, as_of))
+
+    def _build_schedule(self, language: str) -> _ScheduleArrays:
+        """Dose windows for the language as arrays."""
+        doses = self.db.get_vaccination_doses_rows(language)
+        return _ScheduleArrays(
+            vaccines=[dose['vaccine_name'] for dose in doses],
+            doses=[dose['dose'] for dose in doses],
+            min_days=np.array([dose['min_age_days'] for dose in doses], dtype=np.int64),
+            max_days=np.array([dose['max_age_days'] for dose in doses], dtype=np.int64),
+        )
+
+
+async def _lines_from_chunks(chunks: AsyncIterable[bytes]) -> AsyncIterator[List[str]]:
+    """Complete text lines from a byte stream, a list per chunk; UTF-8 split across chunks is kept whole."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        if lines:
+            yield lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield [pending]
+
+# Global instance
+immunization_roster = ImmunizationRoster(max_rows=int(os.getenv("ROSTER_MAX_ROWS", "20000")))
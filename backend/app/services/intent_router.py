@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from app.services.answer_engine import DISEASE_FIELDS, tokenize
+from app.services.emergency import emergency_fast_path
+from app.services.localization import catalog
+from app.services.normalization import query_normalizer
+
+INTENTS = ('emergency', 'first_aid', 'vaccination', 'disease', 'general')
+
+# Gemini max_output_tokens per intent: steps and schedules need room, emergencies must stay short
+GENERATION_BUDGETS = {
+    'emergency': 300,
+    'first_aid': 500,
+    'vaccination': 700,
+    'disease': 600,
+    'general': 450,
+}
+
+# ResponseFormatter content types
+CONTENT_TYPES = {
+    'emergency': 'emergency',
+    'first_aid': 'first_aid',
+    'vaccination': 'vaccination',
+    'disease': 'disease_info',
+    'general': 'general',
+}
+
+@dataclass(frozen=True)
+class QueryIntent:
+    """What a query asks for, worked out once and passed through the whole pipeline."""
+    intent: str
+    language: str
+    is_emergency: bool = False
+    disease_fields: Tuple[str, ...] = ()
+
+    @property
+    def max_output_tokens(self) -> int:
+        return GENERATION_BUDGETS[self.intent]
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.intent]
+
+    @property
+    def uses_reference_data(self) -> bool:
+        """True when the disease/vaccination tables can answer or ground the query."""
+        return self.intent in ('vaccination', 'disease')
+
+
+class IntentRouter:
+    """Single classifier for query intent and language; precedence follows INTENTS."""
+
+    def route(self, query: str, language: Optional[str] = None) -> QueryIntent:
+        # Script and romanized spellings decide the language, not just the client's setting
+        normalized = query_normalizer.normalize(query, language)
+        query, language = normalized.text, normalized.language
+        tokens = set(tokenize(query))
+        stems_language = catalog.resolve(language)
+        fields = tuple(
+            field for field in DISEASE_FIELDS
+            if self._has_stem(tokens, catalog.prefixes(field, stems_language))
+        )
+
+        is_emergency = emergency_fast_path.detect(query, language)
+        if is_emergency:
+            intent = 'emergency'
+        elif self._has_phrase(query, 'first_aid', language):
+            intent = 'first_aid'
+        elif self._has_stem(tokens, catalog.prefixes('vaccine', language) + catalog.prefixes('vaccine', 'en')):
+            intent = 'vaccination'
+        elif fields or self._has_phrase(query, 'disease', language):
+            intent = 'disease'
+        else:
+            intent = 'general'
+        return QueryIntent(intent=intent, language=language, is_emergency=is_emergency, disease_fields=fields)
+
+    @staticmethod
+    def _has_phrase(text: str, key: str, language: str) -> bool:
+        """Catalog phrase match in the query's language or English."""
+        return catalog.matches(key, text, language) or (language != 'en' and catalog.matches(key, text, 'en'))
+
+    @staticmethod
+    def _has_stem(tokens, stems) -> bool:
+        return bool(stems) and any(token.startswith(stems) for token in tokens)
+
+# Global instance
+intent_router = IntentRouter()
@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, FrozenSet, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'locales')
+
+# A word character as answer_engine.tokenize sees it. \b is no use here: Indic vowel
+# signs are not \w, so a word ending in one would never end on a boundary
+_TOKEN_CHAR = r'[^\s,.;:!?।()"\'/-]'
+
+
+class LocaleCatalog:
+    """
+    Localized messages and keyword lists, loaded once from data/locales/<language>.json.
+    Keyword lists are compiled up front into whole-word phrase matchers, prefix
+    tuples and sets, so request handling only does lookups. Adding a language is
+    adding a file.
+    """
+
+    def __init__(self, locales_dir: str = LOCALES_DIR, default_language: str = 'en'):
+        self.default_language = default_language
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._keywords: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self._prefixes: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self._matchers: Dict[Tuple[str, str], Pattern] = {}
+        self._transliterations: Dict[str, Dict[str, str]] = {}
+        self._romanized: Dict[str, Dict[str, str]] = {}
+        self._synonyms: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._load(locales_dir)
+
+    def _load(self, locales_dir: str):
+        for filename in sorted(os.listdir(locales_dir)):
+            language, ext = os.path.splitext(filename)
+            if ext != '.json':
+                continue
+            with open(os.path.join(locales_dir, filename), encoding='utf-8') as f:
+                data = json.load(f)
+            self._messages[language] = data.get('messages', {})
+            for key, words in data.get('keywords', {}).items():
+                words = [w.lower() for w in words if w]
+                if not words:
+                    continue
+                self._keywords[(language, key)] = frozenset(words)
+                self._prefixes[(language, key)] = tuple(words)
+                # Whole words only ('বিষ' is not in 'বিষয়ে', 'burn' not in 'heartburn');
+                # longest first, so the alternation reports the most specific phrase
+                self._matchers[(language, key)] = re.compile(
+                    f'(?<!{_TOKEN_CHAR})(?:'
+                    + '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+                    + f')(?!{_TOKEN_CHAR})'
+                )
+            # Romanized spellings -> native words; loanwords only count once a query is known to be romanized
+            transliterations = self._invert(data.get('transliterations', {}))
+            if transliterations:
+                self._transliterations[language] = transliterations
+                self._romanized[language] = {**self._invert(data.get('loanwords', {})), **transliterations}
+            self._synonyms[language] = {
+                term.lower(): tuple(v.lower() for v in variants) for term, variants in data.get('synonyms', {}).items()
+            }
+        if self.default_language not in self._messages:
+            raise ValueError(f"No {self.default_language}.json in {locales_dir}")
+        logger.info(f"Loaded locales: {', '.join(self.languages)}")
+
+    @staticmethod
+    def _invert(spellings: Dict[str, list]) -> Dict[str, str]:
+        return {variant.lower(): native for native, variants in spellings.items() for variant in variants}
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        return tuple(self._messages)
+
+    def supports(self, language: str) -> bool:
+        return language in self._messages
+
+    def resolve(self, language: Optional[str]) -> str:
+        """The language itself when it has a locale file, else the default."""
+        return language if language in self._messages else self.default_language
+
+    def text(self, key: str, language: Optional[str] = None) -> Any:
+        """Message for the language, falling back to the default language."""
+        messages = self._messages.get(language, {})
+        if key in messages:
+            return messages[key]
+        return self._messages[self.default_language][key]
+
+    def keywords(self, key: str, language: str) -> FrozenSet[str]:
+        """Keyword set for the language; empty when the locale has none."""
+        return self._keywords.get((language, key), frozenset())
+
+    def prefixes(self, key: str, language: str) -> Tuple[str, ...]:
+        """Keywords as a tuple for str.startswith stem matching."""
+        return self._prefixes.get((language, key), ())
+
+    def matches(self, key: str, text: str, language: str) -> bool:
+        """True when lowercased text contains one of the language's keyword phrases as whole words."""
+        matcher = self._matchers.get((language, key))
+        return matcher is not None and matcher.search(text.lower()) is not None
+
+    def transliterations(self, language: str) -> Dict[str, str]:
+        """Romanized spelling -> native word, for words that mark text as romanized."""
+        return self._transliterations.get(language, {})
+
+    def romanized(self, language: str) -> Dict[str, str]:
+        """Full romanized folding map: transliterations plus English loanwords."""
+        return self._romanized.get(language, {})
+
+    def synonyms(self, language: str) -> Dict[str, Tuple[str, ...]]:
+        """Catalog term -> colloquial terms users say for it ("diarrhea" -> "loose motion")."""
+        return self._synonyms.get(language, {})
+
+# Global instance
+catalog = LocaleCatalog()
@@ -0,0 +1,127 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from app.services.localization import LocaleCatalog, catalog
+
+# Indic Unicode blocks are 128 code points each, so a character's script is
+# one dict lookup on its code point shifted right by 7.
+SCRIPT_BLOCKS = {
+    0x0900 >> 7: 'devanagari',
+    0x0980 >> 7: 'bengali',
+    0x0A00 >> 7: 'gurmukhi',
+    0x0A80 >> 7: 'gujarati',
+    0x0B00 >> 7: 'oriya',
+    0x0B80 >> 7: 'tamil',
+    0x0C00 >> 7: 'telugu',
+    0x0C80 >> 7: 'kannada',
+    0x0D00 >> 7: 'malayalam',
+}
+
+# Languages written in each script; the first one is assumed when the
+# client's language is written in a different script
+SCRIPT_LANGUAGES = {
+    'latin': ('en',),
+    'devanagari': ('hi', 'mr'),
+    'bengali': ('bn', 'as'),
+    'gurmukhi': ('pa',),
+    'gujarati': ('gu',),
+    'oriya': ('or',),
+    'tamil': ('ta',),
+    'telugu': ('te',),
+    'kannada': ('kn',),
+    'malayalam': ('ml',),
+}
+
+# Dandas sit in the Devanagari block but end sentences in Bengali too
+_SHARED_PUNCTUATION = {'।', '॥'}
+
+# Zero-width spaces and soft hyphens pasted from chat apps; ZWJ/ZWNJ are kept
+# because they change how Indic conjuncts render
+_INVISIBLE = dict.fromkeys(map(ord, '\u200b\u2060\ufeff\u00ad'))
+
+_WHITESPACE = re.compile(r'\s+')
+_LATIN_WORD = re.compile(r'[a-z]+')
+
+
+def fold_text(text: str) -> str:
+    """NFC, case folding, invisible characters removed and whitespace collapsed."""
+    text = unicodedata.normalize('NFC', text).translate(_INVISIBLE).casefold()
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def detect_script(text: str) -> str:
+    """Script with the most letters in text; 'latin' when it has no Indic letters."""
+    counts: Dict[str, int] = {}
+    for char in text:
+        script = SCRIPT_BLOCKS.get(ord(char) >> 7)
+        if script is not None and char not in _SHARED_PUNCTUATION:
+            counts[script] = counts.get(script, 0) + 1
+    return max(counts, key=counts.get) if counts else 'latin'
+
+
+def detect_language(text: str, default: str = 'en') -> str:
+    """Language from the dominant Indic script, else default."""
+    script = detect_script(text)
+    return default if script == 'latin' else SCRIPT_LANGUAGES[script][0]
+
+
+@dataclass(frozen=True)
+class NormalizedQuery:
+    """A query after NFC, case folding and transliteration, with the language it is written in."""
+    text: str
+    language: str
+    script: str
+    transliterated: bool = False
+
+    @property
+    def cache_key(self) -> Tuple[str, str]:
+        return (self.language, self.text)
+
+
+class QueryNormalizer:
+    """
+    Normalization shared by the health filter, search and cache keys:
+    Unicode NFC, case folding, script detection by code point, and folding of
+    romanized spellings ("bukhar", "bukhaar") onto the native words in the
+    locale data. Text in an Indic script overrides a client language written
+    in another script; romanized Hindi is routed to Hindi unless the client
+    asked for a language other than English.
+    """
+
+    def __init__(self, locales: LocaleCatalog = catalog, cache_size: int = 4096):
+        self.locales = locales
+        # Chat traffic repeats itself; a hit skips the per-character scan
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _normalize(self, query: str, language: Optional[str] = None) -> NormalizedQuery:
+        text = fold_text(query)
+        script = detect_script(text)
+        if script != 'latin':
+            languages = SCRIPT_LANGUAGES[script]
+            return NormalizedQuery(text, language if language in languages else languages[0], script)
+
+        romanized_language = self._romanized_language(text)
+        if romanized_language is not None and language in (None, 'en', romanized_language):
+            mapping = self.locales.romanized(romanized_language)
+            folded = _LATIN_WORD.sub(lambda m: mapping.get(m.group(), m.group()), text)
+            return NormalizedQuery(folded, romanized_language, script, transliterated=True)
+        return NormalizedQuery(text, language or 'en', script)
+
+    def _romanized_language(self, text: str) -> Optional[str]:
+        """Language whose romanized spellings make up the text, if any."""
+        words = _LATIN_WORD.findall(text)
+        best, best_hits = None, 0
+        for language in self.locales.languages:
+            spellings = self.locales.transliterations(language)
+            if not spellings:
+                continue
+            hits = sum(1 for word in words if word in spellings)
+            # Two native words, or half a short query, rule out a stray English match
+            if (hits >= 2 or hits * 2 >= len(words) > 0) and hits > best_hits:
+                best, best_hits = language, hits
+        return best
+
+# Global instance
+query_normalizer = QueryNormalizer()
@@ -0,0 +1,241 @@
+import logging
+import math
+import os
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from app.core.rate_limit import estimate_tokens
+from app.services.answer_engine import tokenize
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import fold_text, query_normalizer
+
+logger = logging.getLogger(__name__)
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Hashed character n-gram embeddings: dimension, and the cosine below which a
+# chunk with no shared word is not considered related at all
+EMBEDDING_DIM = 256
+DENSE_MIN_SIMILARITY = 0.2
+
+# Chunks scoring under this share of the best chunk only pad the prompt
+MIN_RELATIVE_SCORE = 0.5
+
+# Disease fields split into separate chunks
+CHUNK_FIELDS = ('symptoms', 'prevention', 'treatment')
+
+
+def _feature_ids(text: str) -> Tuple[List[int], List[float]]:
+    """Hashed word and character-trigram features of text, with their signs."""
+    ids, signs = [], []
+    for word in tokenize(fold_text(text)):
+        padded = f' {word} '
+        features = [f'w:{word}'] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            # crc32 is stable across processes, unlike hash(), so the .npy matrix stays valid
+            h = zlib.crc32(feature.encode('utf-8'))
+            ids.append(h % EMBEDDING_DIM)
+            signs.append(1.0 if h & 0x80000000 else -1.0)
+    return ids, signs
+
+
+def embed(text: str, idf: Optional[np.ndarray] = None) -> np.ndarray:
+    """Unit-length float32 vector of hashed n-gram counts, optionally IDF-weighted."""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    ids, signs = _feature_ids(text)
+    if ids:
+        np.add.at(vector, ids, signs)
+        if idf is not None:
+            vector *= idf
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+    return vector
+
+
+def _idf(vectors: np.ndarray) -> np.ndarray:
+    """Smoothed inverse document frequency of each hashed feature over the chunk vectors."""
+    df = np.count_nonzero(vectors, axis=0)
+    return (np.log((len(vectors) + 1) / (df + 1)) + 1).astype(np.float32)
+
+
+def _label(field: str, language: str) -> str:
+    """Localized field name from the answer section headers ("🔍 **लक्षण**" -> "लक्षण")."""
+    header = catalog.text('section_headers', language)[field]
+    return header.split('**')[1] if header.count('**') == 2 else header
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A self-contained piece of reference content, as it is put into a prompt."""
+    source: str     # 'disease' or 'vaccination'
+    title: str
+    text: str
+    tokens: int
+
+
+@dataclass
+class _RetrievalIndex:
+    chunks: List[Chunk]
+    postings: Dict[str, Tuple[np.ndarray, np.ndarray]]   # term -> (chunk ids, BM25 weights)
+    vectors: np.ndarray                                  # (chunks, EMBEDDING_DIM), memory-mapped
+    idf: np.ndarray                                      # feature weights the vectors were built with
+    source_masks: Dict[str, np.ndarray]                  # source -> which chunks come from it
+    stopwords: Set[str]
+
+
+class RetrievalEngine:
+    """
+    Hybrid retrieval over chunked disease and vaccination content, used to
+    ground Gemini prompts. Each query is scored by BM25 over the chunk words
+    (with locale synonyms folded in) plus the cosine of hashed n-gram vectors,
+    which still relates inflected and misspelled words. The vector matrix is
+    written once per data version as a .npy file and memory-mapped, so worker
+    processes share the pages and restarts skip recomputing it.
+    """
+
+    def __init__(self, index_dir: str, db=None, dense_weight: float = 0.4, top_k: int = 4, token_budget: int = 400):
+        self.index_dir = index_dir
+        self.db = db or health_db
+        self.dense_weight = dense_weight
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def retrieve(self, query: str, language: str = 'en', k: Optional[int] = None,
+                 token_budget: Optional[int] = None, sources: Optional[Sequence[str]] = None) -> List[Chunk]:
+        """The k best chunks for the query whose estimated tokens fit in token_budget, best first."""
+        k = k or self.top_k
+        token_budget = token_budget or self.token_budget
+        normalized = query_normalizer.normalize(query, language)
+        index = self._indexes.get(normalized.language)
+        if not normalized.text or not index.chunks:
+            return []
+
+        lexical = np.zeros(len(index.chunks), dtype=np.float32)
+        for term in set(tokenize(normalized.text)) - index.stopwords:
+            postings = index.postings.get(term)
+            if postings is not None:
+                lexical[postings[0]] += postings[1]
+        dense = index.vectors @ embed(normalized.text, index.idf)
+        peak = lexical.max()
+        if peak > 0:
+            lexical /= peak
+        scores = (1 - self.dense_weight) * lexical + self.dense_weight * np.clip(dense, 0, None)
+        related = (lexical > 0) | (dense >= DENSE_MIN_SIMILARITY)
+        if sources is not None:
+            related &= np.logical_or.reduce([index.source_masks.get(source, False) for source in sources])
+
+        candidates = np.flatnonzero(related)
+        if not len(candidates):
+            return []
+        candidates = candidates[scores[candidates] >= MIN_RELATIVE_SCORE * scores[candidates].max()]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        selected, used = [], 0
+        for chunk_id in ranked:
+            chunk = index.chunks[chunk_id]
+            # A long chunk is skipped rather than ending the list, so shorter relevant ones still fit
+            if used + chunk.tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk.tokens
+            if len(selected) == k:
+                break
+        return selected
+
+    def _chunks(self, language: str) -> List[Chunk]:
+        chunks = []
+        for row in self.db.search_diseases_rows('', language):
+            for field in CHUNK_FIELDS:
+                if row[field]:
+                    # The localized label lets "symptoms of ..." in any language rank this field's chunk
+                    text = f"{row['name']}: {_label(field, language)} - {row[field]}."
+                    chunks.append(Chunk('disease', row['name'], text, estimate_tokens(text)))
+        for row in self.db.get_vaccination_schedule_rows(language=language):
+            text = f"{row['vaccine_name']} ({row['age_group']}): {row['schedule']}. {row['description']}."
+            if row['side_effects']:
+                text += f" Side effects - {row['side_effects']}."
+            chunks.append(Chunk('vaccination', row['vaccine_name'], text, estimate_tokens(text)))
+        return chunks
+
+    def _build(self, language: str) -> _RetrievalIndex:
+        # The vector file is named after the version the chunks are read at
+        data_version = self.db.data_version
+        chunks = self._chunks(language)
+        synonyms = [(fold_text(term), [t for v in variants for t in tokenize(v)])
+                    for term, variants in catalog.synonyms(language).items()]
+
+        documents = []
+        for chunk in chunks:
+            text = fold_text(chunk.text)
+            terms = tokenize(text)
+            # "loose motion" should find the diarrhea chunks, as in disease search
+            for term, variant_tokens in synonyms:
+                if term in text:
+                    terms.extend(variant_tokens)
+            documents.append(Counter(terms))
+
+        average_length = sum(sum(d.values()) for d in documents) / len(documents) if documents else 0
+        term_postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for chunk_id, counts in enumerate(documents):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / average_length)
+            for term, tf in counts.items():
+                term_postings[term].append((chunk_id, tf * (BM25_K1 + 1) / (tf + norm)))
+        postings = {}
+        for term, entries in term_postings.items():
+            idf = math.log(1 + (len(documents) - len(entries) + 0.5) / (len(entries) + 0.5))
+            ids, weights = zip(*entries)
+            postings[term] = (np.array(ids, dtype=np.int32), np.array(weights, dtype=np.float32) * idf)
+
+        vectors, idf = self._load_vectors(data_version, language, chunks)
+        return _RetrievalIndex(chunks=chunks, postings=postings, vectors=vectors, idf=idf,
+                               source_masks={source: np.array([chunk.source == source for chunk in chunks])
+                                             for source in ('disease', 'vaccination')},
+                               stopwords=set(catalog.keywords('filler', language)) | set(catalog.keywords('filler', 'en')))
+
+    def _load_vectors(self, data_version: str, language: str,
+                      chunks: List[Chunk]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Chunk vectors memory-mapped from <index_dir>, written first if this
+        version has none, and the IDF weights (recomputed from which features
+        are non-zero, so they need no file of their own).
+        """
+        path = os.path.join(self.index_dir, f"chunks-{data_version}-{language}-{EMBEDDING_DIM}.npy")
+        try:
+            vectors = np.load(path, mmap_mode='r')
+            if vectors.shape == (len(chunks), EMBEDDING_DIM):
+                return vectors, _idf(vectors)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading retrieval vectors {path}: {e}")
+
+        idf = _idf(np.array([embed(chunk.text) for chunk in chunks], dtype=np.float32).reshape(-1, EMBEDDING_DIM))
+        matrix = np.array([embed(chunk.text, idf) for chunk in chunks], dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        if not chunks:
+            return matrix, idf
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            # Written under a per-process name and renamed, so concurrent workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, matrix)
+            os.replace(tmp_path, path)
+            logger.info(f"Wrote retrieval vectors {path}")
+            return np.load(path, mmap_mode='r'), idf
+        except OSError as e:
+            logger.error(f"Error writing retrieval vectors {path}: {e}")
+            return matrix, idf
+
+# Global instance
+retrieval_engine = RetrievalEngine(
+    os.getenv('RETRIEVAL_INDEX_DIR', 'retrieval_index'),
+    dense_weight=float(os.getenv('RETRIEVAL_DENSE_WEIGHT', 0.4)),
+    top_k=int(os.getenv('RETRIEVAL_TOP_K', 4)),
+    token_budget=int(os.getenv('RETRIEVAL_TOKEN_BUDGET', 400)),
+)
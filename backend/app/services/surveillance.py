@@ -0,0 +1,302 @@
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from app.services.answer_engine import tokenize
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import fold_text
+from app.services.symptom_checker import symptom_checker
+
+# A negation only covers its own clause: "headache, no cough"
+_CLAUSE_SEPARATORS = re.compile(r'[,;.!?।\n]')
+
+# Region recorded when the client sends none; every mention also counts towards ALL_REGIONS,
+# and message totals towards ALL_LANGUAGES
+UNKNOWN_REGION = 'unknown'
+ALL_REGIONS = '*'
+ALL_LANGUAGES = '*'
+
+
+_REGION_PUNCTUATION = frozenset(" .'-")
+
+
+def valid_region(region: str) -> bool:
+    """Whether region looks like a district or state name: letters of any script, digits, spaces and . ' -"""
+    return 0 < len(region) <= 64 and all(
+        char.isalnum() or char in _REGION_PUNCTUATION or unicodedata.category(char).startswith('M')
+        for char in region
+    )
+
+
+def normalize_region(region: Optional[str]) -> str:
+    """Region key for a client-supplied region (district or state name); anything else is UNKNOWN_REGION."""
+    # WebSocket frames are not validated, so the region may not even be a string
+    region = fold_text(str(region or ''))[:64]
+    return region if valid_region(region) else UNKNOWN_REGION
+
+
+@lru_cache(maxsize=8192)
+def _sketch_cells(key: str, width: int, depth: int) -> Tuple[int, ...]:
+    """Double hashing over two CRC32s; the same few thousand keys recur in every message."""
+    data = key.encode('utf-8')
+    first, second = zlib.crc32(data), zlib.crc32(data, 0x9E3779B9) | 1
+    return tuple(row * width + (first + row * second) % width for row in range(depth))
+
+
+class CountMinSketch:
+    """
+    Approximate counts in a fixed depth x width table. Estimates never
+    undercount; they overcount by at most e/width of the total with
+    probability 1 - exp(-depth). The table is a flat array of ints: a message
+    touches a handful of cells, too few for NumPy calls to pay off.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = array('i', bytes(4 * width * depth))
+
+    def cells(self, key: str) -> Tuple[int, ...]:
+        """Table positions of the key, one per row."""
+        return _sketch_cells(key, self.width, self.depth)
+
+    def add(self, cells: Tuple[int, ...], count: int = 1):
+        table = self.table
+        for cell in cells:
+            table[cell] += count
+
+    def estimate(self, cells: Tuple[int, ...]) -> int:
+        table = self.table
+        return min(table[cell] for cell in cells)
+
+    def clear(self):
+        self.table = array('i', bytes(4 * self.width * self.depth))
+
+
+class SpaceSaving:
+    """Heavy-hitter candidates: at most capacity keys, the smallest replaced when full."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, key: str, count: int = 1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + count
+            return
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(smallest) + count
+
+    def clear(self):
+        self.counts.clear()
+
+
+@dataclass
+class _Bucket:
+    index: int = -1                       # bucket number (time // bucket_seconds) held in this slot
+    sketch: CountMinSketch = None
+    candidates: SpaceSaving = None
+
+
+@dataclass
+class _Vocabulary:
+    terms: Dict[str, Tuple[str, str]]     # tokenized phrase -> (kind, display term)
+    starts: Dict[str, int]                # first word of a phrase -> longest phrase it starts, in words
+    negations: FrozenSet[str]
+
+
+class SymptomSurveillance:
+    """
+    Sliding-window counts of the symptoms and diseases people mention in chat,
+    per region and language, fed inline from the chat pipeline. Time is split
+    into buckets held in a ring; each has a count-min sketch (all counts) and a
+    Space-Saving summary (which keys may be frequent), so memory is fixed
+    however many regions and terms appear, and old buckets are simply reused.
+
+    A spike is a term whose share of recent messages in a region is well above
+    its share in the earlier buckets of the window, scored as
+    (recent - expected) / sqrt(expected + 1).
+    Counts are process-local, like the metrics counters.
+    """
+
+    def __init__(self, db=None, bucket_seconds: int = 3600, buckets: int = 72,
+                 width: int = 2048, depth: int = 4, capacity: int = 256,
+                 clock: Callable[[], float] = time.time):
+        self.db = db or health_db
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._buckets = [
+            _Bucket(sketch=CountMinSketch(width, depth), candidates=SpaceSaving(capacity))
+            for _ in range(buckets)
+        ]
+        self._vocabularies = ReferenceDataCache(self.db, self._build_vocabulary)
+        self._lock = threading.Lock()
+
+    @property
+    def window_hours(self) -> float:
+        """Longest window a report can cover: every bucket in the ring."""
+        return len(self._buckets) * self.bucket_seconds / 3600
+
+    def mentions(self, text: str, language: str = 'en') -> List[Tuple[str, str]]:
+        """(kind, term) for each symptom or disease named in the text, skipping negated ones."""
+        vocabulary = self._vocabularies.get(language)
+        found = []
+        for clause in _CLAUSE_SEPARATORS.split(fold_text(text)):
+            tokens = tokenize(clause)
+            position = 0
+            while position < len(tokens):
+                longest = vocabulary.starts.get(tokens[position])
+                if longest is None:
+                    position += 1
+                    continue
+                for length in range(min(longest, len(tokens) - position), 0, -1):
+                    match = vocabulary.terms.get(' '.join(tokens[position:position + length]))
+                    if match is None:
+                        continue
+                    # "no fever", "बुखार नहीं": the negation comes before or after depending on the language
+                    before = tokens[position - 1] if position else ''
+                    after = tokens[position + length] if position + length < len(tokens) else ''
+                    if before not in vocabulary.negations and after not in vocabulary.negations:
+                        found.append(match)
+                    position += length - 1
+                    break
+                position += 1
+        return list(dict.fromkeys(found))
+
+    def observe(self, text: str, language: str = 'en', region: Optional[str] = None) -> int:
+        """Counts one chat message and the terms it mentions; returns how many terms."""
+        found = self.mentions(text, language)
+        region = normalize_region(region)
+        with self._lock:
+            bucket = self._current_bucket()
+            for scope in (region, ALL_REGIONS):
+                self._add(bucket, self._key('messages', '', scope, language))
+                self._add(bucket, self._key('messages', '', scope, ALL_LANGUAGES))
+                for kind, term in found:
+                    key = self._key(kind, term, scope, language)
+                    self._add(bucket, key)
+                    bucket.candidates.add(key)
+        return len(found)
+
+    def report(self, region: Optional[str] = None, language: Optional[str] = None,
+               hours: float = 24, recent_hours: float = 3, limit: int = 20,
+               min_count: int = 5, min_score: float = 3.0) -> Dict[str, Any]:
+        """Most mentioned terms over the last hours, and terms spiking over the last recent_hours."""
+        # Longer windows hold nothing more, and inf would overflow the bucket arithmetic
+        hours, recent_hours = min(hours, self.window_hours), min(recent_hours, self.window_hours)
+        scope = normalize_region(region) if region else ALL_REGIONS
+        recent_buckets = max(1, math.ceil(recent_hours * 3600 / self.bucket_seconds))
+        with self._lock:
+            window = self._window(hours)
+            keys = {key for _, bucket in window for key in bucket.candidates.counts
+                    if self._in_scope(key, scope, language)}
+        buckets = [bucket for _, bucket in window]
+        recent = [bucket for age, bucket in window if age < recent_buckets]
+        baseline = [bucket for age, bucket in window if age >= recent_buckets]
+
+        top, spikes = [], []
+        for key in keys:
+            kind, term, _, key_language = key.split('|', 3)
+            entry = {'kind': kind, 'term': term, 'language': key_language}
+            top.append({**entry, 'count': self._count(buckets, key)})
+
+            recent_count = self._count(recent, key)
+            baseline_messages = self._count(baseline, self._key('messages', '', scope, key_language))
+            if recent_count < min_count or not baseline_messages:
+                continue
+            recent_messages = self._count(recent, self._key('messages', '', scope, key_language))
+            expected = self._count(baseline, key) * recent_messages / baseline_messages
+            score = (recent_count - expected) / math.sqrt(expected + 1)
+            if score >= min_score:
+                spikes.append({**entry, 'recent': recent_count, 'expected': round(expected, 2),
+                               'score': round(score, 2)})
+
+        top.sort(key=lambda item: (-item['count'], item['kind'], item['term']))
+        spikes.sort(key=lambda item: (-item['score'], item['term']))
+        return {
+            'region': scope if region else None,
+            'language': language,
+            'hours': hours,
+            'recent_hours': recent_buckets * self.bucket_seconds / 3600,
+            'messages': self._count(buckets, self._key('messages', '', scope, language or ALL_LANGUAGES)),
+            'top': top[:limit],
+            'spikes': spikes[:limit],
+        }
+
+    @staticmethod
+    def _key(kind: str, term: str, region: str, language: str) -> str:
+        return f"{kind}|{term.replace('|', '/')}|{region}|{language}"
+
+    @staticmethod
+    def _in_scope(key: str, region: str, language: Optional[str]) -> bool:
+        _, _, key_region, key_language = key.split('|', 3)
+        return key_region == region and (language is None or key_language == language)
+
+    @staticmethod
+    def _add(bucket: _Bucket, key: str):
+        bucket.sketch.add(bucket.sketch.cells(key))
+
+    @staticmethod
+    def _count(buckets: List[_Bucket], key: str) -> int:
+        return sum(bucket.sketch.estimate(bucket.sketch.cells(key)) for bucket in buckets)
+
+    def _current_bucket(self) -> _Bucket:
+        index = int(self.clock() // self.bucket_seconds)
+        bucket = self._buckets[index % len(self._buckets)]
+        if bucket.index != index:
+            # The slot last held a bucket a whole ring ago (or never); start it afresh
+            bucket.index = index
+            bucket.sketch.clear()
+            bucket.candidates.clear()
+        return bucket
+
+    def _window(self, hours: float) -> List[Tuple[int, _Bucket]]:
+        """(age in buckets, bucket) for buckets within the last hours that hold data, newest first."""
+        current = int(self.clock() // self.bucket_seconds)
+        span = min(len(self._buckets), max(1, math.ceil(hours * 3600 / self.bucket_seconds)))
+        window = []
+        for age in range(span):
+            bucket = self._buckets[(current - age) % len(self._buckets)]
+            if bucket.index == current - age:
+                window.append((age, bucket))
+        return window
+
+    def _build_vocabulary(self, language: str) -> _Vocabulary:
+        """Symptom and disease phrases for the language."""
+        terms = {}
+        diseases = [row['name'] for row in self.db.search_diseases_rows('', language)]
+        symptoms = [symptom['symptom'] for symptom in symptom_checker.picklist(language)]
+        for name in diseases:
+            terms[' '.join(tokenize(fold_text(name)))] = ('disease', name)
+        for symptom in symptoms:
+            terms.setdefault(' '.join(tokenize(symptom)), ('symptom', symptom))
+        # Colloquial names count towards the disease or symptom they stand for ("sugar" -> diabetes);
+        # conditions with no table row yet (malaria, dengue) are still counted, under their own name
+        for term, variants in catalog.synonyms(language).items():
+            folded = fold_text(term)
+            name = next((name for name in diseases if folded in fold_text(name)), None)
+            match = ('disease', name) if name else ('symptom', folded) if folded in symptoms else ('disease', folded)
+            for variant in (folded, *variants):
+                terms.setdefault(' '.join(tokenize(fold_text(variant))), match)
+        terms.pop('', None)
+        starts = {}
+        for phrase in terms:
+            words = phrase.split(' ')
+            starts[words[0]] = max(starts.get(words[0], 0), len(words))
+        negations = frozenset(catalog.keywords('negations', language) | catalog.keywords('negations', 'en'))
+        return _Vocabulary(terms=terms, starts=starts, negations=negations)
+
+
+# Global instance
+symptom_surveillance = SymptomSurveillance(
+    bucket_seconds=int(os.getenv('SURVEILLANCE_BUCKET_SECONDS', 3600)),
+    buckets=int(os.getenv('SURVEILLANCE_BUCKETS', 72)),
+)
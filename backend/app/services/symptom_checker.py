@@ -0,0 +1,136 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
+import numpy as np
+from app.services.health_database import ReferenceDataCache, health_db
+from app.services.localization import catalog
+from app.services.normalization import fold_text
+
+# Set bits per byte value, for counting the bits of packed rows
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+_SYMPTOM_SEPARATORS = re.compile(r'[,;।]')
+
+
+def normalize_symptom(text: str, language: str = 'en') -> Optional[str]:
+    """
+    Canonical picklist form of one symptom: folded, without leading qualifiers
+    ("mild fever" -> "fever"); None for negations like "often no symptoms".
+    """
+    qualifiers = catalog.keywords('symptom_qualifiers', language) | catalog.keywords('symptom_qualifiers', 'en')
+    negations = catalog.keywords('negations', language) | catalog.keywords('negations', 'en')
+    words = fold_text(text).strip(' .').split(' ')
+    if any(word in negations for word in words):
+        return None
+    while words and words[0] in qualifiers:
+        words.pop(0)
+    return ' '.join(words) or None
+
+
+@dataclass
+class _SymptomIndex:
+    diseases: List[Dict[str, Any]]        # name and severity per bitmap row
+    symptoms: List[str]                   # normalized symptom per bitmap column
+    labels: List[str]                     # display form per column
+    columns: Dict[str, int]
+    bitmap: np.ndarray                    # (symptoms, ceil(diseases / 8)): packed bitset of diseases per symptom
+    symptom_counts: np.ndarray            # symptoms per disease
+    disease_columns: List[FrozenSet[int]]
+
+
+class SymptomChecker:
+    """
+    Ranks diseases by the symptoms selected from a picklist, with no LLM call.
+    The free-text symptoms column is split and normalized once per data version
+    into a packed symptom x disease bitmap; a check only unpacks and adds the
+    bitsets of the selected symptoms, so results are deterministic and cost
+    a few vector operations even for large catalogs.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or health_db
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def picklist(self, language: str = 'en') -> List[Dict[str, Any]]:
+        """Known symptoms for the language, alphabetically, with how many diseases list each."""
+        index = self._indexes.get(language)
+        disease_counts = _POPCOUNT[index.bitmap].sum(axis=1, dtype=np.int32)
+        return [{'symptom': symptom, 'label': label, 'diseases': int(count)}
+                for symptom, label, count in zip(index.symptoms, index.labels, disease_counts)]
+
+    def check(self, symptoms: Sequence[str], language: str = 'en', limit: int = 10) -> Dict[str, Any]:
+        """
+        Diseases sharing at least one selected symptom, ranked by symptoms matched,
+        then by overlap (Jaccard) with the disease's own symptom list.
+        """
+        index = self._indexes.get(language)
+        selected, unrecognized = set(), []
+        for symptom in symptoms:
+            column = index.columns.get(normalize_symptom(symptom, language))
+            if column is None:
+                unrecognized.append(symptom)
+            else:
+                selected.add(column)
+        if not selected:
+            return {'results': [], 'unrecognized': unrecognized}
+
+        bitsets = index.bitmap[sorted(selected)]
+        matched = np.unpackbits(bitsets, axis=1, count=len(index.diseases)).sum(axis=0, dtype=np.int32)
+        candidates = np.flatnonzero(matched)
+        overlap = matched[candidates] / (index.symptom_counts[candidates] + len(selected) - matched[candidates])
+        # Matched count first; overlap is below 1, so it only orders diseases matching as many
+        key = matched[candidates] + 0.5 * overlap
+        if len(candidates) > limit:
+            # Everything tied with the limit-th key stays, so row order still decides ties
+            keep = key >= np.partition(key, len(key) - limit)[len(key) - limit]
+            candidates, overlap, key = candidates[keep], overlap[keep], key[keep]
+        # np.lexsort sorts by the last key first; row order breaks ties deterministically
+        order = np.lexsort((candidates, -key))[:limit]
+
+        results = []
+        for row, score in zip(candidates[order].tolist(), overlap[order].tolist()):
+            disease = index.diseases[row]
+            hits = sorted(selected & index.disease_columns[row])
+            results.append({
+                'name': disease['name'],
+                'severity': disease['severity'],
+                'matched_symptoms': [index.labels[column] for column in hits],
+                'matched': len(hits),
+                'disease_symptoms': int(index.symptom_counts[row]),
+                'score': round(score, 4),
+            })
+        return {'results': results, 'unrecognized': unrecognized}
+
+    def _build(self, language: str) -> _SymptomIndex:
+        rows = self.db.search_diseases_rows('', language)
+        labels: Dict[str, str] = {}
+        row_symptoms = []
+        for row in rows:
+            names = set()
+            for part in _SYMPTOM_SEPARATORS.split(row['symptoms'] or ''):
+                symptom = normalize_symptom(part, language)
+                if symptom:
+                    names.add(symptom)
+                    labels.setdefault(symptom, symptom[:1].upper() + symptom[1:])
+            row_symptoms.append(names)
+
+        symptoms = sorted(labels)
+        columns = {symptom: column for column, symptom in enumerate(symptoms)}
+        dense = np.zeros((len(rows), len(symptoms)), dtype=bool)
+        disease_columns = []
+        for position, names in enumerate(row_symptoms):
+            ids = frozenset(columns[name] for name in names)
+            dense[position, list(ids)] = True
+            disease_columns.append(ids)
+        return _SymptomIndex(
+            diseases=[{'name': row['name'], 'severity': row['severity']} for row in rows],
+            symptoms=symptoms,
+            labels=[labels[symptom] for symptom in symptoms],
+            columns=columns,
+            bitmap=np.packbits(dense.T, axis=1),
+            symptom_counts=dense.sum(axis=1, dtype=np.int32),
+            disease_columns=disease_columns,
+        )
+
+# Global instance
+symptom_checker = SymptomChecker()
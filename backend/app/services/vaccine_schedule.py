@@ -0,0 +1,50 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from app.services.health_database import ReferenceDataCache, health_db
+
+
+@dataclass
+class _IntervalIndex:
+    boundaries: List[int]                 # sorted ages (days) where the set of due doses changes
+    segments: List[List[Dict[str, Any]]]  # doses due from boundaries[i] up to boundaries[i + 1]
+
+
+class VaccineSchedule:
+    """
+    Vaccination doses due at a given age, from the dose windows derived at
+    import (vaccination_doses). The age axis is cut at every window start and
+    end, and the doses due in each piece are precomputed, so a lookup is one
+    binary search over the boundaries.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or health_db
+        self._indexes = ReferenceDataCache(self.db, self._build)
+
+    def due(self, age_days: int, language: str = 'en') -> List[Dict[str, Any]]:
+        """Dose rows whose window contains the age, earliest window first."""
+        index = self._indexes.get(language)
+        segment = bisect_right(index.boundaries, age_days) - 1
+        return list(index.segments[segment]) if segment >= 0 else []
+
+    def vaccinations_for_age(self, age_days: int, language: str = 'en') -> List[Dict[str, Any]]:
+        """Vaccination rows with a dose due at the age, once each."""
+        fields = ('vaccine_name', 'age_group', 'schedule', 'description', 'side_effects', 'language')
+        vaccinations = {}
+        for dose in self.due(age_days, language):
+            vaccinations.setdefault(dose['vaccine_name'], {field: dose[field] for field in fields})
+        return list(vaccinations.values())
+
+    def _build(self, language: str) -> _IntervalIndex:
+        doses = self.db.get_vaccination_doses_rows(language)
+        # Windows are inclusive, so a dose stops being due the day after max_age_days
+        boundaries = sorted({dose['min_age_days'] for dose in doses} | {dose['max_age_days'] + 1 for dose in doses})
+        segments = [
+            [dose for dose in doses if dose['min_age_days'] <= start <= dose['max_age_days']]
+            for start in boundaries
+        ]
+        return _IntervalIndex(boundaries=boundaries, segments=segments)
+
+# Global instance
+vaccine_schedule = VaccineSchedule()
@@ -0,0 +1,120 @@
+"""
+Recall and latency of disease search on real user phrasings.
+
+Compares, over the query sets in benchmarks/data/disease_queries.json
+(colloquial terms, Hinglish, Hindi and Bengali; and misspellings):
+  like   - the SQL LIKE substring search (HealthDatabase.search_diseases_rows)
+  index  - DiseaseSearch top k, with locale synonyms compiled into the index
+
+recall@k is the share of queries whose expected disease is in the top k.
+--rows adds synthetic diseases with made-up names, so latency (including the
+trigram lookup, whose cost grows with the vocabulary) can be checked on a
+larger catalog.
+
+Usage (from backend/):
+    python -m benchmarks.bench_disease_search --rows 20000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERY_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "disease_queries.json")
+
+FILLER_SYMPTOMS = ["mild fever", "cough", "rash", "itching", "joint pain", "fatigue", "swelling", "nausea",
+                   "back pain", "chills", "sneezing", "dry skin", "sore muscles", "loss of appetite"]
+SYLLABLES = ["ka", "ro", "mi", "ten", "su", "lo", "var", "phi", "dra", "nu", "sel", "tox", "bri", "qua", "zen", "ol"]
+
+
+def _made_up_name(rng) -> str:
+    """A distinct-looking disease name, so the vocabulary grows with the catalog."""
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(2))
+
+
+def _seed(db, diseases, rows: int):
+    rng = random.Random(42)
+    synthetic = [
+        (_made_up_name(rng), ", ".join(rng.sample(FILLER_SYMPTOMS, 4)), "wash hands, rest", "fluids", "Mild", "en")
+        for i in range(rows)
+    ]
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO diseases (name, symptoms, prevention, treatment, severity, language) VALUES (?, ?, ?, ?, ?, ?)",
+            [tuple(d) for d in diseases] + synthetic,
+        )
+        conn.commit()
+    db.refresh_data_version()
+
+
+def _run(search, queries, k: int, repeat: int):
+    """(recall@k, per-query latencies in microseconds, best of repeat)."""
+    hits = 0
+    latencies = []
+    for q in queries:
+        names = [row["name"] for row in search(q["query"], q["language"])[:k]]
+        hits += q["expected"] in names
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search(q["query"], q["language"])
+            best = min(best, time.perf_counter() - start)
+        latencies.append(best * 1e6)
+    return hits / len(queries), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=0, help="synthetic diseases added to the catalog")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--misses", action="store_true", help="list queries the index search misses")
+    args = parser.parse_args()
+
+    # The services module creates a global database in the working directory on import
+    workdir = tempfile.mkdtemp(prefix="bench-disease-search-")
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from app.services.disease_search import DiseaseSearch
+    from app.services.health_database import HealthDatabase
+
+    with open(QUERY_SET, encoding="utf-8") as f:
+        data = json.load(f)
+    db = HealthDatabase(os.path.join(workdir, "bench.db"))
+    _seed(db, data["diseases"], args.rows)
+    search = DiseaseSearch(db)
+
+    start = time.perf_counter()
+    query_sets = {"phrasings": data["queries"], "typos": data["typo_queries"]}
+    for language in {q["language"] for queries in query_sets.values() for q in queries} | {"hi"}:
+        search._indexes.get(language)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    en_index = search._indexes.get("en")
+    print(f"catalog: {len(en_index.rows)} en rows, {len(en_index.terms)} fuzzy terms; "
+          f"index build {build_ms:.1f} ms; best of {args.repeat}")
+    print(f"{'set':<11}{'search':<8}{'recall@' + str(args.k):>10}{'p50 us':>10}{'p95 us':>10}{'max us':>10}")
+    # The assistant asks for the top few; the LIKE search can only return everything
+    top_k = lambda query, language: search.search(query, language, limit=args.k)
+    for set_name, queries in query_sets.items():
+        for label, fn in (("like", db.search_diseases_rows), ("index", top_k)):
+            recall, latencies = _run(fn, queries, args.k, args.repeat)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{set_name:<11}{label:<8}{recall:>10.1%}{statistics.median(latencies):>10.1f}"
+                  f"{p95:>10.1f}{latencies[-1]:>10.1f}")
+
+    if args.misses:
+        for q in data["queries"] + data["typo_queries"]:
+            names = [row["name"] for row in search.search(q["query"], q["language"])[:args.k]]
+            if q["expected"] not in names:
+                print(f"  miss: {q['query']!r} ({q['language']}) -> {names}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Nearest-facility lookup: the grid index against a scan of the whole list.
+
+Generates --facilities synthetic PHCs, CHCs and hospitals over India's
+bounding box, a third of them clustered around one city, and times
+nearest-k lookups from random points with both. Every lookup's distances are
+compared, so "agree" should always be 100%. It then edits --changed of the
+facilities (moved, renamed or removed) and times the incremental update
+against building a new index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_facilities --facilities 200000 --queries 2000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _facilities(count: int, rng: random.Random):
+    facilities = {}
+    for i in range(count):
+        if i % 3 == 0:
+            latitude, longitude = rng.gauss(28.6, 0.5), rng.gauss(77.2, 0.5)
+        else:
+            latitude, longitude = rng.uniform(8, 35), rng.uniform(68, 97)
+        facilities[f"F{i}"] = {
+            "id": f"F{i}", "name": f"Facility {i}", "type": rng.choice(["PHC", "CHC", "Hospital"]),
+            "latitude": round(latitude, 5), "longitude": round(longitude, 5),
+            "phone": "", "address": "", "district": "", "state": "",
+        }
+    return facilities
+
+
+def _percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facilities", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=0.01, help="share of facilities edited before the update")
+    args = parser.parse_args()
+
+    # The services package creates a global database in the working directory on import
+    os.chdir(tempfile.mkdtemp(prefix="bench-facilities-"))
+    sys.path.insert(0, BACKEND_DIR)
+
+    import numpy as np
+    from app.services.facilities import EARTH_RADIUS_KM, FacilityIndex
+
+    rng = random.Random(7)
+    facilities = _facilities(args.facilities, rng)
+    index = FacilityIndex("facilities.csv")
+    start = time.perf_counter()
+    index.update(facilities, version="1")
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    records = list(facilities.values())
+    lat = np.radians([record["latitude"] for record in records])
+    lon = np.radians([record["longitude"] for record in records])
+
+    def scan(latitude, longitude, k):
+        lat0, lon0 = math.radians(latitude), math.radians(longitude)
+        a = np.sin((lat - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lat) * np.sin((lon - lon0) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return [round(float(d), 3) for d in np.sort(np.partition(distances, k - 1)[:k])]
+
+    points = [(rng.uniform(10, 32), rng.uniform(72, 88)) for _ in range(args.queries)]
+    timings = {"scan": [], "grid": []}
+    agree = 0
+    for latitude, longitude in points:
+        start = time.perf_counter()
+        expected = scan(latitude, longitude, args.k)
+        timings["scan"].append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        found = index.nearest(latitude, longitude, args.k)
+        timings["grid"].append((time.perf_counter() - start) * 1e6)
+        agree += [facility["distance_km"] for facility in found] == expected
+
+    print(f"{args.facilities} facilities in {len(index._grid.cells)} cells, built in {build_ms:.0f} ms; "
+          f"{args.queries} nearest-{args.k} lookups, agree {agree / args.queries:.1%}")
+    print(f"{'lookup':<8}{'p50 us':>10}{'p99 us':>10}")
+    for label, latencies in timings.items():
+        p50, p99 = _percentiles(latencies)
+        print(f"{label:<8}{p50:>10.1f}{p99:>10.1f}")
+
+    edited = dict(facilities)
+    for facility_id in rng.sample(sorted(edited), int(len(edited) * args.changed)):
+        action = rng.random()
+        if action < 0.4:
+            edited[facility_id] = {**edited[facility_id], "latitude": edited[facility_id]["latitude"] + 0.3}
+        elif action < 0.8:
+            edited[facility_id] = {**edited[facility_id], "name": edited[facility_id]["name"] + " (renamed)"}
+        else:
+            del edited[facility_id]
+    start = time.perf_counter()
+    cells = index.update(edited, version="2")
+    update_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    FacilityIndex("facilities.csv").update(edited, version="2")
+    rebuild_ms = (time.perf_counter() - start) * 1e3
+    print(f"{args.changed:.1%} edited: incremental update {update_ms:.0f} ms ({cells} cells), "
+          f"full rebuild {rebuild_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Per-row cost of the list endpoints' serialization paths.
+
+Compares, for N disease / vaccination / chat-history rows:
+  validated   - build validated Pydantic models, re-validate through the
+                response model and encode with the stdlib json encoder
+                (what a plain `return Model(...)` + response_model does)
+  constructed - model_construct() rows, single model_dump_json()
+  rows        - plain row dicts from SQLite straight to orjson/json bytes
+
+Usage (from backend/):
+    python -m benchmarks.bench_list_serialization --rows 1000 --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _time_per_row(fn, rows: int, repeat: int) -> float:
+    """Best-of-repeat wall time of fn(), in microseconds per row."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / rows * 1e6
+
+
+def _seed(db, rows: int):
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO diseases (name, symptoms, prevention, treatment, severity, language) VALUES (?, ?, ?, ?, ?, 'en')",
+            [(f"Bench disease {i}", "fever, cough, sore throat", "wash hands", "rest, fluids", "Mild") for i in range(rows)],
+        )
+        conn.executemany(
+            "INSERT INTO vaccinations (vaccine_name, age_group, schedule, description, side_effects, language) VALUES (?, ?, ?, ?, ?, 'en')",
+            [(f"Bench vaccine {i}", "Infants", "6, 10, 14 weeks", "bench", None) for i in range(rows)],
+        )
+        conn.executemany(
+            "INSERT INTO chat_history (user_message, bot_response, language, user_id) VALUES (?, ?, 'en', 'bench')",
+            [(f"question {i}", "answer " * 40) for i in range(rows)],
+        )
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # The services module creates a global database in the working directory on import
+    workdir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from app.core.serialization import dumps, orjson
+    from app.models.health import (
+        DiseaseInfo, DiseaseSearchResponse, HealthChatHistory, VaccinationInfo, VaccinationSearchResponse,
+    )
+    from app.services.health_database import HealthDatabase
+
+    db = HealthDatabase(os.path.join(workdir, "bench.db"))
+    _seed(db, args.rows)
+    # Seed data adds a few rows on top of the benchmark rows
+    n_diseases = len(db.search_diseases_rows("", "en"))
+    n_vaccines = len(db.get_vaccination_schedule_rows(None, "en"))
+    n_history = len(db.get_chat_history_rows(limit=args.rows))
+
+    def disease_validated():
+        models = [DiseaseInfo(**row) for row in db.search_diseases_rows("", "en")]
+        response = DiseaseSearchResponse.model_validate(
+            {"diseases": [m.model_dump() for m in models], "total": len(models)}
+        )
+        return json.dumps(response.model_dump(mode="json")).encode("utf-8")
+
+    def disease_constructed():
+        models = db.search_diseases("", "en")
+        return DiseaseSearchResponse.model_construct(diseases=models, total=len(models)).model_dump_json()
+
+    def disease_rows():
+        rows = db.search_diseases_rows("", "en")
+        return dumps({"diseases": rows, "total": len(rows)})
+
+    def vaccine_validated():
+        models = [VaccinationInfo(**row) for row in db.get_vaccination_schedule_rows(None, "en")]
+        response = VaccinationSearchResponse.model_validate(
+            {"vaccinations": [m.model_dump() for m in models], "total": len(models)}
+        )
+        return json.dumps(response.model_dump(mode="json")).encode("utf-8")
+
+    def vaccine_constructed():
+        models = db.get_vaccination_schedule(None, "en")
+        return VaccinationSearchResponse.model_construct(vaccinations=models, total=len(models)).model_dump_json()
+
+    def vaccine_rows():
+        rows = db.get_vaccination_schedule_rows(None, "en")
+        return dumps({"vaccinations": rows, "total": len(rows)})
+
+    def history_validated():
+        models = [HealthChatHistory.model_validate(m.model_dump()) for m in db.get_chat_history(limit=args.rows)]
+        return json.dumps([m.model_dump(mode="json") for m in models]).encode("utf-8")
+
+    def history_constructed():
+        models = db.get_chat_history(limit=args.rows)
+        return b"[" + b",".join(m.model_dump_json().encode("utf-8") for m in models) + b"]"
+
+    def history_rows():
+        return dumps(db.get_chat_history_rows(limit=args.rows))
+
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib json'}; best of {args.repeat}")
+    print(f"{'endpoint':<14}{'rows':>7}{'validated':>14}{'constructed':>14}{'rows':>12}   (us/row)")
+    for label, count, paths in (
+        ("diseases", n_diseases, (disease_validated, disease_constructed, disease_rows)),
+        ("vaccinations", n_vaccines, (vaccine_validated, vaccine_constructed, vaccine_rows)),
+        ("chat_history", n_history, (history_validated, history_constructed, history_rows)),
+    ):
+        costs = [_time_per_row(fn, count, args.repeat) for fn in paths]
+        print(f"{label:<14}{count:>7}" + "".join(f"{cost:>14.2f}" if i < 2 else f"{cost:>12.2f}" for i, cost in enumerate(costs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Prompt grounding: what the assistant puts in front of Gemini for a query.
+
+Compares, over the queries in benchmarks/data/disease_queries.json:
+  rows    - the two best disease rows, as search_health_database used to send
+  hybrid  - RetrievalEngine chunks (BM25 + memory-mapped n-gram vectors)
+
+hit is the share of queries whose expected disease is in the grounding text;
+on-topic is the share of grounding lines about that disease; tokens is the
+estimated size of the text (what every Gemini call pays for).
+--rows adds synthetic diseases so latency can be checked on a larger catalog.
+
+Usage (from backend/):
+    python -m benchmarks.bench_retrieval --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERY_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "disease_queries.json")
+
+
+def _run(ground, queries, repeat: int):
+    """(hit rate, on-topic share, mean tokens, per-query latencies in microseconds, best of repeat)."""
+    from app.core.rate_limit import estimate_tokens
+
+    hits = on_topic = tokens = 0
+    latencies = []
+    for q in queries:
+        text = ground(q["query"], q["language"])
+        lines = text.splitlines()
+        hits += q["expected"] in text
+        on_topic += sum(q["expected"] in line for line in lines) / len(lines) if lines else 0
+        tokens += estimate_tokens(text) if text else 0
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ground(q["query"], q["language"])
+            best = min(best, time.perf_counter() - start)
+        latencies.append(best * 1e6)
+    return hits / len(queries), on_topic / len(queries), tokens / len(queries), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=0, help="synthetic diseases added to the catalog")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # The services module creates a global database in the working directory on import
+    workdir = tempfile.mkdtemp(prefix="bench-retrieval-")
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from benchmarks.bench_disease_search import _seed
+    from app.services.disease_search import DiseaseSearch
+    from app.services.health_database import HealthDatabase
+    from app.services.retrieval import RetrievalEngine
+
+    with open(QUERY_SET, encoding="utf-8") as f:
+        data = json.load(f)
+    db = HealthDatabase(os.path.join(workdir, "bench.db"))
+    _seed(db, data["diseases"], args.rows)
+    search = DiseaseSearch(db)
+    engine = RetrievalEngine(os.path.join(workdir, "retrieval_index"), db)
+
+    def rows(query, language):
+        return "\n".join(f"- {d['name']}: Symptoms - {d['symptoms']}. Prevention - {d['prevention']}."
+                         for d in search.search(query, language, limit=2))
+
+    def hybrid(query, language):
+        return "\n".join(f"- {chunk.text}" for chunk in engine.retrieve(query, language))
+
+    languages = {q["language"] for q in data["queries"]}
+    for language in languages:
+        search._indexes.get(language)
+    start = time.perf_counter()
+    for language in languages:
+        engine._indexes.get(language)
+    build_ms = (time.perf_counter() - start) * 1e3
+    # A second engine over the same directory maps the vectors instead of recomputing them
+    start = time.perf_counter()
+    for language in languages:
+        RetrievalEngine(engine.index_dir, db)._indexes.get(language)
+    reload_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"{len(data['queries'])} queries; retrieval index build {build_ms:.1f} ms, "
+          f"reload from .npy {reload_ms:.1f} ms; best of {args.repeat}")
+    print(f"{'grounding':<10}{'hit':>8}{'on-topic':>10}{'tokens':>8}{'p50 us':>10}{'p95 us':>10}")
+    for label, fn in (("rows", rows), ("hybrid", hybrid)):
+        hit, on_topic, tokens, latencies = _run(fn, data["queries"], args.repeat)
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label:<10}{hit:>8.1%}{on_topic:>10.1%}{tokens:>8.0f}"
+              f"{statistics.median(latencies):>10.1f}{p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
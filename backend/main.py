@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import asyncio
 import os
 
 # Load environment variables first
@@ -11,6 +12,9 @@ from app.api.auth import router as auth_router
 from app.api.chat import router as chat_router
 from app.api.health import router as health_router
 from app.core.firebase import firebase_service
+from app.services.analytics import chat_rollups, run_rollup_flush
+from app.services.facilities import facility_index, run_facility_reload
+from app.services.faq import faq_index, faq_miner, run_faq_schedule
 
 app = FastAPI(
     title="Rural Health Platform API",
@@ -36,6 +40,22 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     firebase_service.initialize()
+    faq_index.load()
+    facility_index.load()
+    app.state.facility_task = asyncio.create_task(run_facility_reload(facility_index))
+    app.state.rollup_task = asyncio.create_task(run_rollup_flush(chat_rollups))
+    
+    # Optional in-process FAQ mining; the scripts/faq_job.py CLI does the same from cron
+    interval_hours = float(os.getenv("FAQ_MINING_INTERVAL_HOURS", 0))
+    if interval_hours > 0:
+        app.state.faq_task = asyncio.create_task(
+            run_faq_schedule(faq_miner, interval_hours * 3600, int(os.getenv("FAQ_MIN_COUNT", 3)))
+        )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Dashboard counts gathered since the last flush would otherwise be lost
+    chat_rollups.flush()
 
 # Include routers
 app.include_router(auth_router, prefix="/api")
@@ -57,6 +77,7 @@ async def root():
         "endpoints": {
             "auth": "/api/auth/*",
             "chat": "/api/chat/*",
+            "chat_ws": "/api/chat/ws",
             "health": "/api/health/*",
             "health_ui": "/api/health/ui"
         }
@@ -0,0 +1,40 @@
+"""
+Move bot answers stored inline in chat_history into response_bodies.
+
+Rows written before response_bodies existed carry their full answer text.
+This stores each distinct answer once and points the rows at it, a batch per
+transaction, so it can run while the API is serving; --vacuum then rebuilds
+the database file to hand the freed pages back to the filesystem.
+
+Usage (from backend/):
+    python -m scripts.dedupe_responses --batch-size 5000 --vacuum
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.health_database import health_db
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--vacuum", action="store_true", help="rebuild the file afterwards (locks the database)")
+    args = parser.parse_args(argv)
+
+    before = os.path.getsize(health_db.db_path)
+    moved = health_db.migrate_chat_responses(args.batch_size)
+    print(f"{moved} chat rows now reference response_bodies")
+    if args.vacuum:
+        with health_db.get_connection() as conn:
+            conn.execute("VACUUM")
+        print(f"{health_db.db_path}: {before / 1e6:.1f} MB -> {os.path.getsize(health_db.db_path) / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
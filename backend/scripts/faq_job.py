@@ -0,0 +1,90 @@
+"""
+FAQ mining and publishing job.
+
+  mine       record the most frequent recent questions as review candidates
+  generate   fill in answers for pending candidates (templates, else Gemini)
+  list       show candidates (default: pending)
+  approve    approve a candidate, optionally replacing its answer
+  reject     reject a candidate
+  publish    write approved answers as a new index version
+  coverage   share of recent chat questions the published index answers
+
+Usage (from backend/, e.g. nightly from cron):
+    python -m scripts.faq_job mine --min-count 3 && python -m scripts.faq_job list
+"""
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.faq import faq_index, faq_miner, usable_answer
+from app.services.health_database import health_db
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mine = commands.add_parser("mine")
+    mine.add_argument("--min-count", type=int, default=3)
+    mine.add_argument("--per-language", type=int, default=50)
+    mine.add_argument("--days", type=int, default=30, help="history window; 0 for all of it")
+
+    generate = commands.add_parser("generate")
+    generate.add_argument("--regenerate", action="store_true", help="also replace existing answers")
+
+    listing = commands.add_parser("list")
+    listing.add_argument("--status", default="pending", choices=["pending", "approved", "rejected"])
+    listing.add_argument("--lang")
+
+    approve = commands.add_parser("approve")
+    approve.add_argument("id", type=int)
+    approve.add_argument("--answer", help="curated answer to publish instead of the mined one")
+
+    reject = commands.add_parser("reject")
+    reject.add_argument("id", type=int)
+
+    commands.add_parser("publish")
+
+    coverage = commands.add_parser("coverage")
+    coverage.add_argument("--days", type=int, default=30)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "mine":
+        print(f"{faq_miner.mine(args.min_count, args.per_language, args.days or None)} candidates recorded")
+    elif args.command == "generate":
+        print(f"{faq_miner.generate_answers(args.regenerate)} answers generated")
+    elif args.command == "list":
+        for candidate in health_db.get_faq_candidates_rows(args.status, args.lang):
+            answer = (candidate["answer"] or "<no answer>").replace("\n", " ")
+            print(f"[{candidate['id']}] {candidate['language']} x{candidate['frequency']} "
+                  f"{candidate['sample_question']!r}\n    {answer[:160]}")
+    elif args.command in ("approve", "reject"):
+        status = "approved" if args.command == "approve" else "rejected"
+        answer = getattr(args, "answer", None)
+        if status == "approved" and not answer and not any(
+            c["id"] == args.id and usable_answer(c["answer"], c["language"])
+            for c in health_db.get_faq_candidates_rows()
+        ):
+            print(f"Candidate {args.id} has no answer; pass --answer or run generate first", file=sys.stderr)
+            return 1
+        if not health_db.update_faq_candidate(args.id, status=status, answer=answer):
+            print(f"No candidate with id {args.id}", file=sys.stderr)
+            return 1
+        print(f"Candidate {args.id} {status}")
+    elif args.command == "publish":
+        version = faq_miner.publish()
+        print(f"Published FAQ index {version}" if version else "Nothing approved to publish")
+    elif args.command == "coverage":
+        faq_index.load()
+        report = faq_miner.coverage(faq_index, args.days or None)
+        print(f"Index {faq_index.version}: {report['answered']}/{report['questions']} "
+              f"questions answered ({report['coverage']:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
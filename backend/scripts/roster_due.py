@@ -0,0 +1,49 @@
+"""
+Due and overdue vaccination doses for a roster of children.
+
+The roster is CSV with a header naming child_id and dob (YYYY-MM-DD), or JSONL
+with those keys. One NDJSON line per child is written to stdout, or to --output;
+rows that cannot be read get a line with an "error" instead.
+
+Usage (from backend/):
+    python -m scripts.roster_due roster.csv --as-of 2025-01-15 > due.ndjson
+"""
+import argparse
+import sys
+from datetime import date
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.immunization_roster import ImmunizationRoster, RosterFormatError
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("roster", help="CSV or JSONL file; - for stdin")
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="default: today")
+    parser.add_argument("--output", help="default: stdout")
+    args = parser.parse_args(argv)
+
+    # No row limit: that is for uploads to the API
+    roster = ImmunizationRoster()
+    source = sys.stdin if args.roster == "-" else open(args.roster, encoding="utf-8-sig", newline="")
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in roster.stream(source, args.lang, args.as_of):
+            output.write(chunk)
+    except RosterFormatError as e:
+        print(f"{args.roster}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,20 @@ import google.generativeai as genai
 import sqlite3
 import json
 import re
+import gzip
+import threading
+import time
 from datetime import datetime
 import logging
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from locale_catalog import LocaleCatalog
+
+try:
+    import brotli  # Optional: only used when the client accepts "br"
+except ImportError:
+    brotli = None
 
 # Load environment variables first
 load_dotenv()
@@ -19,6 +28,15 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+# Send UTF-8 instead of \uXXXX escapes (halves Indic-script payloads) and never pretty-print
+app.json.ensure_ascii = False
+app.json.compact = True
+
+# Clients opt into the compact chat payload with this Accept type (or ?compact=1)
+COMPACT_MEDIA_TYPE = 'application/vnd.sih.compact+json'
+COMPACT_SECTION_KEYS = {'title': 'h', 'content': 'c', 'type': 'k', 'items': 'i'}
+# Below this size compression headers cost more than they save
+MIN_COMPRESS_BYTES = 256
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY") ) 
 model = genai.GenerativeModel('gemini-2.5-flash')
@@ -222,11 +240,11 @@ class ResponseFormatter:
             }
         }
     
-    def format_response(self, raw_response: str, language: str = 'en', content_type: str = 'general') -> dict:
+    def format_response(self, raw_response: str, language: str = 'en', content_type: str = None) -> dict:
         """Main method to format responses based on content type."""
         try:
-            # Detect content type if not specified
-            if content_type == 'general':
+            # Detect content type from the response only if the caller did not classify the query
+            if content_type is None:
                 content_type = self._detect_content_type(raw_response, language)
             
             # Format based on content type
@@ -256,26 +274,12 @@ class ResponseFormatter:
         """Detect the type of content based on keywords."""
         response_lower = response.lower()
         
-        # First aid keywords
-        first_aid_keywords = {
-            'en': ['first aid', 'steps', 'minor cuts', 'burns', 'sprains', 'bandage', 'wound'],
-            'hi': ['प्राथमिक चिकित्सा', 'कदम', 'घाव', 'जलना', 'पट्टी'],
-            'bn': ['প্রাথমিক চিকিৎসা', 'ধাপ', 'ক্ষত', 'পোড়া', 'ব্যান্ডেজ']
-        }
-        
-        # Disease info keywords
-        disease_keywords = {
-            'en': ['symptoms', 'prevention', 'treatment', 'disease', 'condition'],
-            'hi': ['लक्षण', 'बचाव', 'उपचार', 'रोग', 'बीमारी'],
-            'bn': ['উপসর্গ', 'প্রতিরোধ', 'চিকিৎসা', 'রোগ', 'অসুখ']
-        }
-        
         # Check for first aid content
-        if any(keyword in response_lower for keyword in first_aid_keywords.get(language, first_aid_keywords['en'])):
+        if locales.matches('formatter_first_aid', response_lower, language):
             return 'first_aid'
         
         # Check for disease info
-        if any(keyword in response_lower for keyword in disease_keywords.get(language, disease_keywords['en'])):
+        if locales.matches('formatter_disease', response_lower, language):
             return 'disease_info'
         
         # Check for vaccination content
@@ -679,12 +683,142 @@ class ResponseFormatter:
         return formatted_paragraphs
 
 
+class AnswerEngine:
+    """
+    Answers questions fully covered by the reference tables ("symptoms of
+    malaria", "vaccination schedule") from templates, without calling Gemini.
+    Confidence is the share of query words the matched intent explains.
+    """
+    
+    FIELDS = ('symptoms', 'prevention', 'treatment')
+    TOKEN_PATTERN = re.compile(r'[^\s,.;:!?।()"\'/-]+')
+    
+    def __init__(self, health_db: HealthDatabase, section_headers: dict, min_confidence: float = 0.8):
+        self.health_db = health_db
+        self.section_headers = section_headers
+        self.min_confidence = min_confidence
+        self._indexes = {}
+    def tokenize(self, text: str) -> list:
+        return self.TOKEN_PATTERN.findall(text.lower())
+    
+    def answer(self, query: str, language: str = 'en') -> Optional[dict]:
+        """A formatter-shaped response ({'message', 'formatted_content'}) or None when the LLM is needed."""
+        tokens = self.tokenize(query)
+        if not tokens or not locales.has('symptoms_stems', language):
+            return None
+        diseases, vaccines = self._index(language)
+        token_set = set(tokens)
+        
+        matched = [(row, words) for row, words, keys in diseases if keys & token_set]
+        fields = [f for f in self.FIELDS if self._has_stem(token_set, locales.keywords(f + '_stems', language))]
+        asks_vaccines = self._has_stem(token_set, locales.keywords('vaccine_stems', language))
+        
+        if matched and len(matched) <= 2 and not asks_vaccines:
+            content_type = 'disease_info'
+            covered = set().union(*(words for _, words in matched))
+        elif asks_vaccines and not matched and vaccines:
+            content_type = 'vaccination'
+            covered = set().union(*(words for _, words in vaccines))
+        else:
+            return None
+        
+        confidence = sum(1 for t in tokens if self._is_covered(t, language, covered)) / len(tokens)
+        if confidence < self.min_confidence:
+            return None
+        
+        headers = self.section_headers.get(language, self.section_headers['en'])
+        sections = []
+        if content_type == 'disease_info':
+            for row, _ in matched:
+                sections.append({'title': headers['general'], 'content': row['name'], 'type': 'text'})
+                for field in fields or self.FIELDS:
+                    items = [item.strip() for item in row[field].split(',') if item.strip()]
+                    sections.append({
+                        'title': headers[field],
+                        'content': '',
+                        'type': 'list',
+                        'items': [item[:1].upper() + item[1:] for item in items]
+                    })
+        else:
+            # "polio vaccine" narrows the list; "vaccination schedule" shows all of it
+            rows = [row for row, words in vaccines if words & token_set] or [row for row, _ in vaccines]
+            sections.append({
+                'title': headers['vaccination'],
+                'content': '',
+                'type': 'list',
+                'items': [f"{row['vaccine_name']} ({row['age_group']}): {row['schedule']}. {row['description']}." for row in rows]
+            })
+        sections.append({'title': '', 'content': locales.text('closing_note', language), 'type': 'text'})
+        
+        return {
+            'message': self._render_text(sections),
+            'formatted_content': {'type': content_type, 'sections': sections}
+        }
+    
+    def _render_text(self, sections: list) -> str:
+        blocks = []
+        for section in sections:
+            lines = [section['title'].replace('**', '')] if section.get('title') else []
+            if section.get('content'):
+                lines.append(section['content'])
+            lines.extend(f"• {item}" for item in section.get('items', []))
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+    
+    def _index(self, language: str):
+        """Disease and vaccine name words for a language, built on first use."""
+        if language not in self._indexes:
+            # Name words too generic to identify a disease on their own
+            generic = set(locales.keywords('generic_name_words', language)) | set(locales.keywords('generic_name_words', 'en'))
+            diseases = []
+            for row in self.health_db.search_diseases('', language):
+                words = set(self.tokenize(row['name']))
+                keys = {w for w in words if len(w) >= 3 and w not in generic and not w.isdigit()}
+                diseases.append((row, words, keys))
+            vaccines = [(row, set(self.tokenize(row['vaccine_name'])))
+                        for row in self.health_db.get_vaccination_schedule(language=language)]
+            self._indexes[language] = (diseases, vaccines)
+        return self._indexes[language]
+    
+    def _is_covered(self, token: str, language: str, covered: set) -> bool:
+        return (token in covered
+                or token in locales.keywords('filler', language)
+                or token in locales.keywords('filler', 'en')
+                or token.startswith(locales.keywords('vaccine_stems', language))
+                or any(token.startswith(locales.keywords(f + '_stems', language)) for f in self.FIELDS))
+    
+    @staticmethod
+    def _has_stem(tokens: set, stems: tuple) -> bool:
+        return bool(stems) and any(token.startswith(stems) for token in tokens)
+
+class AnswerStats:
+    """Counts chat answers by source, to track the share served without Gemini."""
+    
+    def __init__(self):
+        self.counts = {'template': 0, 'llm': 0}
+        self._lock = threading.Lock()
+    
+    def record(self, source: str):
+        with self._lock:
+            self.counts[source] += 1
+    
+    def summary(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {**counts, 'without_llm_share': round(counts['template'] / total, 4) if total else 0.0}
+
 class AIHealthAssistant:
     """Handles AI-powered health assistant logic using Gemini."""
     
     def __init__(self, health_db: HealthDatabase):
         self.health_db = health_db
         self.formatter = ResponseFormatter()
+        self.answer_engine = AnswerEngine(
+            health_db, self.formatter.section_headers,
+            min_confidence=float(os.getenv('ANSWER_ENGINE_MIN_CONFIDENCE', 0.8))
+        )
+        self.answer_stats = AnswerStats()
         self.system_prompt = {
             'en': """You are a healthcare education assistant for rural and semi-urban populations.
             Provide accurate, simple, and culturally appropriate health information.
@@ -886,10 +1020,28 @@ class AIHealthAssistant:
             """
         }
     
+    def classify_query(self, query: str, language: str = 'en') -> str:
+        """ResponseFormatter content type of a query, worked out once before generation."""
+        for content_type, key in (('emergency', 'emergency'), ('first_aid', 'first_aid'),
+                                  ('vaccination', 'vaccine'), ('disease_info', 'disease')):
+            if locales.matches(key, query, language):
+                return content_type
+        return 'general'
+    
     def generate_response(self, user_message: str, language: str = 'en') -> dict:
         """Generates an AI response based on user message and database knowledge."""
+        content_type = self.classify_query(user_message, language)
+        
+        # Reference-data questions are answered from templates; Gemini only for open-ended ones
+        if content_type in ('vaccination', 'disease_info'):
+            template = self.answer_engine.answer(user_message, language)
+            if template is not None:
+                self.answer_stats.record('template')
+                return template
+        self.answer_stats.record('llm')
+        
         try:
-            db_results = self.search_health_database(user_message, language)
+            db_results = self.search_health_database(user_message, language, content_type)
             
             prompt = f"""{self.system_prompt.get(language, self.system_prompt['en'])}
 
@@ -915,38 +1067,23 @@ Keep each bullet point concise but informative."""
             response = model.generate_content(prompt)
             
             if response.text:
-                formatted_response = self.format_response(response.text, language)
+                formatted_response = self.format_response(response.text, language, content_type)
                 # Use the new formatter to create structured response
-                return self.formatter.format_response(formatted_response, language)
+                return self.formatter.format_response(formatted_response, language, content_type)
             else:
                 fallback = self.get_fallback_response(language)
-                return self.formatter.format_response(fallback, language)
+                return self.formatter.format_response(fallback, language, 'general')
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
             fallback = self.get_fallback_response(language)
-            return self.formatter.format_response(fallback, language)
+            return self.formatter.format_response(fallback, language, 'general')
     
-    def search_health_database(self, query: str, language: str) -> str:
+    def search_health_database(self, query: str, language: str, content_type: str = None) -> str:
         """Searches the local database for relevant information."""
         results = []
+        content_type = content_type or self.classify_query(query, language)
         
-        # Check for vaccination keywords first
-        vaccine_keywords = {
-            'en': ['vaccine', 'vaccination', 'immunization', 'polio', 'mmr', 'dpt', 'bcg'],
-            'hi': ['टीका', 'टीकाकरण', 'पोलियो', 'एमएमआर', 'डीपीटी', 'बीसीजी'],
-            'bn': ['টিকা', 'টিকাদান', 'পোলিও', 'এমএমআর', 'ডিপিটি', 'বিসিজি'],
-            'ta': ['தடுப்பூசி', 'தடுப்பூசிகள்', 'போலியோ', 'எம்எம்ஆர்', 'டிபிடி', 'பிசிஜி'],
-            'te': ['టీకా', 'టీకాలు', 'పోలియో', 'ఎంఎంఆర్', 'డిపిటి', 'బిసిజి'],
-            'mr': ['लस', 'लसीकरण', 'पोलिओ', 'एमएमआर', 'डीपीटी', 'बीसीजी'],
-            'gu': ['રસી', 'રસીકરણ', 'પોલિયો', 'એમએમઆર', 'ડીપીટી', 'બીસીજી'],
-            'kn': ['ಲಸಿಕೆ', 'ಲಸಿಕೆಗಳು', 'ಪೋಲಿಯೋ', 'ಎಂಎಂಆರ್', 'ಡಿಪಿಟಿ', 'ಬಿಸಿಜಿ'],
-            'ml': ['വാക്സിൻ', 'വാക്സിനേഷൻ', 'പോളിയോ', 'എംഎംആർ', 'ഡിപിടി', 'ബിസിജി'],
-            'pa': ['ਟੀਕਾ', 'ਟੀਕਾਕਰਨ', 'ਪੋਲੀਓ', 'ਐਮਐਮਆਰ', 'ਡੀਪੀਟੀ', 'ਬੀਸੀਜੀ'],
-            'or': ['ଟୀକା', 'ଟୀକାକରଣ', 'ପୋଲିଓ', 'ଏମଏମଆର', 'ଡିପିଟି', 'ବିସିଜି'],
-            'as': ['টিকাদান', 'টিকাকৰণ', 'পোলিও', 'এমএমআৰ', 'ডিপিটি', 'বিচিজি'],
-        }
-        
-        if any(keyword in query.lower() for keyword in vaccine_keywords.get(language, [])):
+        if content_type == 'vaccination':
             vaccines = self.health_db.get_vaccination_schedule(language=language)
             if vaccines:
                 results.append("Vaccination Schedule:")
@@ -964,70 +1101,69 @@ Keep each bullet point concise but informative."""
         
         return "\n".join(results) if results else ""
 
-    def format_response(self, response: str, language: str) -> str:
-        """Formats the response and adds emergency contact if necessary."""
+    def format_response(self, response: str, language: str, content_type: str = 'general') -> str:
+        """Formats the response and adds emergency contact for emergency queries."""
         # Replace Markdown bold with plain text for easier front-end handling
         response = re.sub(r'\*\*([^*]+)\*\*', r'\1', response)
         response = re.sub(r'\*([^*]+)\*', r'\1', response)
         
-        # Check for emergency keywords and add a prominent warning
-        serious_keywords = {
-            'en': ['chest pain', 'difficulty breathing', 'severe', 'emergency', 'blood', 'unconscious', 'fainting'],
-            'hi': ['सीने में दर्द', 'सांस लेने में कठिनाई', 'गंभीर', 'आपातकाल', 'खून', 'बेहोश'],
-            'bn': ['বুকে ব্যথা', 'শ্বাসকষ্ট', 'গুরুতর', 'জরুরি', 'রক্ত', 'অজ্ঞান'],
-            'ta': ['மார்பு வலி', 'மூச்சு திணறல்', 'கடுமையான', 'அவசரம்', 'இரத்தம்', 'மயக்கம்'],
-            'te': ['ఛాతీ నొప్పి', 'శ్వాస తీసుకోవడంలో ఇబ్బంది', 'తీవ్రమైన', 'అత్యవసర', 'రక్తం', 'అపస్మారక'],
-            'mr': ['छातीत दुखणे', 'श्वास घेण्यास त्रास', 'गंभीर', 'आपत्कालीन', 'रक्त', 'बेशुद्ध'],
-            'gu': ['છાતીમાં દુખાવો', 'શ્વાસ લેવામાં તકલીફ', 'ગંભીર', 'કટોકટી', 'લોહી', 'બેભાન'],
-            'kn': ['ಎದೆನೋವು', 'ಉಸಿರಾಟದ ತೊಂದರೆ', 'ತೀವ್ರ', 'ತುರ್ತು', 'ರಕ್ತ', 'ಪ್ರಜ್ಞಾಹೀನ'],
-            'ml': ['നെഞ്ചുവേദന', 'ശ്വാസംമുട്ടൽ', 'ഗുരുതരമായ', 'അടിയന്തര', 'രക്തം', 'ബോധം നഷ്ടപ്പെട്ടു'],
-            'pa': ['ਛਾਤੀ ਵਿੱਚ ਦਰਦ', 'ਸਾਹ ਲੈਣ ਵਿੱਚ ਮੁਸ਼ਕਲ', 'ਗੰਭੀਰ', 'ਐਮਰਜੈਂਸੀ', 'ਖੂਨ', 'ਬੇਹੋਸ਼'],
-            'or': ['ଛାତି ଯନ୍ତ୍ରଣା', 'ଶ୍ବାସକଷ୍ଟ', 'ଗୁରୁତର', 'ଜରୁରୀ', 'ରକ୍ତ', 'ବେହୋଶ'],
-            'as': ['বুকুৰ বিষ', 'শ্বাস লোৱাত কষ্ট', 'গুৰুতৰ', 'জৰুৰী', 'তেজ', 'অজ্ঞান'],
-        }
-        
-        if any(keyword in response.lower() for keyword in serious_keywords.get(language, [])):
-            emergency_note = {
-                'en': "\n⚠️ For medical emergencies, call 108 immediately.",
-                'hi': "\n⚠️ आपातकालीन स्थिति में तुरंत 108 पर कॉल करें।",
-                'bn': "\n⚠️ চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।",
-                'ta': "\n⚠️ மருத்துவ அவசரநிலைக்கு, உடனடியாக 108 ஐ அழைக்கவும்.",
-                'te': "\n⚠️ వైద్య అత్యవసర పరిస్థితుల్లో, వెంటనే 108కు కాల్ చేయండి.",
-                'mr': "\n⚠️ वैद्यकीय आपत्कालीन परिस्थितीत, त्वरित 108 वर कॉल करा.",
-                'gu': "\n⚠️ તબીબી કટોકટી માટે, તુરંત 108 પર કૉલ કરો.",
-                'kn': "\n⚠️ ವೈದ್ಯಕೀಯ ತುರ್ತುಸ್ಥಿತಿಗೆ, ತಕ್ಷಣ 108 ಗೆ ಕರೆ ಮಾಡಿ.",
-                'ml': "\n⚠️ മെഡിക്കൽ എമർജൻസിക്ക്, ഉടൻ തന്നെ 108-ൽ വിളിക്കുക.",
-                'pa': "\n⚠️ ਡਾਕਟਰੀ ਐਮਰਜੈਂਸੀ ਲਈ, ਤੁਰੰਤ 108 'ਤੇ ਕਾਲ ਕਰੋ।",
-                'or': "\n⚠️ ଚିକିତ୍ସା ଜରୁରୀ ଅବସ୍ଥା ପାଇଁ, ତୁରନ୍ତ 108 କୁ କଲ୍ କରନ୍ତୁ।",
-                'as': "\n⚠️ চিকিৎসা জৰুৰীকালীন অৱস্থাৰ বাবে, তৎক্ষণাৎ 108 নম্বৰত ফোন কৰক।",
-            }
-            if emergency_note[language] not in response:
-                response += emergency_note[language]
+        # The query was classified before generation; the response is not rescanned
+        if content_type == 'emergency':
+            note = locales.text('emergency_note', language)
+            if note not in response:
+                response += note
         
         return response
     
     def get_fallback_response(self, language: str) -> str:
         """Provides a simple fallback message if AI generation fails."""
-        fallback = {
-            'en': "I'm sorry, I couldn't process your request right now. Please try rephrasing your question or contact a healthcare professional for urgent matters. For emergencies, call 108.",
-            'hi': "मुझे खेद है, मैं अभी आपके अनुरोध को संसाधित नहीं कर सका। कृपया अपने प्रश्न को दोबारा पूछें या तत्काल मामलों के लिए एक स्वास्थ्य पेशेवर से संपर्क करें। आपातकाल के लिए 108 पर कॉल करें।",
-            'bn': "আমি দুঃখিত, আমি আপনার অনুরোধটি এই মুহূর্তে প্রক্রিয়া করতে পারিনি। অনুগ্রহ করে আপনার প্রশ্নটি পুনরায় লিখুন বা জরুরি প্রয়োজনে একজন স্বাস্থ্যসেবা পেশাদারের সাথে যোগাযোগ করুন। জরুরি অবস্থার জন্য, 108 নম্বরে কল করুন।",
-            'ta': "மன்னிக்கவும், உங்கள் கோரிக்கையை என்னால் இப்போதைக்குச் செயல்படுத்த முடியவில்லை. தயவுசெய்து உங்கள் கேள்வியை மீண்டும் கேளுங்கள் அல்லது அவசர விஷயங்களுக்கு சுகாதார நிபுணரைத் தொடர்பு கொள்ளுங்கள். அவசரநிலைக்கு, 108 ஐ அழைக்கவும்.",
-            'te': "క్షమించండి, నేను మీ అభ్యర్థనను ప్రస్తుతం ప్రాసెస్ చేయలేకపోయాను. దయచేసి మీ ప్రశ్నను మళ్లీ అడగండి లేదా అత్యవసర విషయాల కోసం ఆరోగ్య సంరక్షణ నిపుణుడిని సంప్రదించండి. అత్యవసర పరిస్థితులకు, 108కి కాల్ చేయండి.",
-            'mr': "माफ करा, मी तुमचा सध्याचा विनंतीवर प्रक्रिया करू शकलो नाही. कृपया तुमचा प्रश्न पुन्हा विचारा किंवा तातडीच्या बाबींसाठी आरोग्यसेवा व्यावसायिकांशी संपर्क साधा. आपत्कालीन परिस्थितीत, 108 वर कॉल करा.",
-            'gu': "માફ કરશો, હું તમારી વિનંતી પર હાલમાં પ્રક્રિયા કરી શક્યો નથી. કૃપા કરીને તમારા પ્રશ્નને ફરીથી પૂછો અથવા તાત્કાલિક બાબતો માટે આરોગ્ય સંભાળ વ્યાવસાયિકનો સંપર્ક કરો. કટોકટી માટે, 108 પર કૉલ કરો.",
-            'kn': "ಕ್ಷಮಿಸಿ, ನಾನು ನಿಮ್ಮ ವಿನಂತಿಯನ್ನು ಇದೀಗ ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲು ಸಾಧ್ಯವಾಗಲಿಲ್ಲ. ದಯವಿಟ್ಟು ನಿಮ್ಮ ಪ್ರಶ್ನೆಯನ್ನು ಪುನಃ ರೂಪಿಸಿ ಅಥವಾ ತುರ್ತು ವಿಷಯಗಳಿಗಾಗಿ ಆರೋಗ್ಯ ವೃತ್ತಿಪರರನ್ನು ಸಂಪರ್ಕಿಸಿ. ತುರ್ತುಸ್ಥಿತಿಗಳಿಗಾಗಿ, 108 ಗೆ ಕರೆ ಮಾಡಿ.",
-            'ml': "ക്ഷമിക്കണം, എനിക്ക് നിങ്ങളുടെ അഭ്യർത്ഥന ഇപ്പോൾ പ്രോസസ്സ് ചെയ്യാൻ കഴിഞ്ഞില്ല. ദയവായി നിങ്ങളുടെ ചോദ്യം വീണ്ടും ചോദിക്കുക അല്ലെങ്കിൽ അടിയന്തിര കാര്യങ്ങൾക്കായി ഒരു ആരോഗ്യ വിദഗ്ദ്ധനെ സമീപിക്കുക. അടിയന്തിര സാഹചര്യങ്ങളിൽ, 108-ൽ വിളിക്കുക.",
-            'pa': "ਮੈਨੂੰ ਮਾਫ ਕਰਨਾ, ਮੈਂ ਤੁਹਾਡੀ ਬੇਨਤੀ ਨੂੰ ਇਸ ਸਮੇਂ ਪ੍ਰਕਿਰਿਆ ਨਹੀਂ ਕਰ ਸਕਿਆ। ਕਿਰਪਾ ਕਰਕੇ ਆਪਣੇ ਸਵਾਲ ਨੂੰ ਦੁਬਾਰਾ ਪੁੱਛੋ ਜਾਂ ਜ਼ਰੂਰੀ ਮਾਮਲਿਆਂ ਲਈ ਸਿਹਤ ਸੰਭਾਲ ਪੇਸ਼ੇਵਰ ਨਾਲ ਸੰਪਰਕ ਕਰੋ। ਐਮਰਜੈਂਸੀ ਲਈ, 108 'ਤੇ ਕਾਲ ਕਰੋ।",
-            'or': "ମୁଁ ଦୁଃଖିତ, ମୁଁ ବର୍ତ୍ତମାନ ଆପଣଙ୍କ ଅନୁରୋଧକୁ ପ୍ରକ୍ରିୟା କରିପାରିଲି ନାହିଁ। ଦୟାକରି ଆପଣଙ୍କ ପ୍ରଶ୍ନକୁ ପୁନର୍ବାର ପଚାରନ୍ତୁ କିମ୍ବା ଜରୁରୀ ବିଷୟ ପାଇଁ ଜଣେ ସ୍ୱାସ୍ଥ୍ୟ ସେବା ବୃତ୍ତିଗତଙ୍କ ସହିତ ଯୋଗାଯୋଗ କରନ୍ତୁ। ଜରୁରୀକାଳୀନ ପରିସ୍ଥିତିରେ, 108 କୁ କଲ୍ କରନ୍ତୁ।",
-            'as': "মই দুঃখিত, মই আপোনাৰ অনুৰোধটো এই মুহূৰ্তত প্ৰক্ৰিয়া কৰিব নোৱাৰিলোঁ। অনুগ্ৰহ কৰি আপোনাৰ প্ৰশ্নটো পুনৰ সুধিব অথবা জৰুৰী বিষয়ৰ বাবে এজন স্বাস্থ্যসেৱা পেছাদাৰীৰ সৈতে যোগাযোগ কৰক। জৰুৰীকালীন অৱস্থাৰ বাবে, 108 নম্বৰত ফোন কৰক।",
-        }
-        return fallback.get(language, fallback['en'])
+        return locales.text('fallback', language)
 
-# Initialize database and AI assistant
+# Initialize locales, database and AI assistant
+locales = LocaleCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales'))
 health_db = HealthDatabase()
 ai_assistant = AIHealthAssistant(health_db)
 
+def wants_compact_response() -> bool:
+    """True when the client negotiated the compact chat payload."""
+    return request.args.get('compact') == '1' or request.accept_mimetypes[COMPACT_MEDIA_TYPE] > 0
+
+def to_compact_payload(bot_response: dict, language: str) -> dict:
+    """Keep only the structured sections, with short keys and empty fields dropped.
+
+    The plain text is not sent; the client rebuilds it from the sections.
+    """
+    formatted = bot_response.get('formatted_content') or {
+        'type': 'text',
+        'sections': [{'title': '', 'content': bot_response.get('message', ''), 'type': 'text'}]
+    }
+    sections = []
+    for section in formatted.get('sections', []):
+        compact = {}
+        for key, short_key in COMPACT_SECTION_KEYS.items():
+            value = section.get(key)
+            # 'text' is the default section type on the client, so it is left out
+            if value and not (key == 'type' and value == 'text'):
+                compact[short_key] = value
+        sections.append(compact)
+    return {'t': formatted.get('type', 'text'), 's': sections, 'l': language, 'ts': int(time.time())}
+
+def compact_json_response(payload: dict):
+    """Serialize a compact payload, compressing it with br or gzip when the client accepts it."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    response = app.response_class(body, mimetype=COMPACT_MEDIA_TYPE)
+    response.vary.add('Accept')
+    response.vary.add('Accept-Encoding')
+
+    if len(body) >= MIN_COMPRESS_BYTES:
+        if brotli is not None and request.accept_encodings['br'] > 0:
+            response.set_data(brotli.compress(body, quality=5))
+            response.headers['Content-Encoding'] = 'br'
+        elif request.accept_encodings['gzip'] > 0:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Endpoint to handle chat requests."""
@@ -1048,6 +1184,9 @@ def chat():
         plain_text_response = bot_response.get('message', str(bot_response))
         health_db.save_chat_history(user_message, plain_text_response, language, user_id)
         
+        if wants_compact_response():
+            return compact_json_response(to_compact_payload(bot_response, language))
+        
         return jsonify({
             'response': bot_response.get('message', str(bot_response)),
             'formatted_content': bot_response.get('formatted_content'),
@@ -1081,31 +1220,12 @@ def emergency_info():
     """Endpoint to get emergency contact information."""
     language = request.args.get('lang', 'en')
     
-    emergency_info = {
-        'en': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'For medical emergencies, call 108 immediately. This is a free service available 24/7 across India.'
-        },
-        'hi': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'आपातकालीन स्थिति में तुरंत 108 पर कॉल करें। यह भारत में 24/7 उपलब्ध एक निःशुल्क सेवा है।'
-        },
-        'bn': {'message': 'চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।'},
-        'ta': {'message': 'மருத்துவ அவசரநிலைக்கு, உடனடியாக 108 ஐ அழைக்கவும்.'},
-        'te': {'message': 'వైద్య అత్యవసర పరిస్థితుల్లో, వెంటనే 108కు కాల్ చేయండి.'},
-        'mr': {'message': 'वैद्यकीय आपत्कालीन परिस्थितीत, त्वरित 108 वर कॉल करा.'},
-        'gu': {'message': 'તબીબી કટોકટી માટે, તુરંત 108 પર કૉલ કરો.'},
-        'kn': {'message': 'ವೈದ್ಯಕೀಯ ತುರ್ತುಸ್ಥಿತಿಗೆ, ತಕ್ಷಣ 108 ಗೆ ಕರೆ ಮಾಡಿ.'},
-        'ml': {'message': 'മെഡിക്കൽ എമർജൻസിക്ക്, ഉടൻ തന്നെ 108-ൽ വിളിക്കുക.'},
-        'pa': {'message': 'ਡਾਕਟਰੀ ਐਮਰਜੈਂਸੀ ਲਈ, ਤੁਰੰਤ 108 ਤੇ ਕਾਲ ਕਰੋ।'},
-        'or': {'message': 'ଚିକିତ୍ସା ଜରୁରୀ ଅବସ୍ଥା ପାଇଁ, ତୁରନ୍ତ 108 କୁ କଲ୍ କରନ୍ତୁ।'},
-        'as': {'message': 'চিকিৎসা জৰুৰীকালীন অৱস্থাৰ বাবে, তৎক্ষণাৎ 108 নম্বৰত ফোন কৰক।'},
-    }
-    return jsonify(emergency_info.get(language, emergency_info['en']))
+    return jsonify(locales.text('emergency_info', language))
+
+@app.route('/api/stats/answers', methods=['GET'])
+def answer_stats():
+    """Endpoint to get how many chat answers were served with and without Gemini."""
+    return jsonify(ai_assistant.answer_stats.summary())
 
 @app.route('/')
 def index():
@@ -0,0 +1,55 @@
+import json
+import os
+import re
+
+# A word character as the apps' tokenizers see it. \b is no use here: Indic vowel
+# signs are not \w, so a word ending in one would never end on a boundary
+TOKEN_CHAR = r'[^\s,.;:!?।()"\'/-]'
+
+
+class LocaleCatalog:
+    """
+    Localized messages and keyword lists, loaded once from locales/<language>.json
+    with a compiled whole-word phrase matcher per keyword list ('burn' does not
+    match "heartburn"). Shared by backend/sih and the app copies under
+    frontend/public. Adding a language is adding a file.
+    """
+
+    def __init__(self, locales_dir: str, default_language: str = 'en'):
+        self.default_language = default_language
+        self.messages = {}
+        self._keywords = {}
+        self._matchers = {}
+        for filename in sorted(os.listdir(locales_dir)):
+            language, ext = os.path.splitext(filename)
+            if ext != '.json':
+                continue
+            with open(os.path.join(locales_dir, filename), encoding='utf-8') as f:
+                data = json.load(f)
+            self.messages[language] = data.get('messages', {})
+            for key, words in data.get('keywords', {}).items():
+                words = tuple(w.lower() for w in words if w)
+                if words:
+                    self._keywords[(language, key)] = words
+                    self._matchers[(language, key)] = re.compile(
+                        f'(?<!{TOKEN_CHAR})(?:'
+                        + '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+                        + f')(?!{TOKEN_CHAR})'
+                    )
+
+    def text(self, key: str, language: str):
+        """Message for the language, falling back to the default language."""
+        messages = self.messages.get(language, {})
+        return messages[key] if key in messages else self.messages[self.default_language][key]
+
+    def has(self, key: str, language: str) -> bool:
+        return (language, key) in self._keywords
+
+    def keywords(self, key: str, language: str) -> tuple:
+        """Keyword list for the language (also usable with str.startswith); empty if none."""
+        return self._keywords.get((language, key), ())
+
+    def matches(self, key: str, text: str, language: str) -> bool:
+        """Whole-word phrase match against the language's list, or the default language's when it has none."""
+        matcher = self._matchers.get((language, key)) or self._matchers.get((self.default_language, key))
+        return matcher is not None and matcher.search(text.lower()) is not None
@@ -0,0 +1,13 @@
+"""
+Shared test setup. The services create their SQLite database (and load the
+sample health data) in the working directory on import, so the tests run
+from a fresh temporary directory.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(tempfile.mkdtemp(prefix="sih-tests-"))
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.services.analytics import BUCKET_SECONDS, ChatRollups, latency_bin, latency_bin_upper_ms, run_rollup_flush
+from app.services.health_database import HealthDatabase
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    return ChatRollups(db=HealthDatabase(str(tmp_path / 'rollups.db')), clock=_Clock(100 * BUCKET_SECONDS))
+
+
+def test_recording_does_not_write_until_flushed(rollups):
+    rollups.clock.now += 3600 * 24
+    rollups.record_answer('llm', 'en')
+    rollups.record_llm_latency('en', 120)
+    assert rollups.db.get_chat_rollups_rows(0) == []
+    assert rollups.flush()
+    assert [row['answers'] for row in rollups.db.get_chat_rollups_rows(0)] == [1]
+
+
+def test_dashboard_counts_sources_rates_and_hours(rollups):
+    for source in ['llm', 'llm', 'faq', 'template', 'canned']:
+        rollups.record_answer(source, 'en')
+    rollups.clock.now += BUCKET_SECONDS
+    rollups.record_answer('emergency', 'hi')
+    report = rollups.dashboard(hours=2)
+    assert report['total'] == 6
+    assert report['answers']['llm'] == 2
+    assert report['filter_rejection_rate'] == round(1 / 6, 4)
+    assert report['cache_hit_rate'] == round(3 / 5, 4)
+    assert [hour['languages'] for hour in report['queries_per_hour']] == [{'en': 5}, {'hi': 1}]
+    assert rollups.dashboard(hours=2, language='hi')['total'] == 1
+
+
+def test_latency_percentiles_bound_the_true_values(rollups):
+    latencies = [10 * i for i in range(1, 201)]
+    for ms in latencies:
+        rollups.record_llm_latency('en', ms)
+    report = rollups.dashboard()['llm_latency_ms']
+    assert report['calls'] == 200
+    assert report['mean'] == sum(latencies) / 200
+    for quantile, key in [(0.5, 'p50'), (0.9, 'p90'), (0.99, 'p99')]:
+        true_value = sorted(latencies)[int(quantile * 200) - 1]
+        assert true_value <= report[key] <= max(true_value * 1.25, latency_bin_upper_ms(0))
+    assert all(ms <= latency_bin_upper_ms(latency_bin(ms)) for ms in latencies)
+
+
+def test_failed_flush_keeps_the_counts(rollups, monkeypatch):
+    rollups.record_answer('faq', 'en')
+    monkeypatch.setattr(rollups.db, 'add_chat_rollups', lambda answers, latencies: False)
+    assert not rollups.flush()
+    monkeypatch.undo()
+    assert rollups.flush()
+    assert [row['answers'] for row in rollups.db.get_chat_rollups_rows(0)] == [1]
+
+
+def test_background_flush_writes_pending_counts(rollups):
+    rollups.flush_seconds = 0.01
+    rollups.record_answer('llm', 'en')
+
+    async def run():
+        task = asyncio.create_task(run_rollup_flush(rollups))
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+    asyncio.run(run())
+    assert [row['answers'] for row in rollups.db.get_chat_rollups_rows(0)] == [1]
@@ -0,0 +1,92 @@
+import heapq
+import random
+import string
+from collections import defaultdict
+
+import pytest
+
+from app.services.disease_search import (
+    FUZZY_MAX_TERMS, FUZZY_MIN_SIMILARITY, DiseaseSearch, _SearchIndex, _trigrams,
+)
+
+
+def _index(terms):
+    trigrams = defaultdict(set)
+    for term_id, term in enumerate(terms):
+        for gram in _trigrams(term):
+            trigrams[gram].add(term_id)
+    return _SearchIndex(rows=[], haystacks=[], phrases={}, max_phrase_words=1, stopwords=set(), field_stems=(),
+                        terms=terms, term_sizes=[len(_trigrams(term)) for term in terms],
+                        trigrams={gram: frozenset(ids) for gram, ids in trigrams.items()})
+
+
+def _dice_scan(terms, word):
+    grams = _trigrams(word)
+    matches = []
+    for term in terms:
+        similarity = 2 * len(grams & _trigrams(term)) / (len(grams) + len(_trigrams(term)))
+        if similarity >= FUZZY_MIN_SIMILARITY:
+            matches.append((similarity, term))
+    return heapq.nlargest(FUZZY_MAX_TERMS, matches)
+
+
+def _misspell(word, rng):
+    position = rng.randrange(len(word))
+    edit = rng.choice(['drop', 'swap', 'replace', 'insert'])
+    if edit == 'drop':
+        return word[:position] + word[position + 1:]
+    if edit == 'swap' and position < len(word) - 1:
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    if edit == 'insert':
+        return word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+@pytest.fixture(scope='module')
+def synthetic_terms():
+    rng = random.Random(11)
+    stems = ['malaria', 'typhoid', 'dengue', 'diabetes', 'cholera', 'hepatitis', 'measles', 'pneumonia']
+    terms = set(stems)
+    while len(terms) < 3000:
+        # Many near-duplicates, so candidates share their common trigrams
+        terms.add(_misspell(_misspell(rng.choice(stems), rng), rng) + rng.choice(['', 'a', 'tis', 'ia']))
+        terms.add(''.join(rng.choice('aeioulmnrst') for _ in range(rng.randint(4, 10))))
+    return sorted(terms)
+
+
+def test_fuzzy_terms_match_a_full_dice_scan(synthetic_terms):
+    index = _index(synthetic_terms)
+    rng = random.Random(12)
+    for _ in range(500):
+        word = _misspell(rng.choice(synthetic_terms), rng)
+        assert DiseaseSearch._fuzzy_terms(index, word) == _dice_scan(synthetic_terms, word)
+
+
+def test_fuzzy_terms_match_a_full_dice_scan_on_reference_data():
+    search = DiseaseSearch()
+    for language in ('en', 'hi'):
+        index = search._indexes.get(language)
+        for term in index.terms:
+            for word in {term[1:], term[:-1], term + 'a', term[::-1]}:
+                if len(word) >= 2:
+                    assert DiseaseSearch._fuzzy_terms(index, word) == _dice_scan(index.terms, word)
+
+
+def test_misspelled_disease_names_are_found():
+    search = DiseaseSearch()
+    assert search.search('diabtes', 'en')[0]['name'] == 'Diabetes Type 2'
+    assert search.search('hypertensoin', 'en')[0]['name'] == 'Hypertension'
+    assert search.search('xqzvw', 'en') == []
+
+
+def test_only_short_queries_fall_back_to_a_row_scan(monkeypatch):
+    search = DiseaseSearch()
+    assert search.search('dia', 'en')[0]['name'] == 'Diabetes Type 2'
+
+    class _NoScan(list):
+        def __iter__(self):
+            raise AssertionError('scanned every row')
+
+    index = search._indexes.get('en')
+    monkeypatch.setattr(index, 'haystacks', _NoScan(index.haystacks))
+    assert search.search('zzzzqqqq', 'en') == []
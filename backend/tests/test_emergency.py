@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.intent_router import intent_router
+from app.services.localization import catalog
+
+
+@pytest.mark.parametrize('query, language', [
+    ('ডায়াবেটিস বিষয়ে জানতে চাই', 'bn'),
+    ('দাঁতের মাড়ি থেকে রক্তপাত হয়', 'bn'),
+    ('मसूड़ों से खून बहता है', 'hi'),
+    ('मधुमेह के बारे में बताइए', 'hi'),
+    ('is emergency contraception safe', 'en'),
+    ('how severe is diabetes', 'en'),
+    ('my gums are bleeding when I brush', 'en'),
+])
+def test_ordinary_questions_are_not_emergencies(query, language):
+    assert not intent_router.route(query, language).is_emergency
+
+
+@pytest.mark.parametrize('query, language', [
+    ('আমার বুকে ব্যথা হচ্ছে', 'bn'),
+    ('বাচ্চা বিষ খেয়েছে', 'bn'),
+    ('पापा बेहोश हो गए', 'hi'),
+    ('उसने ज़हर खा लिया है', 'hi'),
+    ('बहुत खून बह रहा है', 'hi'),
+    ('my father has chest pain', 'en'),
+    ('she fainted and is not breathing', 'en'),
+])
+def test_acute_emergencies_are_detected(query, language):
+    assert intent_router.route(query, language).is_emergency
+
+
+def test_keywords_match_whole_words_only():
+    assert catalog.matches('first_aid', 'how to treat a burn', 'en')
+    assert not catalog.matches('first_aid', 'what causes heartburn', 'en')
+    # Ends in a vowel sign, which \b would not treat as a word character
+    assert catalog.matches('treatment', 'कौन सी दवा लें', 'hi')
@@ -0,0 +1,112 @@
+import math
+import random
+
+import pytest
+
+from app.services.facilities import EARTH_RADIUS_KM, FacilityIndex
+
+
+def _facility(i, latitude, longitude, kind):
+    return {'id': f'F{i}', 'name': f'Facility {i}', 'type': kind, 'latitude': latitude, 'longitude': longitude,
+            'phone': '', 'address': '', 'district': '', 'state': ''}
+
+
+def _records(*facilities):
+    return {facility['id']: facility for facility in facilities}
+
+
+def _distance_km(latitude, longitude, facility):
+    lat0, lat = math.radians(latitude), math.radians(facility['latitude'])
+    a = (math.sin((lat - lat0) / 2) ** 2
+         + math.cos(lat0) * math.cos(lat) * math.sin(math.radians(facility['longitude'] - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def _scan(facilities, latitude, longitude, k, types=None, max_km=None):
+    found = sorted((_distance_km(latitude, longitude, f), f['id']) for f in facilities.values()
+                   if types is None or f['type'].lower() in types)
+    return [round(d, 3) for d, _ in found if max_km is None or d <= max_km][:k]
+
+
+@pytest.fixture(scope='module')
+def facilities():
+    rng = random.Random(3)
+    records = {}
+    for i in range(3000):
+        if i % 3 == 0:
+            latitude, longitude = rng.gauss(28.6, 0.3), rng.gauss(77.2, 0.3)
+        else:
+            latitude, longitude = rng.uniform(8, 35), rng.uniform(68, 97)
+        record = _facility(i, round(latitude, 5), round(longitude, 5), rng.choice(['PHC', 'CHC', 'Hospital']))
+        records[record['id']] = record
+    return records
+
+
+@pytest.fixture(scope='module')
+def index(facilities):
+    index = FacilityIndex('missing.csv')
+    index.update(facilities, version='1')
+    return index
+
+
+def test_nearest_matches_full_scan(facilities, index):
+    rng = random.Random(5)
+    for _ in range(300):
+        latitude, longitude, k = rng.uniform(5, 38), rng.uniform(65, 100), rng.randint(1, 10)
+        found = [f['distance_km'] for f in index.nearest(latitude, longitude, k)]
+        assert found == _scan(facilities, latitude, longitude, k)
+
+
+def test_type_filter_and_radius_match_full_scan(facilities, index):
+    rng = random.Random(6)
+    for _ in range(100):
+        latitude, longitude = rng.uniform(8, 35), rng.uniform(68, 97)
+        found = index.nearest(latitude, longitude, 5, types=['Hospital'], max_km=150)
+        assert [f['distance_km'] for f in found] == _scan(facilities, latitude, longitude, 5, {'hospital'}, 150)
+        assert all(f['type'] == 'Hospital' for f in found)
+
+
+def test_queries_far_from_every_facility_match_full_scan_without_walking_empty_rings(facilities, index, monkeypatch):
+    rings = []
+    walk = index._ring
+    monkeypatch.setattr(index, '_ring', lambda row0, column0, ring: rings.append(ring) or walk(row0, column0, ring))
+    for latitude, longitude in [(0, -100), (51.5, 0), (-60, 170), (80, 77), (20, -170)]:
+        rings.clear()
+        found = [f['distance_km'] for f in index.nearest(latitude, longitude, 5)]
+        assert found == _scan(facilities, latitude, longitude, 5)
+        assert len(rings) <= 2
+
+
+def test_fewer_facilities_than_k_returns_them_all(facilities, index):
+    assert len(index.nearest(20, 80, k=50, types=['PHC'])) == 50
+    few = FacilityIndex('missing.csv')
+    few.update(_records(_facility('a', 10.0, 76.0, 'PHC'), _facility('b', 30.0, 90.0, 'CHC')), version='1')
+    assert [f['id'] for f in few.nearest(-40, -60, k=5)] == ['Fa', 'Fb']
+
+
+def test_empty_index_and_unknown_type_return_nothing(index):
+    assert FacilityIndex('missing.csv').nearest(28.6, 77.2) == []
+    assert index.nearest(28.6, 77.2, types=['ambulance']) == []
+
+
+def test_search_wraps_around_the_antimeridian():
+    wrapped = FacilityIndex('missing.csv')
+    wrapped.update(_records(_facility('e', 0.0, 179.9, 'PHC'), _facility('w', 0.0, -179.8, 'PHC'),
+                            _facility('far', 0.0, 170.0, 'PHC')), version='1')
+    assert [f['id'] for f in wrapped.nearest(0.0, -179.99, k=2)] == ['Fe', 'Fw']
+
+
+def test_incremental_update_matches_rebuild(facilities):
+    index = FacilityIndex('missing.csv')
+    index.update(facilities, version='1')
+    edited = dict(facilities)
+    for i, facility_id in enumerate(sorted(edited)[:300]):
+        if i % 3 == 0:
+            del edited[facility_id]
+        else:
+            edited[facility_id] = {**edited[facility_id], 'latitude': edited[facility_id]['latitude'] + 0.4}
+    index.update(edited, version='2')
+    rebuilt = FacilityIndex('missing.csv')
+    rebuilt.update(edited, version='2')
+    for latitude, longitude in [(28.6, 77.2), (12.9, 77.6), (22.5, 88.3), (19.0, 72.8)]:
+        assert index.nearest(latitude, longitude, 8) == rebuilt.nearest(latitude, longitude, 8)
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services import faq
+from app.services.ai_health_assistant import ai_assistant
+from app.services.health_database import HealthDatabase
+
+
+@pytest.fixture
+def miner(tmp_path, monkeypatch):
+    monkeypatch.setattr(faq.answer_engine, 'answer', lambda question, language: None)
+    db = HealthDatabase(str(tmp_path / 'faq.db'))
+    db.upsert_faq_candidate('en', 'stay healthy monsoon', 'How to stay healthy in the monsoon?', None, 5)
+    return faq.FAQMiner(str(tmp_path / 'index'), db=db)
+
+
+def _answer(miner):
+    return miner.db.get_faq_candidates_rows(status='pending')[0]['answer']
+
+
+def test_failed_generation_is_not_stored_and_is_retried(miner, monkeypatch):
+    monkeypatch.setattr(ai_assistant, 'generate_response',
+                        lambda question, language, user_id=None: ai_assistant.get_fallback_response(language))
+    assert miner.generate_answers() == 0
+    assert _answer(miner) is None
+
+    monkeypatch.setattr(ai_assistant, 'generate_response', lambda question, language, user_id=None: 'Drink boiled water.')
+    assert miner.generate_answers() == 1
+    assert _answer(miner) == 'Drink boiled water.'
+
+
+def test_failed_regeneration_keeps_the_previous_answer(miner, monkeypatch):
+    candidate_id = miner.db.get_faq_candidates_rows(status='pending')[0]['id']
+    miner.db.update_faq_candidate(candidate_id, answer='Drink boiled water.')
+    monkeypatch.setattr(ai_assistant, 'generate_response',
+                        lambda question, language, user_id=None: ai_assistant.get_fallback_response(language))
+    assert miner.generate_answers(regenerate=True) == 0
+    assert _answer(miner) == 'Drink boiled water.'
+
+
+def test_fallback_answers_are_neither_kept_nor_published(miner):
+    candidate_id = miner.db.get_faq_candidates_rows(status='pending')[0]['id']
+    miner.db.update_faq_candidate(candidate_id, status='approved', answer=ai_assistant.get_fallback_response('en'))
+    assert not faq.usable_answer(ai_assistant.get_fallback_response('hi'), 'hi')
+    assert faq.usable_answer('Drink boiled water.', 'en')
+    assert miner.publish() is None
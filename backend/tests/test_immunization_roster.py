@@ -0,0 +1,56 @@
+from datetime import date
+
+from app.services.immunization_roster import ImmunizationRoster
+
+AS_OF = date(2025, 1, 15)
+
+
+def test_invalid_and_missing_dates_become_error_rows():
+    rows = [
+        {'child_id': 'blank', 'dob': ''},
+        {'child_id': 'nat', 'dob': 'NaT'},
+        {'child_id': 'month', 'dob': '2024-13-01'},
+        # Loose date strings numpy would accept, and a non-string from JSONL
+        {'child_id': 'year', 'dob': '2020'},
+        {'child_id': 'today', 'dob': 'today'},
+        {'child_id': 'now', 'dob': 'now'},
+        {'child_id': 'negative', 'dob': '-5'},
+        {'child_id': 'number', 'dob': 20240101},
+        {'child_id': 'future', 'dob': '2025-02-01'},
+        {'child_id': 'ok', 'dob': '2024-10-01'},
+    ]
+    results = ImmunizationRoster().compute(rows, 'en', AS_OF)
+    assert [result['child_id'] for result in results] == [row['child_id'] for row in rows]
+    assert all('error' in result for result in results[:-1])
+    assert results[-1]['age_days'] == 106
+    assert 'error' not in results[-1]
+
+
+def test_language_without_dose_windows_has_nothing_due():
+    roster = ImmunizationRoster()
+    assert not roster._schedules.get('xx').doses
+    results = roster.compute([{'child_id': 'c1', 'dob': '2024-10-01'}], 'xx', AS_OF)
+    assert results == [{'child_id': 'c1', 'dob': '2024-10-01', 'age_days': 106,
+                        'due': [], 'overdue': [], 'next': None}]
+
+
+def test_stream_completes_for_language_without_dose_windows():
+    lines = ['child_id,dob', 'c1,2024-10-01', 'c2,NaT']
+    output = b''.join(ImmunizationRoster().stream(lines, 'xx', AS_OF))
+    assert output.count(b'\n') == 2
+
+
+def test_due_and_overdue_match_dose_windows():
+    roster = ImmunizationRoster()
+    schedule = roster._schedules.get('en')
+    rows = [{'child_id': str(days), 'dob': str(date.fromordinal(AS_OF.toordinal() - days))}
+            for days in range(0, 2500, 7)]
+    for days, result in zip(range(0, 2500, 7), roster.compute(rows, 'en', AS_OF)):
+        due = {(d['vaccine'], d['dose']) for d in result['due']}
+        overdue = {(d['vaccine'], d['dose']) for d in result['overdue']}
+        expected_due = {(v, d) for v, d, low, high in zip(schedule.vaccines, schedule.doses,
+                                                          schedule.min_days, schedule.max_days)
+                        if low <= days <= high}
+        expected_overdue = {(v, d) for v, d, high in zip(schedule.vaccines, schedule.doses, schedule.max_days)
+                            if days > high}
+        assert (due, overdue) == (expected_due, expected_overdue)
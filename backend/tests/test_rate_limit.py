@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from app.core.rate_limit import BucketPolicy, InMemoryRateLimitBackend, SQLiteRateLimitBackend
+
+POLICY = BucketPolicy(capacity=2, refill_per_second=1)
+
+
+def test_memory_backend_keeps_at_most_max_keys_dropping_least_recent():
+    backend = InMemoryRateLimitBackend(max_keys=3)
+    for key in ['a', 'b', 'c']:
+        backend.take(key, POLICY, now=0.0)
+    backend.take('a', POLICY, now=0.1)
+    backend.take('d', POLICY, now=0.2)
+    assert list(backend._buckets) == ['c', 'a', 'd']
+
+
+def test_memory_backend_refills_and_reports_retry_after():
+    backend = InMemoryRateLimitBackend()
+    assert backend.take('k', POLICY, now=0.0) == 0
+    assert backend.take('k', POLICY, now=0.0) == 0
+    assert backend.take('k', POLICY, now=0.0) == pytest.approx(1.0)
+    assert backend.take('k', POLICY, now=1.5) == 0
+
+
+def test_sqlite_backend_prunes_full_buckets(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / 'limits.db'), prune_seconds=10)
+    backend.take('old', POLICY, now=100.0)
+    backend.take('new', POLICY, now=200.0)
+    with sqlite3.connect(backend.db_path) as conn:
+        assert [row[0] for row in conn.execute('SELECT key FROM rate_buckets')] == ['new']
+
+
+def test_sqlite_backend_reports_the_real_error_when_locked(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / 'limits.db'))
+    backend._connect = lambda: sqlite3.connect(backend.db_path, timeout=0, isolation_level=None)
+    holder = sqlite3.connect(backend.db_path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            backend.take('k', POLICY, now=0.0)
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
@@ -0,0 +1,48 @@
+import importlib.util
+import os
+
+import pytest
+
+SIH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sih')
+
+# Loaded by path: putting backend/sih on sys.path would let its app.py shadow the app package
+_spec = importlib.util.spec_from_file_location('sih_locale_catalog', os.path.join(SIH_DIR, 'locale_catalog.py'))
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+LocaleCatalog = _module.LocaleCatalog
+
+REPO_DIR = os.path.dirname(os.path.dirname(SIH_DIR))
+LOCALE_DIRS = [os.path.join(SIH_DIR, 'locales')] + [
+    os.path.join(REPO_DIR, 'frontend', 'public', app, 'locales') for app in ('sih', 'sih_new')
+]
+
+
+@pytest.fixture(scope='module', params=LOCALE_DIRS)
+def locales(request):
+    return LocaleCatalog(request.param)
+
+
+@pytest.mark.parametrize('text', [
+    'what causes heartburn', 'dealing with burnout', 'severe headache since morning',
+    'how to lower blood pressure', 'is emergency contraception safe', 'मसूड़ों से खून आता है',
+])
+def test_ordinary_questions_are_not_emergencies_or_first_aid(locales, text):
+    language = 'hi' if not text.isascii() else 'en'
+    assert not locales.matches('emergency', text, language)
+    assert not locales.matches('first_aid', text, language)
+
+
+@pytest.mark.parametrize('text, language', [
+    ('my father has chest pain', 'en'),
+    ('she is unconscious', 'en'),
+    ('पापा बेहोश हो गए', 'hi'),
+])
+def test_acute_emergencies_match(locales, text, language):
+    assert locales.matches('emergency', text, language)
+
+
+def test_first_aid_and_disease_words_match_whole_words():
+    locales = LocaleCatalog(LOCALE_DIRS[0])
+    assert locales.matches('first_aid', 'how to treat burns', 'en')
+    assert locales.matches('disease', 'what are the symptoms of malaria', 'en')
+    assert locales.matches('vaccine', 'टीके कब लगते हैं', 'hi')
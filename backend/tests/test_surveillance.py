@@ -0,0 +1,59 @@
+import random
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.health import router
+from app.core.auth import get_current_user
+from app.services.surveillance import (
+    UNKNOWN_REGION, CountMinSketch, SymptomSurveillance, normalize_region, valid_region,
+)
+
+
+def test_region_names_in_any_script_are_accepted():
+    for region in ['Pune', 'Navi Mumbai', "Cooch-Behar", 'St. Thomas', 'वाराणसी', 'தஞ்சாவூர்']:
+        assert valid_region(region)
+        assert normalize_region(region) == region.casefold()
+
+
+def test_other_regions_are_rejected_or_counted_as_unknown():
+    for region in ['', '*', 'pune|en', '<script>', 'a' * 65, '../etc']:
+        assert not valid_region(region)
+    for region in [None, '', '*', 'pune|en', ['pune']]:
+        assert normalize_region(region) == UNKNOWN_REGION
+
+
+def test_count_min_never_undercounts():
+    rng = random.Random(48)
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = Counter(f'term{rng.randrange(500)}' for _ in range(5000))
+    for key, count in truth.items():
+        sketch.add(sketch.cells(key), count)
+    assert all(sketch.estimate(sketch.cells(key)) >= count for key, count in truth.items())
+
+
+def test_report_counts_mentions_per_region_and_skips_negated_terms():
+    surveillance = SymptomSurveillance(clock=lambda: 0.0)
+    surveillance.observe('I have fever and headache, no cough', 'en', 'Pune')
+    surveillance.observe('fever again', 'en', 'pune|en')
+    counts = {item['term']: item['count'] for item in surveillance.report()['top']}
+    assert counts == {'fever': 2, 'headache': 1}
+    assert surveillance.report('Pune')['messages'] == 1
+    assert surveillance.report(UNKNOWN_REGION)['messages'] == 1
+
+
+def test_report_windows_are_capped_at_the_retained_buckets():
+    surveillance = SymptomSurveillance(bucket_seconds=3600, buckets=72, clock=lambda: 0.0)
+    surveillance.observe('fever', 'en', 'Pune')
+    report = surveillance.report(hours=float('inf'), recent_hours=1e308)
+    assert report['messages'] == 1
+    assert report['recent_hours'] == 72
+
+    app = FastAPI()
+    app.include_router(router, prefix='/api')
+    app.dependency_overrides[get_current_user] = lambda: {'uid': 'u1'}
+    client = TestClient(app)
+    for params in [{'hours': 'inf'}, {'hours': '1e308'}, {'recent_hours': 'inf'}, {'hours': 73}]:
+        assert client.get('/api/health/surveillance', params=params).status_code == 422
+    assert client.get('/api/health/surveillance', params={'hours': 72}).status_code == 200
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.health import router
+from app.services.age_parsing import age_in_days, parse_age
+from app.services.health_database import health_db
+from app.services.vaccine_schedule import VaccineSchedule
+
+
+class _Doses:
+    """Stand-in database serving a fixed list of dose windows."""
+
+    data_version = 1
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: row['min_age_days'])
+
+    def get_vaccination_doses_rows(self, language='en'):
+        return self.rows
+
+
+def _due_scan(rows, age_days):
+    return [row for row in rows if row['min_age_days'] <= age_days <= row['max_age_days']]
+
+
+def test_due_matches_a_full_scan_of_the_dose_windows():
+    schedule = VaccineSchedule()
+    for language in ('en', 'hi'):
+        rows = health_db.get_vaccination_doses_rows(language)
+        ages = {-1, 0} | {row['min_age_days'] + delta for row in rows for delta in (-1, 0, 1)} \
+            | {row['max_age_days'] + delta for row in rows for delta in (-1, 0, 1)}
+        for age in sorted(ages):
+            assert schedule.due(age, language) == _due_scan(rows, age)
+
+
+def test_due_matches_a_full_scan_of_random_overlapping_windows():
+    rng = random.Random(45)
+    rows = []
+    for number in range(200):
+        start = rng.randrange(0, 5000)
+        rows.append({'vaccine_name': f'v{number}', 'dose': 'Dose 1',
+                     'min_age_days': start, 'max_age_days': start + rng.randrange(0, 400)})
+    schedule = VaccineSchedule(db=_Doses(rows))
+    for age in range(-2, 5500):
+        assert schedule.due(age) == _due_scan(schedule.db.rows, age)
+
+
+def test_no_doses_due_without_windows():
+    schedule = VaccineSchedule(db=_Doses([]))
+    assert schedule.due(0) == []
+    assert schedule.vaccinations_for_age(100) == []
+
+
+def test_due_endpoint_rejects_ages_out_of_range():
+    app = FastAPI()
+    app.include_router(router, prefix='/api')
+    client = TestClient(app)
+    assert client.get('/api/health/vaccinations/due', params={'age': 6, 'unit': 'weeks'}).status_code == 200
+    # Past the largest number of days any unit allows: rejected by the query bound
+    for age in ['inf', '-inf', 'nan', '1e308']:
+        assert client.get('/api/health/vaccinations/due', params={'age': age, 'unit': 'years'}).status_code == 422
+    # Within it, but over 100 years in the chosen unit
+    for age, unit in [('101', 'years'), ('1300', 'months')]:
+        response = client.get('/api/health/vaccinations/due', params={'age': age, 'unit': unit})
+        assert response.status_code == 400
+    assert age_in_days(100, 'years') == 36525
+    with pytest.raises(ValueError):
+        age_in_days(float('inf'), 'days')
+    assert parse_age('9' * 400 + ' years') is None
@@ -7,8 +7,13 @@ import re
 from datetime import datetime, timedelta
 import logging
 import os
+import sys
 from typing import Dict, List, Optional
 
+# The locale catalog is shared with the main Flask app in backend/sih
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'backend', 'sih'))
+from locale_catalog import LocaleCatalog
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -297,7 +302,7 @@ Please provide a helpful response in {'Hindi' if language == 'hi' else 'English'
             for disease in diseases[:2]: 
                 results.append(f"- {disease['name']}: {disease['symptoms']}")
         
-        if any(keyword in query.lower() for keyword in ['vaccine', 'vaccination', 'immunization', 'टीका', 'टीकाकरण']):
+        if locales.matches('vaccine', query, language) or locales.matches('vaccine', query, 'en'):
             vaccines = self.health_db.get_vaccination_schedule(language=language)
             if vaccines:
                 results.append("\nVaccination Information:")
@@ -311,29 +316,18 @@ Please provide a helpful response in {'Hindi' if language == 'hi' else 'English'
         response = re.sub(r'\*\*([^*]+)\*\*', r'\1', response)
         response = re.sub(r'\*([^*]+)\*', r'\1', response)
         
-        serious_keywords = {
-            'en': ['chest pain', 'difficulty breathing', 'severe', 'emergency', 'blood', 'unconscious'],
-            'hi': ['सीने में दर्द', 'सांस लेने में कठिनाई', 'गंभीर', 'आपातकाल', 'खून', 'बेहोश']
-        }
-        
-        if any(keyword in response.lower() for keyword in serious_keywords[language]):
-            emergency_note = {
-                'en': "\n⚠️ For medical emergencies, call 108 immediately.",
-                'hi': "\n⚠️ आपातकालीन स्थिति में तुरंत 108 पर कॉल करें।"
-            }
-            if emergency_note[language] not in response:
-                response += emergency_note[language]
+        if locales.matches('emergency', response, language):
+            note = locales.text('emergency_note', language)
+            if note not in response:
+                response += note
         
         return response
     
     def get_fallback_response(self, language: str) -> str:
         """Provide fallback response when AI fails"""
-        fallback = {
-            'en': "I'm sorry, I couldn't process your request right now. Please try rephrasing your question or contact a healthcare professional for urgent matters. For emergencies, call 108.",
-            'hi': "मुझे खेद है, मैं अभी आपके अनुरोध को संसाधित नहीं कर सका। कृपया अपने प्रश्न को दोबारा पूछें या तत्काल मामलों के लिए एक स्वास्थ्य पेशेवर से संपर्क करें। आपातकाल के लिए 108 पर कॉल करें।"
-        }
-        return fallback[language]
+        return locales.text('fallback', language)
 
+locales = LocaleCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales'))
 health_db = HealthDatabase()
 ai_assistant = AIHealthAssistant(health_db)
 
@@ -397,25 +391,8 @@ def get_health_tips():
     """Get health tips"""
     category = request.args.get('category', '')
     language = request.args.get('lang', 'en')
-    tips = {
-        'en': [
-            "Drink at least 8 glasses of water daily",
-            "Exercise for 30 minutes daily",
-            "Wash hands frequently to prevent infections",
-            "Get adequate sleep (7-9 hours)",
-            "Eat a balanced diet with fruits and vegetables"
-        ],
-        'hi': [
-            "दिन में कम से कम 8 गिलास पानी पिएं",
-            "दैनिक 30 मिनट व्यायाम करें",
-            "संक्रमण से बचने के लिए हाथ बार-बार धोएं",
-            "पर्याप्त नींद लें (7-9 घंटे)",
-            "फल और सब्जियों के साथ संतुलित आहार लें"
-        ]
-    }
-    
     return jsonify({
-        'tips': tips[language],
+        'tips': locales.text('health_tips', language),
         'language': language
     })
 
@@ -424,22 +401,7 @@ def emergency_info():
     """Get emergency contact information"""
     language = request.args.get('lang', 'en')
     
-    emergency_info = {
-        'en': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'For medical emergencies, call 108 immediately. This is a free service available 24/7 across India.'
-        },
-        'hi': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'आपातकालीन स्थिति में तुरंत 108 पर कॉल करें। यह भारत में 24/7 उपलब्ध एक निःशुल्क सेवा है।'
-        }
-    }
-    
-    return jsonify(emergency_info[language])
+    return jsonify(locales.text('emergency_info', language))
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -7,9 +7,14 @@ import re
 from datetime import datetime
 import logging
 import os
+import sys
 from typing import Dict, List
 from dotenv import load_dotenv
 
+# The locale catalog is shared with the main Flask app in backend/sih
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'backend', 'sih'))
+from locale_catalog import LocaleCatalog
+
 # Load environment variables first
 load_dotenv()
 
@@ -383,22 +388,7 @@ Keep each bullet point concise but informative."""
         results = []
         
         # Check for vaccination keywords first
-        vaccine_keywords = {
-            'en': ['vaccine', 'vaccination', 'immunization', 'polio', 'mmr', 'dpt', 'bcg'],
-            'hi': ['टीका', 'टीकाकरण', 'पोलियो', 'एमएमआर', 'डीपीटी', 'बीसीजी'],
-            'bn': ['টিকা', 'টিকাদান', 'পোলিও', 'এমএমআর', 'ডিপিটি', 'বিসিজি'],
-            'ta': ['தடுப்பூசி', 'தடுப்பூசிகள்', 'போலியோ', 'எம்எம்ஆர்', 'டிபிடி', 'பிசிஜி'],
-            'te': ['టీకా', 'టీకాలు', 'పోలియో', 'ఎంఎంఆర్', 'డిపిటి', 'బిసిజి'],
-            'mr': ['लस', 'लसीकरण', 'पोलिओ', 'एमएमआर', 'डीपीटी', 'बीसीजी'],
-            'gu': ['રસી', 'રસીકરણ', 'પોલિયો', 'એમએમઆર', 'ડીપીટી', 'બીસીજી'],
-            'kn': ['ಲಸಿಕೆ', 'ಲಸಿಕೆಗಳು', 'ಪೋಲಿಯೋ', 'ಎಂಎಂಆರ್', 'ಡಿಪಿಟಿ', 'ಬಿಸಿಜಿ'],
-            'ml': ['വാക്സിൻ', 'വാക്സിനേഷൻ', 'പോളിയോ', 'എംഎംആർ', 'ഡിപിടി', 'ബിസിജി'],
-            'pa': ['ਟੀਕਾ', 'ਟੀਕਾਕਰਨ', 'ਪੋਲੀਓ', 'ਐਮਐਮਆਰ', 'ਡੀਪੀਟੀ', 'ਬੀਸੀਜੀ'],
-            'or': ['ଟୀକା', 'ଟୀକାକରଣ', 'ପୋଲିଓ', 'ଏମଏମଆର', 'ଡିପିଟି', 'ବିସିଜି'],
-            'as': ['টিকাদান', 'টিকাকৰণ', 'পোলিও', 'এমএমআৰ', 'ডিপিটি', 'বিচিজি'],
-        }
-        
-        if any(keyword in query.lower() for keyword in vaccine_keywords.get(language, [])):
+        if locales.matches('vaccine', query, language):
             vaccines = self.health_db.get_vaccination_schedule(language=language)
             if vaccines:
                 results.append("Vaccination Schedule:")
@@ -423,60 +413,19 @@ Keep each bullet point concise but informative."""
         response = re.sub(r'\*([^*]+)\*', r'\1', response)
         
         # Check for emergency keywords and add a prominent warning
-        serious_keywords = {
-            'en': ['chest pain', 'difficulty breathing', 'severe', 'emergency', 'blood', 'unconscious', 'fainting'],
-            'hi': ['सीने में दर्द', 'सांस लेने में कठिनाई', 'गंभीर', 'आपातकाल', 'खून', 'बेहोश'],
-            'bn': ['বুকে ব্যথা', 'শ্বাসকষ্ট', 'গুরুতর', 'জরুরি', 'রক্ত', 'অজ্ঞান'],
-            'ta': ['மார்பு வலி', 'மூச்சு திணறல்', 'கடுமையான', 'அவசரம்', 'இரத்தம்', 'மயக்கம்'],
-            'te': ['ఛాతీ నొప్పి', 'శ్వాస తీసుకోవడంలో ఇబ్బంది', 'తీవ్రమైన', 'అత్యవసర', 'రక్తం', 'అపస్మారక'],
-            'mr': ['छातीत दुखणे', 'श्वास घेण्यास त्रास', 'गंभीर', 'आपत्कालीन', 'रक्त', 'बेशुद्ध'],
-            'gu': ['છાતીમાં દુખાવો', 'શ્વાસ લેવામાં તકલીફ', 'ગંભીર', 'કટોકટી', 'લોહી', 'બેભાન'],
-            'kn': ['ಎದೆನೋವು', 'ಉಸಿರಾಟದ ತೊಂದರೆ', 'ತೀವ್ರ', 'ತುರ್ತು', 'ರಕ್ತ', 'ಪ್ರಜ್ಞಾಹೀನ'],
-            'ml': ['നെഞ്ചുവേദന', 'ശ്വാസംമുട്ടൽ', 'ഗുരുതരമായ', 'അടിയന്തര', 'രക്തം', 'ബോധം നഷ്ടപ്പെട്ടു'],
-            'pa': ['ਛਾਤੀ ਵਿੱਚ ਦਰਦ', 'ਸਾਹ ਲੈਣ ਵਿੱਚ ਮੁਸ਼ਕਲ', 'ਗੰਭੀਰ', 'ਐਮਰਜੈਂਸੀ', 'ਖੂਨ', 'ਬੇਹੋਸ਼'],
-            'or': ['ଛାତି ଯନ୍ତ୍ରଣା', 'ଶ୍ବାସକଷ୍ଟ', 'ଗୁରୁତର', 'ଜରୁରୀ', 'ରକ୍ତ', 'ବେହୋଶ'],
-            'as': ['বুকুৰ বিষ', 'শ্বাস লোৱাত কষ্ট', 'গুৰুতৰ', 'জৰুৰী', 'তেজ', 'অজ্ঞান'],
-        }
-        
-        if any(keyword in response.lower() for keyword in serious_keywords.get(language, [])):
-            emergency_note = {
-                'en': "\n⚠️ For medical emergencies, call 108 immediately.",
-                'hi': "\n⚠️ आपातकालीन स्थिति में तुरंत 108 पर कॉल करें।",
-                'bn': "\n⚠️ চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।",
-                'ta': "\n⚠️ மருத்துவ அவசரநிலைக்கு, உடனடியாக 108 ஐ அழைக்கவும்.",
-                'te': "\n⚠️ వైద్య అత్యవసర పరిస్థితుల్లో, వెంటనే 108కు కాల్ చేయండి.",
-                'mr': "\n⚠️ वैद्यकीय आपत्कालीन परिस्थितीत, त्वरित 108 वर कॉल करा.",
-                'gu': "\n⚠️ તબીબી કટોકટી માટે, તુરંત 108 પર કૉલ કરો.",
-                'kn': "\n⚠️ ವೈದ್ಯಕೀಯ ತುರ್ತುಸ್ಥಿತಿಗೆ, ತಕ್ಷಣ 108 ಗೆ ಕರೆ ಮಾಡಿ.",
-                'ml': "\n⚠️ മെഡിക്കൽ എമർജൻസിക്ക്, ഉടൻ തന്നെ 108-ൽ വിളിക്കുക.",
-                'pa': "\n⚠️ ਡਾਕਟਰੀ ਐਮਰਜੈਂਸੀ ਲਈ, ਤੁਰੰਤ 108 'ਤੇ ਕਾਲ ਕਰੋ।",
-                'or': "\n⚠️ ଚିକିତ୍ସା ଜରୁରୀ ଅବସ୍ଥା ପାଇଁ, ତୁରନ୍ତ 108 କୁ କଲ୍ କରନ୍ତୁ।",
-                'as': "\n⚠️ চিকিৎসা জৰুৰীকালীন অৱস্থাৰ বাবে, তৎক্ষণাৎ 108 নম্বৰত ফোন কৰক।",
-            }
-            if emergency_note[language] not in response:
-                response += emergency_note[language]
+        if locales.matches('emergency', response, language):
+            note = locales.text('emergency_note', language)
+            if note not in response:
+                response += note
         
         return response
     
     def get_fallback_response(self, language: str) -> str:
         """Provides a simple fallback message if AI generation fails."""
-        fallback = {
-            'en': "I'm sorry, I couldn't process your request right now. Please try rephrasing your question or contact a healthcare professional for urgent matters. For emergencies, call 108.",
-            'hi': "मुझे खेद है, मैं अभी आपके अनुरोध को संसाधित नहीं कर सका। कृपया अपने प्रश्न को दोबारा पूछें या तत्काल मामलों के लिए एक स्वास्थ्य पेशेवर से संपर्क करें। आपातकाल के लिए 108 पर कॉल करें।",
-            'bn': "আমি দুঃখিত, আমি আপনার অনুরোধটি এই মুহূর্তে প্রক্রিয়া করতে পারিনি। অনুগ্রহ করে আপনার প্রশ্নটি পুনরায় লিখুন বা জরুরি প্রয়োজনে একজন স্বাস্থ্যসেবা পেশাদারের সাথে যোগাযোগ করুন। জরুরি অবস্থার জন্য, 108 নম্বরে কল করুন।",
-            'ta': "மன்னிக்கவும், உங்கள் கோரிக்கையை என்னால் இப்போதைக்குச் செயல்படுத்த முடியவில்லை. தயவுசெய்து உங்கள் கேள்வியை மீண்டும் கேளுங்கள் அல்லது அவசர விஷயங்களுக்கு சுகாதார நிபுணரைத் தொடர்பு கொள்ளுங்கள். அவசரநிலைக்கு, 108 ஐ அழைக்கவும்.",
-            'te': "క్షమించండి, నేను మీ అభ్యర్థనను ప్రస్తుతం ప్రాసెస్ చేయలేకపోయాను. దయచేసి మీ ప్రశ్నను మళ్లీ అడగండి లేదా అత్యవసర విషయాల కోసం ఆరోగ్య సంరక్షణ నిపుణుడిని సంప్రదించండి. అత్యవసర పరిస్థితులకు, 108కి కాల్ చేయండి.",
-            'mr': "माफ करा, मी तुमचा सध्याचा विनंतीवर प्रक्रिया करू शकलो नाही. कृपया तुमचा प्रश्न पुन्हा विचारा किंवा तातडीच्या बाबींसाठी आरोग्यसेवा व्यावसायिकांशी संपर्क साधा. आपत्कालीन परिस्थितीत, 108 वर कॉल करा.",
-            'gu': "માફ કરશો, હું તમારી વિનંતી પર હાલમાં પ્રક્રિયા કરી શક્યો નથી. કૃપા કરીને તમારા પ્રશ્નને ફરીથી પૂછો અથવા તાત્કાલિક બાબતો માટે આરોગ્ય સંભાળ વ્યાવસાયિકનો સંપર્ક કરો. કટોકટી માટે, 108 પર કૉલ કરો.",
-            'kn': "ಕ್ಷಮಿಸಿ, ನಾನು ನಿಮ್ಮ ವಿನಂತಿಯನ್ನು ಇದೀಗ ಪ್ರಕ್ರಿಯೆಗೊಳಿಸಲು ಸಾಧ್ಯವಾಗಲಿಲ್ಲ. ದಯವಿಟ್ಟು ನಿಮ್ಮ ಪ್ರಶ್ನೆಯನ್ನು ಪುನಃ ರೂಪಿಸಿ ಅಥವಾ ತುರ್ತು ವಿಷಯಗಳಿಗಾಗಿ ಆರೋಗ್ಯ ವೃತ್ತಿಪರರನ್ನು ಸಂಪರ್ಕಿಸಿ. ತುರ್ತುಸ್ಥಿತಿಗಳಿಗಾಗಿ, 108 ಗೆ ಕರೆ ಮಾಡಿ.",
-            'ml': "ക്ഷമിക്കണം, എനിക്ക് നിങ്ങളുടെ അഭ്യർത്ഥന ഇപ്പോൾ പ്രോസസ്സ് ചെയ്യാൻ കഴിഞ്ഞില്ല. ദയവായി നിങ്ങളുടെ ചോദ്യം വീണ്ടും ചോദിക്കുക അല്ലെങ്കിൽ അടിയന്തിര കാര്യങ്ങൾക്കായി ഒരു ആരോഗ്യ വിദഗ്ദ്ധനെ സമീപിക്കുക. അടിയന്തിര സാഹചര്യങ്ങളിൽ, 108-ൽ വിളിക്കുക.",
-            'pa': "ਮੈਨੂੰ ਮਾਫ ਕਰਨਾ, ਮੈਂ ਤੁਹਾਡੀ ਬੇਨਤੀ ਨੂੰ ਇਸ ਸਮੇਂ ਪ੍ਰਕਿਰਿਆ ਨਹੀਂ ਕਰ ਸਕਿਆ। ਕਿਰਪਾ ਕਰਕੇ ਆਪਣੇ ਸਵਾਲ ਨੂੰ ਦੁਬਾਰਾ ਪੁੱਛੋ ਜਾਂ ਜ਼ਰੂਰੀ ਮਾਮਲਿਆਂ ਲਈ ਸਿਹਤ ਸੰਭਾਲ ਪੇਸ਼ੇਵਰ ਨਾਲ ਸੰਪਰਕ ਕਰੋ। ਐਮਰਜੈਂਸੀ ਲਈ, 108 'ਤੇ ਕਾਲ ਕਰੋ।",
-            'or': "ମୁଁ ଦୁଃଖିତ, ମୁଁ ବର୍ତ୍ତମାନ ଆପଣଙ୍କ ଅନୁରୋଧକୁ ପ୍ରକ୍ରିୟା କରିପାରିଲି ନାହିଁ। ଦୟାକରି ଆପଣଙ୍କ ପ୍ରଶ୍ନକୁ ପୁନର୍ବାର ପଚାରନ୍ତୁ କିମ୍ବା ଜରୁରୀ ବିଷୟ ପାଇଁ ଜଣେ ସ୍ୱାସ୍ଥ୍ୟ ସେବା ବୃତ୍ତିଗତଙ୍କ ସହିତ ଯୋଗାଯୋଗ କରନ୍ତୁ। ଜରୁରୀକାଳୀନ ପରିସ୍ଥିତିରେ, 108 କୁ କଲ୍ କରନ୍ତୁ।",
-            'as': "মই দুঃখিত, মই আপোনাৰ অনুৰোধটো এই মুহূৰ্তত প্ৰক্ৰিয়া কৰিব নোৱাৰিলোঁ। অনুগ্ৰহ কৰি আপোনাৰ প্ৰশ্নটো পুনৰ সুধিব অথবা জৰুৰী বিষয়ৰ বাবে এজন স্বাস্থ্যসেৱা পেছাদাৰীৰ সৈতে যোগাযোগ কৰক। জৰুৰীকালীন অৱস্থাৰ বাবে, 108 নম্বৰত ফোন কৰক।",
-        }
-        return fallback.get(language, fallback['en'])
+        return locales.text('fallback', language)
 
-# Initialize database and AI assistant
+# Initialize locales, database and AI assistant
+locales = LocaleCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales'))
 health_db = HealthDatabase()
 ai_assistant = AIHealthAssistant(health_db)
 
@@ -530,31 +479,7 @@ def emergency_info():
     """Endpoint to get emergency contact information."""
     language = request.args.get('lang', 'en')
     
-    emergency_info = {
-        'en': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'For medical emergencies, call 108 immediately. This is a free service available 24/7 across India.'
-        },
-        'hi': {
-            'ambulance': '108',
-            'police': '100',
-            'fire': '101',
-            'message': 'आपातकालीन स्थिति में तुरंत 108 पर कॉल करें। यह भारत में 24/7 उपलब्ध एक निःशुल्क सेवा है।'
-        },
-        'bn': {'message': 'চিকিৎসা জরুরী অবস্থার জন্য, অবিলম্বে 108 নম্বরে কল করুন।'},
-        'ta': {'message': 'மருத்துவ அவசரநிலைக்கு, உடனடியாக 108 ஐ அழைக்கவும்.'},
-        'te': {'message': 'వైద్య అత్యవసర పరిస్థితుల్లో, వెంటనే 108కు కాల్ చేయండి.'},
-        'mr': {'message': 'वैद्यकीय आपत्कालीन परिस्थितीत, त्वरित 108 वर कॉल करा.'},
-        'gu': {'message': 'તબીબી કટોકટી માટે, તુરંત 108 પર કૉલ કરો.'},
-        'kn': {'message': 'ವೈದ್ಯಕೀಯ ತುರ್ತುಸ್ಥಿತಿಗೆ, ತಕ್ಷಣ 108 ಗೆ ಕರೆ ಮಾಡಿ.'},
-        'ml': {'message': 'മെഡിക്കൽ എമർജൻസിക്ക്, ഉടൻ തന്നെ 108-ൽ വിളിക്കുക.'},
-        'pa': {'message': 'ਡਾਕਟਰੀ ਐਮਰਜੈਂਸੀ ਲਈ, ਤੁਰੰਤ 108 ਤੇ ਕਾਲ ਕਰੋ।'},
-        'or': {'message': 'ଚିକିତ୍ସା ଜରୁରୀ ଅବସ୍ଥା ପାଇଁ, ତୁରନ୍ତ 108 କୁ କଲ୍ କରନ୍ତୁ।'},
-        'as': {'message': 'চিকিৎসা জৰুৰীকালীন অৱস্থাৰ বাবে, তৎক্ষণাৎ 108 নম্বৰত ফোন কৰক।'},
-    }
-    return jsonify(emergency_info.get(language, emergency_info['en']))
+    return jsonify(locales.text('emergency_info', language))
 
 @app.route('/')
 def index():